@@ -1,6 +1,16 @@
 import { NextRequest, NextResponse } from "next/server";
 import { neon } from "@neondatabase/serverless";
-import type { DrillDownResponse } from "@/lib/types/drill-down";
+import type { DrillDownPostsPage, DrillDownResponse } from "@/lib/types/drill-down";
+import { cacheKey, cached } from "@/lib/cache";
+import { getCubeCell, type CubeTrack } from "@/lib/queries/cube";
+import {
+  POSTS_ORDER,
+  decodeCursor,
+  seekCondition,
+  splitPage,
+  type PostCursor,
+} from "@/lib/pagination";
+import { normalizeSearch, searchCondition } from "@/lib/search";
 
 const FRAUD_DIMENSIONS = ["fraud_type", "industry", "loss_bracket", "channel"];
 const IDV_DIMENSIONS = [
@@ -18,7 +28,8 @@ export async function GET(request: NextRequest) {
   try {
     const params = request.nextUrl.searchParams;
     const type = params.get("type");
-    const postsOffset = Math.max(0, Number(params.get("posts_offset") || "0"));
+    const cursorParam = params.get("posts_cursor");
+    const postsCursor = cursorParam ? decodeCursor(cursorParam) : null;
 
     if (!type || !["fraud", "idv"].includes(type)) {
       return NextResponse.json(
@@ -26,6 +37,9 @@ export async function GET(request: NextRequest) {
         { status: 400 }
       );
     }
+    if (cursorParam && !postsCursor) {
+      return NextResponse.json({ error: "invalid posts_cursor" }, { status: 400 });
+    }
 
     const sql = neon(process.env.DATABASE_URL!);
 
@@ -39,6 +53,7 @@ export async function GET(request: NextRequest) {
     const values: (string | number)[] = [];
     let paramIdx = 1;
     const activeFilters = new Set<string>();
+    const filters: Record<string, string> = {};
 
     for (const key of allowedFilters) {
       const val = params.get(key);
@@ -47,183 +62,194 @@ export async function GET(request: NextRequest) {
         values.push(val);
         paramIdx++;
         activeFilters.add(key);
+        filters[key] = val;
       }
     }
 
-    // Tag filter uses JSONB containment
+    // Tag filter is an index lookup on classification_tags (track, tag)
     const tag = params.get("tag");
     if (tag) {
-      conditions.push(`c.tags @> $${paramIdx}::jsonb`);
-      values.push(JSON.stringify([tag]));
+      conditions.push(
+        `c.post_id IN (SELECT ct.post_id FROM classification_tags ct WHERE ct.track = '${type}' AND ct.tag = $${paramIdx})`
+      );
+      values.push(tag);
       paramIdx++;
       activeFilters.add("tag");
     }
 
-    const whereClause = conditions.join(" AND ");
+    // Full-text search over the post and its comments
+    const q = normalizeSearch(params.get("q"));
+    if (q) {
+      conditions.push(searchCondition(paramIdx));
+      values.push(q);
+      paramIdx++;
+    }
 
-    // Determine which dimensions to break down (skip already-filtered ones)
-    const breakdownDimensions = allowedFilters.filter(
-      (d) => !activeFilters.has(d)
-    );
+    const whereClause = conditions.join(" AND ");
 
-    // Posts page size: first load = 5, subsequent = 10
-    const postsLimit = postsOffset === 0 ? INITIAL_PAGE_SIZE : LOAD_MORE_SIZE;
-
-    // Query A: Total count for filtered subset
-    const countQuery = `SELECT COUNT(*) as total FROM ${classTable} c WHERE ${whereClause}`;
-
-    // Query B: Tab total (all relevant posts for this type)
-    const tabTotalQuery = `SELECT COUNT(*) as total FROM ${classTable} c WHERE c.is_relevant = true`;
-
-    // Query C: Best quote, highest score, length between 50 and 300
-    const quoteQuery = `SELECT c.notable_quote as text, rp.subreddit, rp.score
-      FROM ${classTable} c
-      JOIN raw_posts rp ON c.post_id = rp.post_id
-      WHERE ${whereClause}
-        AND c.notable_quote IS NOT NULL
-        AND LENGTH(c.notable_quote) > 50
-        AND LENGTH(c.notable_quote) < 300
-      ORDER BY rp.score DESC
-      LIMIT 1`;
-
-    // Query D: Breakdowns for each non-filtered dimension
-    const breakdownQueries = breakdownDimensions.map((dim) => {
-      const q = `SELECT c.${dim} as name, COUNT(*) as count
+    // Query F: Posts with details, one keyset page
+    async function fetchPosts(
+      cursor: PostCursor | null,
+      pageSize: number
+    ): Promise<DrillDownPostsPage> {
+      const seek = seekCondition(cursor, paramIdx);
+      const postsQuery = `SELECT
+        rp.post_id, rp.title, rp.subreddit, rp.permalink,
+        rp.score, rp.num_comments, rp.created_utc,
+        c.notable_quote, c.tags
         FROM ${classTable} c
-        WHERE ${whereClause} AND c.${dim} IS NOT NULL
-        GROUP BY c.${dim}
-        ORDER BY count DESC
-        LIMIT 6`;
-      return sql.query(q, values).then((rows) => ({
-        dim,
-        rows: rows as Record<string, unknown>[],
+        JOIN raw_posts rp ON c.post_id = rp.post_id
+        WHERE ${[whereClause, seek.condition].filter(Boolean).join(" AND ")}
+        ORDER BY ${POSTS_ORDER}
+        LIMIT ${pageSize + 1}`;
+
+      const { rows, nextCursor } = splitPage(
+        await sql.query(postsQuery, [...values, ...seek.values]),
+        pageSize
+      );
+      const posts = rows.map((r) => ({
+        postId: r.post_id as string,
+        title: r.title as string,
+        subreddit: r.subreddit as string,
+        permalink: r.permalink as string,
+        score: Number(r.score),
+        numComments: Number(r.num_comments),
+        createdUtc: r.created_utc as string,
+        notableQuote: (r.notable_quote as string) || null,
+        tags: Array.isArray(r.tags) ? (r.tags as string[]) : [],
       }));
-    });
+      return { posts, nextCursor };
+    }
 
-    // Query E: Top tags (always included)
-    const tagsQuery = `SELECT tag, COUNT(*) as count FROM (
-      SELECT jsonb_array_elements_text(c.tags) as tag
-      FROM ${classTable} c
-      JOIN raw_posts rp ON c.post_id = rp.post_id
-      WHERE ${whereClause}
-        AND c.tags IS NOT NULL
-    ) t
-    GROUP BY tag ORDER BY count DESC LIMIT 12`;
-
-    // Query F: Posts with details
-    const postsQuery = `SELECT
-      rp.post_id, rp.title, rp.subreddit, rp.permalink,
-      rp.score, rp.num_comments, rp.created_utc,
-      c.notable_quote, c.tags
-      FROM ${classTable} c
-      JOIN raw_posts rp ON c.post_id = rp.post_id
-      WHERE ${whereClause}
-      ORDER BY rp.score DESC
-      LIMIT ${postsLimit}
-      OFFSET ${postsOffset}`;
-
-    // Build parallel queries
-    const queries: Promise<unknown>[] = [
-      sql.query(countQuery, values), // 0: count
-      sql.query(tabTotalQuery), // 1: tab total
-      sql.query(quoteQuery, values), // 2: quote
-      ...breakdownQueries, // 3..N-3: breakdowns
-      sql.query(tagsQuery, values), // N-2: tags
-      sql.query(postsQuery, values), // N-1: posts
-    ];
-
-    // Query G (IDV only): Negative sentiment count
-    if (type === "idv") {
-      const sentimentQuery = `SELECT COUNT(*) as count
-        FROM ${classTable} c
-        WHERE ${whereClause} AND c.sentiment = 'negative'`;
-      queries.push(sql.query(sentimentQuery, values));
+    // "Show more": only the next page of posts
+    if (postsCursor) {
+      const key = cacheKey("drill-down-posts", {
+        type,
+        tag,
+        q,
+        cursor: cursorParam,
+        ...filters,
+      });
+      const { value, status } = await cached(key, () => fetchPosts(postsCursor, LOAD_MORE_SIZE));
+      return NextResponse.json(value, { headers: { "X-Cache": status } });
     }
 
-    const results = await Promise.all(queries);
-
-    // Parse results
-    const countResult = results[0] as Record<string, unknown>[];
-    const tabTotalResult = results[1] as Record<string, unknown>[];
-    const quoteResult = results[2] as Record<string, unknown>[];
-
-    const breakdownResults = results.slice(
-      3,
-      3 + breakdownDimensions.length
-    ) as { dim: string; rows: Record<string, unknown>[] }[];
-
-    const tagsResult = results[3 + breakdownDimensions.length] as Record<
-      string,
-      unknown
-    >[];
-    const postsResult = results[4 + breakdownDimensions.length] as Record<
-      string,
-      unknown
-    >[];
-
-    const total = Number(countResult[0].total);
-    const tabTotal = Number(tabTotalResult[0].total);
-    const percent = tabTotal > 0 ? (total / tabTotal) * 100 : 0;
-
-    // Build quote
-    const quote =
-      quoteResult.length > 0
-        ? {
-            text: quoteResult[0].text as string,
-            subreddit: quoteResult[0].subreddit as string,
-            score: Number(quoteResult[0].score),
-          }
-        : null;
-
-    // Build breakdowns
-    const breakdowns: Record<string, { name: string; count: number }[]> = {};
-    for (const br of breakdownResults) {
-      breakdowns[br.dim] = br.rows.map((r) => ({
-        name: r.name as string,
+    const key = cacheKey("drill-down", { type, tag, q, ...filters });
+    const { value, status } = await cached<DrillDownResponse>(key, async () => {
+      // Determine which dimensions to break down (skip already-filtered ones)
+      const breakdownDimensions = allowedFilters.filter(
+        (d) => !activeFilters.has(d)
+      );
+
+      // Query A: Filtered total, each non-filtered dimension and (IDV) sentiment,
+      // in one GROUPING SETS scan
+      const groupedDims =
+        type === "idv" && !breakdownDimensions.includes("sentiment")
+          ? [...breakdownDimensions, "sentiment"]
+          : breakdownDimensions;
+      const groupedCols = groupedDims.map((d) => `c.${d}`).join(", ");
+      const groupedQuery = groupedDims.length
+        ? `SELECT GROUPING(${groupedCols}) as g, ${groupedCols}, COUNT(*) as count
+          FROM ${classTable} c
+          WHERE ${whereClause}
+          GROUP BY GROUPING SETS ((), ${groupedDims.map((d) => `(c.${d})`).join(", ")})`
+        : `SELECT 0 as g, COUNT(*) as count FROM ${classTable} c WHERE ${whereClause}`;
+
+      // Query B: Tab total (all relevant posts for this type), from the cube
+      const tabTotalQuery = getCubeCell(type as CubeTrack, []);
+
+      // Query C: Best quote, highest score, length between 50 and 300
+      const quoteQuery = `SELECT c.notable_quote as text, rp.subreddit, rp.score
+        FROM ${classTable} c
+        JOIN raw_posts rp ON c.post_id = rp.post_id
+        WHERE ${whereClause}
+          AND c.notable_quote IS NOT NULL
+          AND LENGTH(c.notable_quote) > 50
+          AND LENGTH(c.notable_quote) < 300
+        ORDER BY rp.score DESC
+        LIMIT 1`;
+
+      // Query E: Top tags (always included)
+      const tagsQuery = `SELECT ct.tag, COUNT(*) as count
+        FROM classification_tags ct
+        JOIN ${classTable} c ON c.post_id = ct.post_id
+        WHERE ct.track = '${type}' AND ${whereClause}
+        GROUP BY ct.tag ORDER BY count DESC LIMIT 12`;
+
+      // Run in parallel (posts: Query F, above)
+      const [groupedResult, tabTotalResult, quoteResult, tagsResult, postsPage] =
+        await Promise.all([
+          sql.query(groupedQuery, values),
+          tabTotalQuery,
+          sql.query(quoteQuery, values),
+          sql.query(tagsQuery, values),
+          fetchPosts(null, INITIAL_PAGE_SIZE),
+        ]);
+
+      // Reshape grouped rows: GROUPING() has a 0 bit for the dimension a row is grouped by
+      const allGrouped = (1 << groupedDims.length) - 1;
+      let total = 0;
+      const grouped: Record<string, { name: string; count: number }[]> = {};
+      for (const r of groupedResult as Record<string, unknown>[]) {
+        const g = Number(r.g);
+        if (g === allGrouped) {
+          total = Number(r.count);
+          continue;
+        }
+        const dim = groupedDims.find((_, i) => !((g >> (groupedDims.length - 1 - i)) & 1));
+        if (!dim || r[dim] === null) continue;
+        (grouped[dim] ??= []).push({ name: r[dim] as string, count: Number(r.count) });
+      }
+
+      const tabTotal = tabTotalResult ?? 0;
+      const percent = tabTotal > 0 ? (total / tabTotal) * 100 : 0;
+
+      // Build quote
+      const quote =
+        quoteResult.length > 0
+          ? {
+              text: quoteResult[0].text as string,
+              subreddit: quoteResult[0].subreddit as string,
+              score: Number(quoteResult[0].score),
+            }
+          : null;
+
+      // Build breakdowns (top 6 per non-filtered dimension)
+      const breakdowns: Record<string, { name: string; count: number }[]> = {};
+      for (const dim of breakdownDimensions) {
+        breakdowns[dim] = (grouped[dim] ?? [])
+          .sort((x, y) => y.count - x.count || x.name.localeCompare(y.name))
+          .slice(0, 6);
+      }
+
+      // Tags breakdown
+      breakdowns["tags"] = (tagsResult as Record<string, unknown>[]).map((r) => ({
+        name: r.tag as string,
         count: Number(r.count),
       }));
-    }
 
-    // Tags breakdown
-    breakdowns["tags"] = (tagsResult as Record<string, unknown>[]).map((r) => ({
-      name: r.tag as string,
-      count: Number(r.count),
-    }));
-
-    // Posts
-    const posts = (postsResult as Record<string, unknown>[]).map((r) => ({
-      postId: r.post_id as string,
-      title: r.title as string,
-      subreddit: r.subreddit as string,
-      permalink: r.permalink as string,
-      score: Number(r.score),
-      numComments: Number(r.num_comments),
-      createdUtc: r.created_utc as string,
-      notableQuote: (r.notable_quote as string) || null,
-      tags: Array.isArray(r.tags) ? (r.tags as string[]) : [],
-    }));
-
-    const response: DrillDownResponse = {
-      total,
-      tabTotal,
-      percent,
-      quote,
-      breakdowns,
-      posts,
-      postsTotalCount: total,
-    };
-
-    // IDV: add negative sentiment percentage
-    if (type === "idv") {
-      const sentimentResult = results[results.length - 1] as Record<
-        string,
-        unknown
-      >[];
-      const negCount = Number(sentimentResult[0].count);
-      response.sentimentPercent = total > 0 ? (negCount / total) * 100 : 0;
-    }
+      const response: DrillDownResponse = {
+        total,
+        tabTotal,
+        percent,
+        quote,
+        breakdowns,
+        posts: postsPage.posts,
+        postsTotalCount: total,
+        postsNextCursor: postsPage.nextCursor,
+      };
+
+      // IDV: add negative sentiment percentage
+      if (type === "idv") {
+        const negCount =
+          grouped["sentiment"]?.find((r) => r.name === "negative")?.count ?? 0;
+        response.sentimentPercent = total > 0 ? (negCount / total) * 100 : 0;
+      }
+
+      return response;
+    });
 
-    return NextResponse.json(response);
+    return NextResponse.json(value, { headers: { "X-Cache": status } });
   } catch (error) {
     console.error("[API /api/drill-down] Error:", error);
     return NextResponse.json(
@@ -1,5 +1,14 @@
 import { NextRequest, NextResponse } from "next/server";
 import { neon } from "@neondatabase/serverless";
+import { cacheKey, cached } from "@/lib/cache";
+import {
+  POSTS_ORDER,
+  countPosts,
+  decodeCursor,
+  seekCondition,
+  splitPage,
+} from "@/lib/pagination";
+import { normalizeSearch, searchCondition } from "@/lib/search";
 
 const PAGE_SIZE = 25;
 
@@ -7,8 +16,12 @@ export async function GET(request: NextRequest) {
   try {
     const params = request.nextUrl.searchParams;
     const type = params.get("type"); // "fraud" or "idv"
-    const page = Math.max(1, Number(params.get("page") || "1"));
-    const offset = (page - 1) * PAGE_SIZE;
+    const cursorParam = params.get("cursor");
+    const cursor = cursorParam ? decodeCursor(cursorParam) : null;
+    // Total is computed for the first page, or on any page when ?count= is given
+    const countParam = params.get("count");
+    const countMode = countParam === "estimate" ? "estimate" : "exact";
+    const wantCount = !cursor || countParam !== null;
 
     if (!type || !["fraud", "idv"].includes(type)) {
       return NextResponse.json(
@@ -16,6 +29,9 @@ export async function GET(request: NextRequest) {
         { status: 400 }
       );
     }
+    if (cursorParam && !cursor) {
+      return NextResponse.json({ error: "invalid cursor" }, { status: 400 });
+    }
 
     const sql = neon(process.env.DATABASE_URL!);
 
@@ -26,6 +42,7 @@ export async function GET(request: NextRequest) {
     const conditions: string[] = [`c.is_relevant = true`];
     const values: (string | number)[] = [];
     let paramIdx = 1;
+    const filters: Record<string, string> = {};
 
     const allowedFilters =
       type === "fraud"
@@ -44,57 +61,90 @@ export async function GET(request: NextRequest) {
         conditions.push(`c.${key} = $${paramIdx}`);
         values.push(val);
         paramIdx++;
+        filters[key] = val;
       }
     }
 
-    // Tag filter
+    // Tag filter (index lookup on classification_tags)
     const tag = params.get("tag");
     if (tag) {
-      conditions.push(`c.tags @> $${paramIdx}::jsonb`);
-      values.push(JSON.stringify([tag]));
+      conditions.push(
+        `c.post_id IN (SELECT ct.post_id FROM classification_tags ct WHERE ct.track = '${type}' AND ct.tag = $${paramIdx})`
+      );
+      values.push(tag);
+      paramIdx++;
+    }
+
+    // Full-text search over the post and its comments
+    const q = normalizeSearch(params.get("q"));
+    if (q) {
+      conditions.push(searchCondition(paramIdx));
+      values.push(q);
       paramIdx++;
     }
 
     const whereClause = conditions.join(" AND ");
 
-    const countQuery = `SELECT COUNT(*) as total FROM ${classTable} c WHERE ${whereClause}`;
-    const dataQuery = `SELECT
-      rp.post_id,
-      rp.title,
-      rp.subreddit,
-      rp.permalink,
-      rp.score,
-      rp.num_comments,
-      rp.created_utc
-    FROM ${classTable} c
-    JOIN raw_posts rp ON c.post_id = rp.post_id
-    WHERE ${whereClause}
-    ORDER BY rp.score DESC
-    LIMIT ${PAGE_SIZE}
-    OFFSET ${offset}`;
-
-    const [countResult, dataResult] = await Promise.all([
-      sql.query(countQuery, values),
-      sql.query(dataQuery, values),
-    ]);
-
-    const total = Number(countResult[0].total);
-
-    return NextResponse.json({
-      posts: dataResult.map((r: Record<string, unknown>) => ({
-        postId: r.post_id,
-        title: r.title,
-        subreddit: r.subreddit,
-        permalink: r.permalink,
-        score: r.score,
-        numComments: r.num_comments,
-        createdUtc: r.created_utc,
-      })),
-      total,
-      page,
-      pageSize: PAGE_SIZE,
-      totalPages: Math.ceil(total / PAGE_SIZE),
+    const key = cacheKey("posts", {
+      type,
+      tag,
+      q,
+      cursor: cursorParam,
+      count: wantCount ? countMode : null,
+      ...filters,
     });
+    const { value, status } = await cached(key, async () => {
+      const seek = seekCondition(cursor, paramIdx);
+      const dataQuery = `SELECT
+        rp.post_id,
+        rp.title,
+        rp.subreddit,
+        rp.permalink,
+        rp.score,
+        rp.num_comments,
+        rp.created_utc
+      FROM ${classTable} c
+      JOIN raw_posts rp ON c.post_id = rp.post_id
+      WHERE ${[whereClause, seek.condition].filter(Boolean).join(" AND ")}
+      ORDER BY ${POSTS_ORDER}
+      LIMIT ${PAGE_SIZE + 1}`;
+
+      const countFilters: [string, string][] = Object.entries(filters);
+      if (tag) countFilters.push(["tag", tag]);
+
+      const [count, dataResult] = await Promise.all([
+        wantCount
+          ? countPosts(
+              type as "fraud" | "idv",
+              q ? null : countFilters,
+              { table: classTable, where: whereClause, values },
+              countMode
+            )
+          : null,
+        sql.query(dataQuery, [...values, ...seek.values]),
+      ]);
+
+      const { rows, nextCursor } = splitPage(dataResult, PAGE_SIZE);
+
+      return {
+        posts: rows.map((r: Record<string, unknown>) => ({
+          postId: r.post_id,
+          title: r.title,
+          subreddit: r.subreddit,
+          permalink: r.permalink,
+          score: r.score,
+          numComments: r.num_comments,
+          createdUtc: r.created_utc,
+        })),
+        total: count?.total ?? null,
+        totalEstimated: count?.estimated ?? false,
+        pageSize: PAGE_SIZE,
+        totalPages: count ? Math.ceil(count.total / PAGE_SIZE) : null,
+        nextCursor,
+      };
+    });
+
+    return NextResponse.json(value, { headers: { "X-Cache": status } });
   } catch (error) {
     console.error("[API /api/posts] Error:", error);
     return NextResponse.json(
@@ -0,0 +1,69 @@
+import { NextRequest, NextResponse } from "next/server";
+import { cacheKey, cached } from "@/lib/cache";
+import type { CubeTrack } from "@/lib/queries/cube";
+import { TREND_DIMENSIONS, getTrends, type TrendGrain } from "@/lib/queries/trends";
+
+const MAX_BUCKETS = { week: 104, month: 36 };
+const MAX_SERIES = 12;
+
+// GET /api/trends?type=fraud&dim=fraud_type&grain=week&buckets=26&top=6
+// Omit dim for the track total.
+export async function GET(request: NextRequest) {
+  try {
+    const params = request.nextUrl.searchParams;
+    const type = params.get("type");
+    const dim = params.get("dim") ?? "";
+    const grain = params.get("grain") ?? "week";
+
+    if (!type || !["fraud", "idv"].includes(type)) {
+      return NextResponse.json(
+        { error: "type must be 'fraud' or 'idv'" },
+        { status: 400 }
+      );
+    }
+    if (grain !== "week" && grain !== "month") {
+      return NextResponse.json(
+        { error: "grain must be 'week' or 'month'" },
+        { status: 400 }
+      );
+    }
+    if (dim && !TREND_DIMENSIONS[type as CubeTrack].includes(dim)) {
+      return NextResponse.json(
+        { error: `dim must be one of ${TREND_DIMENSIONS[type as CubeTrack].join(", ")}` },
+        { status: 400 }
+      );
+    }
+
+    const bucketsParam = Number(params.get("buckets"));
+    const buckets =
+      bucketsParam > 0 ? Math.min(Math.floor(bucketsParam), MAX_BUCKETS[grain]) : undefined;
+    const topParam = Number(params.get("top"));
+    const top = topParam > 0 ? Math.min(Math.floor(topParam), MAX_SERIES) : undefined;
+
+    // The window ends at the current bucket, so the date is part of the key
+    const key = cacheKey("trends", {
+      type,
+      dim,
+      grain,
+      buckets,
+      top,
+      today: new Date().toISOString().slice(0, 10),
+    });
+    const { value, status } = await cached(key, async () => ({
+      grain,
+      series: await getTrends(type as CubeTrack, dim, {
+        grain: grain as TrendGrain,
+        buckets,
+        top,
+      }),
+    }));
+
+    return NextResponse.json(value, { headers: { "X-Cache": status } });
+  } catch (error) {
+    console.error("[API /api/trends] Error:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch trends", detail: String(error) },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,238 @@
+"""Offline batch-file mode for the LLM passes: export → run → ingest.
+
+Decouples the network-bound LLM stage from the database:
+
+    1. export-requests writes the current work set for a job as a request
+       JSONL (OpenAI batch format) plus a manifest with the prompt version.
+    2. batch_runner executes the file anywhere, resumably, with no DB access;
+       a provider batch API can be used instead.
+    3. ingest-results parses each response and runs it through the same
+       validators (and local enum repair) as the inline passes before writing.
+
+Posts whose responses fail validation are recorded in post_failures and are
+picked up again by the next inline run. Ingest uses the same guards as
+journal replay, keyed on the export time in the manifest: a Pass 2 result does
+not replace a row classified after the export, and a Pass 1 verdict only fills
+posts that are still unrefiltered. Ingesting a batch file after an inline run
+or a reclassify therefore never clobbers the newer results.
+
+Usage:
+    python -m backend.pipeline export-requests pass2-fraud --limit 5000
+    python -m backend.batch_runner batch_files/pass2-fraud-<stamp>.requests.jsonl
+    python -m backend.pipeline ingest-results batch_files/pass2-fraud-<stamp>.results.jsonl
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from backend.db import (
+    get_unrefiltered_posts, get_ready_unclassified_posts,
+    apply_journaled_refilters, apply_journaled_classifications,
+)
+from backend.failures import record_failures, clear_failures
+from backend.llm_client import (
+    build_llm_body, build_deepseek_body, _parse_json_response, _extract_json,
+)
+from backend import pass1_classifier as pass1
+from backend.reasoning_router import AUTO, choose_effort
+from backend import pass2_classifier as pass2
+from backend.utils import setup_logger
+
+log = setup_logger("batch_files")
+
+BATCH_FILES_DIR = "batch_files"
+JOBS = ("pass1", "pass2-fraud", "pass2-idv", "pass2-dual")
+INGEST_BATCH_SIZE = 200
+
+_PASS2_PROMPTS = {
+    "fraud": pass2.FRAUD_SYSTEM_PROMPT,
+    "idv": pass2.IDV_SYSTEM_PROMPT,
+    "dual": pass2.FUSED_SYSTEM_PROMPT,
+}
+
+
+def _manifest_path(path: str) -> str:
+    for suffix in (".requests.jsonl", ".results.jsonl"):
+        if path.endswith(suffix):
+            return path[: -len(suffix)] + ".manifest.json"
+    return path + ".manifest.json"
+
+
+# ============================================================
+# Export
+# ============================================================
+
+def export_requests(job: str, limit: int = 10000, reasoning: str = None, path: str = None) -> str:
+    """Write the job's current work set as a request JSONL. Returns its path."""
+    if job not in JOBS:
+        raise ValueError(f"Unknown job {job!r}; expected one of {JOBS}")
+
+    if job == "pass1":
+        posts = get_unrefiltered_posts(batch_size=limit)
+        tier = pass1.TIERS["medium"]
+        version = None
+        bodies = (build_llm_body(pass1.SYSTEM_PROMPT, pass1._build_user_prompt(p),
+                                 json_schema=pass1.REFILTER_SCHEMA, **tier) for p in posts)
+    else:
+        track = job.split("-", 1)[1]
+        posts = get_ready_unclassified_posts(track, batch_size=limit)
+        version = pass2.PROMPT_VERSIONS[track]["version"]
+        bodies = (build_deepseek_body(_PASS2_PROMPTS[track], pass2._format_user_prompt(p),
+                                      choose_effort(track, p) if reasoning == AUTO else reasoning)
+                  for p in posts)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    os.makedirs(BATCH_FILES_DIR, exist_ok=True)
+    path = path or os.path.join(BATCH_FILES_DIR, f"{job}-{stamp}.requests.jsonl")
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for post, body in zip(posts, bodies):
+            f.write(json.dumps({
+                "custom_id": f"{job}:{post['post_id']}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }) + "\n")
+            count += 1
+
+    with open(_manifest_path(path), "w", encoding="utf-8") as f:
+        json.dump({
+            "job": job,
+            "created_at": stamp,
+            "requests": count,
+            "reasoning": reasoning if job != "pass1" else "medium",
+            "prompt_version": version,
+        }, f, indent=2)
+
+    log.info(f"Exported {count} {job} requests to {path}")
+    return path
+
+
+# ============================================================
+# Ingest
+# ============================================================
+
+def _latest_results(path: str) -> dict[str, dict]:
+    """Last successful result line per custom_id (resumed runs append retries)."""
+    results = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("response") or row["custom_id"] not in results:
+                results[row["custom_id"]] = row
+    return results
+
+
+def _content(row: dict) -> str | None:
+    response = row.get("response") or {}
+    if response.get("status_code") != 200 or not response.get("body"):
+        return None
+    try:
+        return response["body"]["choices"][0]["message"].get("content") or None
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _parse_pass2(content: str) -> dict | None:
+    json_str = _extract_json(content)
+    if json_str is None:
+        return None
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+
+def _validate_pass2(track: str, raw: dict, post_id: str, version: str) -> dict | None:
+    models = {"fraud": pass2.FraudClassification, "idv": pass2.IDVClassification}
+    if track != "dual":
+        return pass2._validate(models[track], pass2._preprocess(raw), post_id)
+
+    result = {"prompt_versions": {}}
+    for half, model_cls in models.items():
+        part = raw.get(half)
+        validated = pass2._validate(model_cls, pass2._preprocess(part), post_id) \
+            if isinstance(part, dict) else None
+        if validated is None:
+            return None
+        result[half] = validated
+        result["prompt_versions"][half] = version
+    return result
+
+
+def ingest_results(path: str) -> dict:
+    """Validate and write a result JSONL produced by batch_runner or a provider batch API."""
+    manifest_path = _manifest_path(path)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No manifest at {manifest_path}; ingest needs the export's manifest")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    job = manifest["job"]
+    track = "refilter" if job == "pass1" else job.split("-", 1)[1]
+    version = manifest.get("prompt_version")
+    if job != "pass1" and version != pass2.PROMPT_VERSIONS[track]["version"]:
+        log.warning(f"Exported with prompt {version}, current is "
+                    f"{pass2.PROMPT_VERSIONS[track]['version']}; rows will show as stale")
+
+    # Journal-replay entries stamped with the export time (naive UTC, like journal ts)
+    exported_at = datetime.strptime(manifest["created_at"], "%Y%m%dT%H%M%S").isoformat()
+    counts = {"written": 0, "skipped": 0, "failed": 0}
+    resolved, failures, pending = [], [], []
+
+    def flush():
+        if pending:
+            applied = (apply_journaled_refilters(pending) if job == "pass1"
+                       else apply_journaled_classifications(track, pending))
+            counts["written"] += applied
+            counts["skipped"] += len(pending) - applied
+            resolved.extend(e["post_id"] for e in pending)
+            pending.clear()
+
+    for custom_id, row in _latest_results(path).items():
+        post_id = custom_id.split(":", 1)[1]
+        content = _content(row)
+        if content is None:
+            error = (row.get("error") or {}).get("message")
+            failures.append((post_id, "llm_no_response", error or "no successful response"))
+            continue
+
+        if job == "pass1":
+            parsed = _parse_json_response(content)
+            try:
+                verdict = {"is_fraud": bool(parsed.get("is_fraud", False)),
+                           "is_idv": bool(parsed.get("is_idv", False)),
+                           "confidence": float(parsed.get("confidence", 0.0)), "tier": "medium"}
+            except (AttributeError, TypeError, ValueError):
+                failures.append((post_id, "parse", content[:200]))
+                continue
+            pending.append({"post_id": post_id, "result": verdict, "ts": exported_at})
+        else:
+            raw = _parse_pass2(content)
+            validated = _validate_pass2(track, raw, post_id, version) if isinstance(raw, dict) else None
+            if validated is None:
+                failures.append((post_id, "validation" if raw else "parse", content[:200]))
+                continue
+            pending.append({
+                "post_id": post_id, "result": validated, "ts": exported_at,
+                "model": pass2.PASS2_MODEL_LABEL,
+                "prompt_versions": {"fraud": version, "idv": version} if track == "dual"
+                else {track: version},
+            })
+        if len(pending) >= INGEST_BATCH_SIZE:
+            flush()
+    flush()
+
+    record_failures(track, failures)
+    clear_failures(track, resolved)
+    counts["failed"] = len(failures)
+    log.info(f"Ingested {path}: {counts['written']} written, "
+             f"{counts['skipped']} skipped (changed since the export at {exported_at}), "
+             f"{counts['failed']} failed (failures will be retried by the next inline run)")
+    pass2.print_repair_stats()
+    return counts
@@ -0,0 +1,116 @@
+"""Standalone runner for exported LLM request files (see batch_files.py).
+
+Executes every line of a request JSONL against OpenRouter with high
+concurrency and appends one result line per request. It never touches the
+database, so it can run on any box with the file and an OPENROUTER_API_KEY.
+
+Resumable: on restart, requests whose custom_id already has a successful
+result line are skipped, and failed ones are retried. Lines use the
+OpenAI batch format, so provider batch API output can be ingested the same way:
+
+    request: {"custom_id", "method", "url", "body"}
+    result:  {"custom_id", "response": {"status_code", "body"}, "error"}
+
+Usage:
+    python -m backend.batch_runner batch_files/pass2-fraud-20260101T000000.requests.jsonl
+    python -m backend.batch_runner requests.jsonl --out results.jsonl --concurrency 64
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from backend.llm_client import send_chat_request
+from backend.utils import setup_logger
+
+log = setup_logger("batch_runner")
+
+DEFAULT_CONCURRENCY = 50
+REQUEST_TIMEOUT = 120.0
+FSYNC_EVERY = 25
+
+
+def results_path_for(requests_path: str) -> str:
+    if requests_path.endswith(".requests.jsonl"):
+        return requests_path[: -len(".requests.jsonl")] + ".results.jsonl"
+    return requests_path + ".results.jsonl"
+
+
+def _completed_ids(results_path: str) -> set[str]:
+    """custom_ids that already have a successful result (torn lines ignored)."""
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("response") and row["response"].get("status_code") == 200:
+                done.add(row["custom_id"])
+    return done
+
+
+def run_requests(requests_path: str, results_path: str = None,
+                 concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """Execute all not-yet-completed requests in a file. Returns counts."""
+    results_path = results_path or results_path_for(requests_path)
+    done = _completed_ids(results_path)
+
+    with open(requests_path, encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    todo = [r for r in requests if r["custom_id"] not in done]
+    log.info(f"{len(requests)} requests, {len(done)} already done, {len(todo)} to run "
+             f"({concurrency} concurrent) -> {results_path}")
+
+    lock = threading.Lock()
+    counts = {"ok": 0, "failed": 0}
+    start = time.time()
+
+    def execute(req):
+        status, body, error = send_chat_request(req["body"], timeout=REQUEST_TIMEOUT)
+        return {
+            "custom_id": req["custom_id"],
+            "response": {"status_code": status, "body": body} if body is not None else None,
+            "error": None if body is not None else {"code": status, "message": error},
+        }
+
+    with open(results_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(execute, r) for r in todo]
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                with lock:
+                    out.write(json.dumps(row) + "\n")
+                    counts["ok" if row["response"] else "failed"] += 1
+                    if i % FSYNC_EVERY == 0 or i == len(todo):
+                        out.flush()
+                        os.fsync(out.fileno())
+                if i % 100 == 0 or i == len(todo):
+                    elapsed = time.time() - start
+                    log.info(f"  [{i}/{len(todo)}] {counts['ok']} ok, {counts['failed']} failed | "
+                             f"{i / elapsed * 3600 if elapsed else 0:.0f} req/hr")
+        except KeyboardInterrupt:
+            log.info("Interrupted; finished results are saved, rerun to resume.")
+            for f in futures:
+                f.cancel()
+            out.flush()
+            os.fsync(out.fileno())
+            raise
+
+    log.info(f"Done: {counts['ok']} ok, {counts['failed']} failed in {time.time() - start:.0f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an exported LLM request file")
+    parser.add_argument("requests", help="Request JSONL written by export-requests")
+    parser.add_argument("--out", help="Result JSONL (default: <name>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+    run_requests(args.requests, args.out, args.concurrency)
@@ -1,18 +1,38 @@
-"""Phase 3: Fetch comments for relevant posts using Reddit .json endpoints."""
+"""Phase 3: Fetch comments for relevant posts using Reddit .json endpoints.
 
+Only what gets stored is requested: top-level comments (depth=1), and only a few
+more than MAX_COMMENTS_PER_POST to allow for deleted ones. The comment listing
+is then parsed one child at a time, and parsing stops once enough comments are
+kept. Bytes on the wire and parse time are tracked per post.
+
+Fetching and writing are pipelined: see run_comment_collection.
+"""
+
+import json
+import queue
+import re
+import threading
 import time
 from datetime import datetime, timezone
 from backend.config import MAX_COMMENTS_PER_POST, REDDIT_BASE_URL, REDDIT_REQUEST_DELAY
 from backend.db import (
-    get_relevant_posts_without_comments, insert_comments_batch,
-    mark_comments_fetched, start_run, finish_run,
-    get_conn, get_cursor,
+    get_relevant_posts_without_comments, store_fetched_comments,
+    start_run, finish_run, get_conn, get_cursor, notify_posts_ready,
 )
-from backend.reddit_collector import _reddit_get
+from backend.failures import record_failures, clear_failures
+from backend.reddit_collector import _reddit_request
 from backend.utils import setup_logger
 
 log = setup_logger("comment_collector")
 
+COMMENT_LIMIT_HEADROOM = 5  # extra comments requested to cover [deleted] / [removed]
+WRITE_BATCH_POSTS = 50      # posts per writer transaction
+WRITE_INTERVAL = 2.0        # max seconds a fetched post waits for its batch
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"\s*")
+_fetch_stats = {"posts": 0, "bytes": 0, "parse_ms": 0.0}
+
 
 def _get_post_permalink(post_id: str) -> str | None:
     """Get the permalink for a post from the database."""
@@ -30,35 +50,71 @@ def _get_post_permalink(post_id: str) -> str | None:
             return None
 
 
-def fetch_comments_for_post(post_id: str, max_comments: int = None) -> list[dict] | None:
-    """Fetch top comments for a single post using .json endpoint.
+def _skip_ws(text: str, i: int) -> int:
+    return _WS.match(text, i).end()
 
-    Returns:
-        list[dict]: comments fetched successfully
-        None: API failure
-    """
-    max_comments = max_comments or MAX_COMMENTS_PER_POST
 
-    permalink = _get_post_permalink(post_id)
-    if not permalink:
-        log.warning(f"No permalink found for post {post_id}")
-        return []
+def _seek(text: str, path: list) -> int | None:
+    """Offset of the value at `path` (list indices / object keys) in a JSON document.
 
-    url = f"{REDDIT_BASE_URL}{permalink}.json"
-    params = {"sort": "top", "limit": 200}
-
-    data = _reddit_get(url, params=params)
-    if data is None:
-        return None
-    if not isinstance(data, list) or len(data) < 2:
-        return []
-
-    comment_listing = data[1]
-    if "data" not in comment_listing:
+    Values before the target are decoded only to step over them; nothing after it is touched.
+    """
+    i = _skip_ws(text, 0)
+    for step in path:
+        if isinstance(step, int):
+            if text[i] != "[":
+                return None
+            i += 1
+            for _ in range(step):
+                _, i = _decoder.raw_decode(text, _skip_ws(text, i))
+                i = _skip_ws(text, i)
+                if text[i] != ",":
+                    return None
+                i += 1
+        else:
+            if text[i] != "{":
+                return None
+            i += 1
+            while True:
+                i = _skip_ws(text, i)
+                if text[i] == "}":
+                    return None
+                key, i = _decoder.raw_decode(text, i)
+                i = _skip_ws(text, _skip_ws(text, i) + 1)  # past ':'
+                if key == step:
+                    break
+                _, i = _decoder.raw_decode(text, i)
+                i = _skip_ws(text, i)
+                if text[i] == ",":
+                    i += 1
+        i = _skip_ws(text, i)
+    return i
+
+
+def _iter_array(text: str, i: int):
+    """Decode the elements of the JSON array at offset i lazily."""
+    if text[i] != "[":
+        return
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if text[i] == "]":
+            return
+        value, i = _decoder.raw_decode(text, i)
+        yield value
+        i = _skip_ws(text, i)
+        if text[i] == ",":
+            i += 1
+
+
+def _parse_comments(text: str, post_id: str, max_comments: int) -> list[dict]:
+    """Top-level comments from a /comments/ response, stopping after max_comments."""
+    start = _seek(text, [1, "data", "children"])
+    if start is None:
         return []
 
     comments = []
-    for child in comment_listing["data"].get("children", []):
+    for child in _iter_array(text, start):
         if child.get("kind") != "t1":
             continue
 
@@ -89,6 +145,55 @@ def fetch_comments_for_post(post_id: str, max_comments: int = None) -> list[dict
     return comments
 
 
+def fetch_comments_for_post(post_id: str, max_comments: int = None,
+                            permalink: str = None) -> list[dict] | None:
+    """Fetch top comments for a single post using .json endpoint.
+
+    permalink: from the batch query; looked up in the DB when omitted.
+
+    Returns:
+        list[dict]: comments fetched successfully
+        None: API failure
+    """
+    max_comments = max_comments or MAX_COMMENTS_PER_POST
+
+    permalink = permalink or _get_post_permalink(post_id)
+    if not permalink:
+        log.warning(f"No permalink found for post {post_id}")
+        return []
+
+    url = f"{REDDIT_BASE_URL}{permalink.rstrip('/')}.json"
+    params = {"sort": "top", "limit": max_comments + COMMENT_LIMIT_HEADROOM, "depth": 1}
+
+    resp = _reddit_request(url, params=params)
+    if resp is None:
+        return None
+
+    start = time.perf_counter()
+    try:
+        comments = _parse_comments(resp.text, post_id, max_comments)
+    except (ValueError, IndexError, KeyError, AttributeError) as e:
+        log.warning(f"Unparseable comment listing for {post_id}: {e}")
+        comments = []
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    _fetch_stats["posts"] += 1
+    _fetch_stats["bytes"] += resp.num_bytes_downloaded
+    _fetch_stats["parse_ms"] += parse_ms
+    log.debug(f"{post_id}: {resp.num_bytes_downloaded} bytes, parsed in {parse_ms:.1f}ms, "
+              f"{len(comments)} comments")
+
+    return comments
+
+
+def _fetch_summary() -> str:
+    n = _fetch_stats["posts"]
+    if not n:
+        return "no fetches"
+    return (f"{_fetch_stats['bytes'] / n / 1024:.1f} KB and "
+            f"{_fetch_stats['parse_ms'] / n:.1f}ms parse per post")
+
+
 def _mark_zero_comment_posts():
     """Mark relevant posts with num_comments=0 as fetched (nothing to fetch)."""
     with get_conn() as conn:
@@ -101,60 +206,147 @@ def _mark_zero_comment_posts():
                   AND num_comments = 0
             """)
             count = cur.rowcount
+            if count:
+                notify_posts_ready(cur, f"bulk:{count}")
     if count:
         log.info(f"Marked {count} zero-comment posts as fetched")
     return count
 
 
 def run_comment_collection():
-    """Fetch comments for all relevant posts, retrying on 429 with backoff."""
+    """Fetch comments for all relevant posts.
+
+    The fetch loop starts one request every REDDIT_REQUEST_DELAY seconds and does
+    nothing else. A writer thread commits comments and comments_fetched flags for
+    up to WRITE_BATCH_POSTS posts per transaction; a batch that fails to write is
+    retried in halves, so one bad post cannot hold back the rest. Failed fetches
+    and posts that still fail to write on their own are recorded in
+    post_failures (track "comments") and retried on backoff instead of stalling
+    the loop.
+    """
     _mark_zero_comment_posts()
 
     run_id = start_run("initial_collection", "comment_fetch")
 
-    total_posts = 0
-    total_comments = 0
+    results = queue.Queue()
+    in_flight = set()
+    lock = threading.Lock()
+    counts = {"written": 0, "comments": 0, "write_errors": 0}
+
+    def _store(batch: list[tuple[str, list[dict]]]):
+        """Write a batch; on failure split it in half until the bad post is isolated."""
+        try:
+            inserted = store_fetched_comments(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                log.warning(f"Could not write comments for {len(batch)} posts ({e}); retrying in halves")
+                mid = len(batch) // 2
+                _store(batch[:mid])
+                _store(batch[mid:])
+                return
+            post_id = batch[0][0]
+            log.error(f"Could not write comments for post {post_id}: {e}")
+            record_failures("comments", [(post_id, f"db_write:{type(e).__name__}", str(e))])
+            with lock:
+                counts["write_errors"] += 1
+            return
+        clear_failures("comments", [post_id for post_id, _ in batch])
+        with lock:
+            counts["written"] += len(batch)
+            counts["comments"] += inserted
+
+    def _write(batch: list[tuple[str, list[dict]]]):
+        try:
+            _store(batch)
+        finally:
+            with lock:
+                in_flight.difference_update(post_id for post_id, _ in batch)
+
+    def _writer():
+        stop = False
+        while not stop:
+            batch = []
+            item = results.get()
+            deadline = time.monotonic() + WRITE_INTERVAL
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= WRITE_BATCH_POSTS:
+                    break
+                try:
+                    item = results.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                _write(batch)
+
+    writer = threading.Thread(target=_writer, name="comment-writer", daemon=True)
+    writer.start()
+
+    fetched = 0
     failed = 0
-
-    while True:
-        post_ids = get_relevant_posts_without_comments(batch_size=100)
-        if not post_ids:
-            break
-
-        for post_id in post_ids:
-            try:
-                comments = fetch_comments_for_post(post_id)
+    next_request = time.monotonic()
+
+    try:
+        while True:
+            with lock:
+                exclude = list(in_flight)
+            posts = get_relevant_posts_without_comments(batch_size=100, exclude=exclude)
+            if not posts:
+                break
+
+            failures = []
+            for post in posts:
+                post_id = post["post_id"]
+                permalink = post["permalink"] or f"/r/{post['subreddit']}/comments/{post_id}"
+
+                wait = next_request - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_request = time.monotonic() + REDDIT_REQUEST_DELAY
+
+                try:
+                    comments = fetch_comments_for_post(post_id, permalink=permalink)
+                except Exception as e:
+                    log.error(f"Error fetching comments for {post_id}: {e}")
+                    failures.append((post_id, f"exception:{type(e).__name__}", str(e)))
+                    continue
 
                 if comments is None:
-                    failed += 1
-                    time.sleep(5)
+                    failures.append((post_id, "fetch", "Reddit request failed"))
                     continue
 
-                if comments:
-                    inserted = insert_comments_batch(comments)
-                    total_comments += inserted
-                mark_comments_fetched(post_id)
-                total_posts += 1
+                with lock:
+                    in_flight.add(post_id)
+                results.put((post_id, comments))
+                fetched += 1
 
-                if total_posts % 50 == 0:
+                if fetched % 50 == 0:
+                    with lock:
+                        written, total_comments = counts["written"], counts["comments"]
                     log.info(
-                        f"Progress: {total_posts} posts processed, "
-                        f"{total_comments} comments collected, {failed} failures"
+                        f"Progress: {fetched} posts fetched, {written} written, "
+                        f"{total_comments} comments collected, {failed + len(failures)} failures | "
+                        f"writer backlog {results.qsize()} | {_fetch_summary()}"
                     )
 
-            except Exception as e:
-                log.error(f"Error fetching comments for {post_id}: {e}")
-                failed += 1
-
-            time.sleep(REDDIT_REQUEST_DELAY)
+            # Recorded before the next batch query so these posts are skipped until their backoff ends
+            record_failures("comments", failures)
+            failed += len(failures)
+    finally:
+        results.put(None)
+        writer.join()
 
-    finish_run(run_id, total_posts, total_posts - failed, failed)
+    finish_run(run_id, fetched, counts["written"], failed + counts["write_errors"])
 
     log.info(
-        f"Comment collection complete. {total_posts} posts, "
-        f"{total_comments} comments, {failed} failures"
+        f"Comment collection complete. {counts['written']} posts, "
+        f"{counts['comments']} comments, {failed} fetch failures (retried on backoff), "
+        f"{counts['write_errors']} write errors | {_fetch_summary()}"
     )
-    return total_comments
+    return counts["comments"]
 
 
 if __name__ == "__main__":
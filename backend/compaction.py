@@ -0,0 +1,219 @@
+"""Token-budgeted compaction of post bodies and comments before they reach the LLM.
+
+Input tokens dominate Pass 1 and Pass 2 cost and latency, and Reddit text is
+full of things the classifiers don't need: markdown syntax, long URLs, HTML
+entities, quoted replies, bot boilerplate, and comments that repeat the body.
+This module strips those, then truncates to a token budget instead of a
+character count.
+
+Token counts use tiktoken (o200k_base, in requirements.txt) and fall back to a
+local regex estimator (words, numbers and punctuation, with long words split
+into ~4-character pieces) when it is missing or its encoding can't be loaded
+offline. Either way the budgets are estimates: neither matches the Pass 2
+model's own tokenizer exactly, so treat a budget as approximate, not a hard cap
+on billed tokens.
+
+Savings are measured against what the old character cuts would have sent and
+accumulated per pass; print_compaction_stats() reports them per run.
+"""
+
+import html
+import re
+import threading
+from collections import defaultdict
+
+from backend.utils import setup_logger
+
+log = setup_logger("compaction")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # not installed or encoding unavailable offline
+    _encoding = None
+
+TRUNCATION_MARKER = " [...truncated]"
+MIN_DEDUP_SENTENCE_CHARS = 25
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_MD_LINK = re.compile(r"!?\[([^\]]*)\]\((https?://[^)\s]+)[^)]*\)")
+_URL = re.compile(r"https?://(?:www\.)?([^/\s)\]]+)[^\s)\]]*")
+_MD_SYNTAX = re.compile(r"(\*\*|__|~~|`{1,3}|^#{1,6}\s+|^\s*[-*_]{3,}\s*$|&#x200B;|​)", re.MULTILINE)
+_SENTENCE_SPLIT = re.compile(r"((?<=[.!?])\s+|\n+)")
+_BOILERPLATE = re.compile(
+    r"(i am a bot|this action was performed automatically|contact the moderators"
+    r"|sent from my (iphone|android|phone)|^edit\s*\d*\s*:\s*(typo|formatting|spelling)s?\b)",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"posts": 0, "tokens_before": 0, "tokens_after": 0})
+
+
+# ============================================================
+# Tokenizer
+# ============================================================
+
+def _token_spans(text: str) -> list[tuple[int, int]]:
+    """(start, end) character spans of approximate tokens."""
+    spans = []
+    for m in _TOKEN_RE.finditer(text):
+        start, end = m.span()
+        if end - start <= 6:
+            spans.append((start, end))
+        else:
+            for i in range(start, end, 4):
+                spans.append((i, min(i + 4, end)))
+    return spans
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(_token_spans(text))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text to at most `budget` tokens, preferring a sentence or word boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    budget = max(budget - count_tokens(TRUNCATION_MARKER), 1)
+
+    if _encoding is not None:
+        cut = _encoding.decode(_encoding.encode(text, disallowed_special=())[:budget])
+    else:
+        spans = _token_spans(text)
+        cut = text[: spans[budget - 1][1]]
+
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) * 0.8:
+        cut = cut[: boundary + 1]
+    elif " " in cut:
+        cut = cut[: cut.rfind(" ")]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+# ============================================================
+# Normalization
+# ============================================================
+
+def normalize(text: str, strip_quotes: bool = False) -> str:
+    """Strip markup, collapse URLs and whitespace, drop boilerplate lines.
+
+    strip_quotes drops "> quoted" lines; used for comments, where quotes repeat
+    the post. Post bodies keep them since they often hold the scam message itself.
+    """
+    if not text:
+        return ""
+
+    text = html.unescape(html.unescape(text))
+    text = _MD_LINK.sub(lambda m: f"{m.group(1)} <{_domain(m.group(2))}>" if m.group(1) else
+                        f"<{_domain(m.group(2))}>", text)
+    text = _URL.sub(lambda m: f"<{m.group(1)}>", text)
+    text = _MD_SYNTAX.sub("", text)
+
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        if strip_quotes and line.startswith(">"):
+            continue
+        if line and _BOILERPLATE.search(line):
+            continue
+        key = line.lower()
+        if line and len(line) > 20 and key in seen:
+            continue  # repeated boilerplate line
+        seen.add(key)
+        lines.append(line)
+
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _domain(url: str) -> str:
+    m = _URL.match(url)
+    return m.group(1) if m else url
+
+
+def _sentence_key(sentence: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", sentence.lower())
+
+
+def _sentences(text: str) -> list[tuple[str, str]]:
+    """(sentence, separator that follows it) pairs; joined back they give `text`."""
+    parts = _SENTENCE_SPLIT.split(text)
+    return list(zip(parts[::2], parts[1::2] + [""]))
+
+
+def dedupe_against(text: str, reference: str) -> str:
+    """Drop sentences of `text` that already appear in `reference`.
+
+    The remaining sentences keep their original separators. Where a sentence is
+    dropped, the stronger of the separators around it (more newlines) is kept,
+    so line and paragraph breaks survive.
+    """
+    known = {_sentence_key(s) for s, _ in _sentences(reference)
+             if len(s) >= MIN_DEDUP_SENTENCE_CHARS}
+    if not known:
+        return text
+    kept = []
+    for sentence, sep in _sentences(text):
+        if len(sentence) < MIN_DEDUP_SENTENCE_CHARS or _sentence_key(sentence) not in known:
+            kept.append([sentence, sep])
+        elif kept:
+            kept[-1][1] = max(kept[-1][1], sep, key=lambda s: s.count("\n"))
+    return "".join(s + sep for s, sep in kept).strip()
+
+
+# ============================================================
+# Public API
+# ============================================================
+
+def compact_body(text: str, budget: int) -> str:
+    return truncate_to_tokens(normalize(text), budget)
+
+
+def compact_comments(comments: list[str], body: str, budget_each: int) -> list[str]:
+    """Normalize comments, drop what repeats the body or earlier comments, cap each.
+
+    Returns one entry per input comment ("" when nothing is left) so callers
+    can keep comment metadata aligned.
+    """
+    reference = body
+    result = []
+    for text in comments:
+        cleaned = dedupe_against(normalize(text, strip_quotes=True), reference)
+        cleaned = truncate_to_tokens(cleaned, budget_each) if cleaned else ""
+        result.append(cleaned)
+        reference = f"{reference}\n{cleaned}"
+    return result
+
+
+def record_savings(label: str, post_id: str, legacy_text: str, compacted_text: str):
+    """Count tokens the old character-cut payload would have used vs the compacted one."""
+    before = count_tokens(legacy_text)
+    after = count_tokens(compacted_text)
+    with _lock:
+        s = _stats[label]
+        s["posts"] += 1
+        s["tokens_before"] += before
+        s["tokens_after"] += after
+    log.debug(f"[{label}] post {post_id}: {before} -> {after} tokens ({before - after} saved)")
+
+
+def compaction_stats() -> dict:
+    with _lock:
+        return {label: dict(s) for label, s in _stats.items()}
+
+
+def print_compaction_stats():
+    tokenizer = "tiktoken o200k_base" if _encoding is not None else "local estimator"
+    for label, s in compaction_stats().items():
+        if not s["posts"]:
+            continue
+        saved = s["tokens_before"] - s["tokens_after"]
+        pct = saved / s["tokens_before"] * 100 if s["tokens_before"] else 0
+        print(f"Compaction ({label}, {tokenizer}): {s['posts']} posts | "
+              f"{s['tokens_before']} -> {s['tokens_after']} input tokens | "
+              f"{saved} saved ({pct:.1f}%), {saved / s['posts']:.0f}/post")
@@ -5,6 +5,9 @@ load_dotenv()
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL")
+# LISTEN needs a session-level connection; point this at the direct (non-pooler)
+# endpoint if DATABASE_URL goes through a transaction pooler.
+DATABASE_LISTEN_URL = os.getenv("DATABASE_LISTEN_URL", DATABASE_URL)
 
 # OpenRouter API
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -14,6 +17,12 @@ OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
 PASS1_MODEL = os.getenv("PASS1_MODEL", "openai/gpt-oss-120b")
 PASS2_MODEL = os.getenv("PASS2_MODEL", "deepseek/deepseek-v3.2")
 
+# Pass 1 cascade: fast tier (smaller model, low reasoning effort) first,
+# escalate to medium effort when confidence is below the threshold or the
+# verdict contradicts keywords
+PASS1_FAST_MODEL = os.getenv("PASS1_FAST_MODEL", "openai/gpt-oss-20b")
+PASS1_CASCADE_THRESHOLD = float(os.getenv("PASS1_CASCADE_THRESHOLD", "0.85"))
+
 # Reddit JSON endpoint (no API key needed)
 REDDIT_BASE_URL = "https://www.reddit.com"
 REDDIT_USER_AGENT = "fraud-dashboard-research:v1.0 (educational project)"
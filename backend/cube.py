@@ -0,0 +1,64 @@
+"""Cell definitions for classification_cube, the dashboard's summary table.
+
+Every relevant Pass 2 row contributes +1 to these cells:
+
+    (track, '', '', '', '')                 total
+    (track, dim, value, '', '')             one cell per dashboard dimension
+    (track, dim_a, value_a, dim_b, value_b) one cell per pair, in CUBE_DIMENSIONS order
+    (track, 'tag', tag, '', '')             one cell per distinct tag (the tag-count rollup)
+
+A NULL value is stored as ''. The db.py upserts read the old row first and
+apply the difference between its cells and the new row's cells. A row that
+changes category or relevance therefore moves its counts instead of adding
+to them. rebuild_classification_cube() recomputes the table from scratch
+(`python -m backend.pipeline cube-rebuild`) and reports any drift.
+"""
+
+from collections import Counter
+from itertools import combinations
+
+CUBE_DIMENSIONS = {
+    "fraud": ["fraud_type", "industry", "channel", "loss_bracket", "subreddit"],
+    "idv": ["verification_type", "friction_type", "trigger_reason", "platform_name",
+            "sentiment", "subreddit"],
+}
+
+
+def tag_list(tags) -> list[str]:
+    """Distinct, stripped, non-empty tags, as stored in classification_tags."""
+    if not isinstance(tags, list):
+        return []
+    return sorted({str(t).strip() for t in tags if t is not None and str(t).strip()})
+
+
+def cells(track: str, row: dict | None) -> list[tuple[str, str, str, str, str]]:
+    """Cube cells a classification row counts toward (none if missing or not relevant)."""
+    if not row or not row.get("is_relevant"):
+        return []
+    dims = CUBE_DIMENSIONS[track]
+    values = {d: row.get(d) or "" for d in dims}
+    out = [(track, "", "", "", "")]
+    out += [(track, d, values[d], "", "") for d in dims]
+    out += [(track, a, values[a], b, values[b]) for a, b in combinations(dims, 2)]
+    out += [(track, "tag", t, "", "") for t in tag_list(row.get("tags"))]
+    return out
+
+
+def delta(track: str, old: dict | None, new: dict | None) -> Counter:
+    """Per-cell count change when a row goes from `old` to `new`."""
+    change = Counter(cells(track, new))
+    change.subtract(cells(track, old))
+    return Counter({cell: n for cell, n in change.items() if n})
+
+
+def cell_for_grouping(track: str, row: dict, grouping: int,
+                      dims: list[str] = None) -> tuple[str, str, str, str, str]:
+    """Map a GROUPING SETS result row to its cell (grouping = GROUPING(<dims>)).
+
+    `dims` defaults to all of the track's dimensions and must be in CUBE_DIMENSIONS order.
+    """
+    dims = dims or CUBE_DIMENSIONS[track]
+    present = [d for i, d in enumerate(dims) if not grouping >> (len(dims) - 1 - i) & 1]
+    present += ["", ""]
+    a, b = present[0], present[1]
+    return (track, a, row[a] if a else "", b, row[b] if b else "")
@@ -1,8 +1,22 @@
 import json
+import select
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import combinations
 import psycopg2
-from psycopg2 import pool, extras
+from psycopg2 import pool, extras, extensions
 from contextlib import contextmanager
-from backend.config import DATABASE_URL
+from backend.config import DATABASE_URL, DATABASE_LISTEN_URL
+from backend.cube import CUBE_DIMENSIONS, delta as cube_delta, cell_for_grouping, tag_list
+
+# Channel used to announce posts whose comments are fetched (ready for Pass 2)
+POSTS_READY_CHANNEL = "posts_ready"
+
+# Posts in retry backoff or dead-lettered for a track (one %s param: the track)
+_NOT_BACKING_OFF = """NOT EXISTS (
+                    SELECT 1 FROM post_failures f
+                    WHERE f.track = %s AND f.post_id = {alias}.post_id
+                      AND (f.dead OR f.next_eligible_at > NOW()))"""
 
 _pool = None
 
@@ -128,6 +142,11 @@ def insert_comments_batch(comments: list[dict]):
             return inserted
 
 
+def notify_posts_ready(cur, payload: str):
+    """Queue a readiness event; Postgres delivers it when the transaction commits."""
+    cur.execute("SELECT pg_notify(%s, %s)", (POSTS_READY_CHANNEL, payload))
+
+
 def mark_comments_fetched(post_id: str):
     with get_conn() as conn:
         with get_cursor(conn) as cur:
@@ -135,21 +154,94 @@ def mark_comments_fetched(post_id: str):
                 "UPDATE raw_posts SET comments_fetched = TRUE WHERE post_id = %s",
                 (post_id,),
             )
+            notify_posts_ready(cur, post_id)
+
 
+def store_fetched_comments(results: list[tuple[str, list[dict]]]) -> int:
+    """Insert comments for many posts and flag them fetched, in one transaction.
+
+    Returns the number of comments inserted.
+    """
+    cols = [
+        "comment_id", "post_id", "body", "author", "score",
+        "created_utc", "parent_id", "is_submitter", "depth",
+        "permalink", "stickied", "distinguished",
+    ]
+    rows = [[c.get(col) for col in cols] for _, comments in results for c in comments]
+    post_ids = [post_id for post_id, _ in results]
 
-def mark_pre_filtered(post_ids: list[str]):
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            inserted = 0
+            if rows:
+                extras.execute_values(cur, f"""
+                    INSERT INTO comments ({", ".join(cols)})
+                    VALUES %s
+                    ON CONFLICT (comment_id) DO NOTHING
+                """, rows, page_size=len(rows))
+                inserted = cur.rowcount
+            cur.execute(
+                "UPDATE raw_posts SET comments_fetched = TRUE WHERE post_id = ANY(%s)",
+                (post_ids,),
+            )
+            notify_posts_ready(cur, f"bulk:{len(post_ids)}")
+            return inserted
+
+
+# ---- Readiness event listener ----
+
+def open_ready_listener():
+    """Open a dedicated autocommit connection subscribed to POSTS_READY_CHANNEL.
+
+    Returns None if LISTEN is unavailable, in which case callers fall back to polling.
+    """
+    try:
+        conn = psycopg2.connect(DATABASE_LISTEN_URL)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {POSTS_READY_CHANNEL}")
+        return conn
+    except psycopg2.Error:
+        return None
+
+
+def wait_for_ready_posts(conn, timeout: float) -> list[str]:
+    """Block up to `timeout` seconds for readiness events. Returns their payloads."""
+    if conn is None:
+        return []
+    if not conn.notifies:
+        readable, _, _ = select.select([conn], [], [], timeout)
+        if not readable:
+            return []
+    conn.poll()
+    payloads = [n.payload for n in conn.notifies]
+    conn.notifies.clear()
+    return payloads
+
+
+def close_ready_listener(conn):
+    if conn is not None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+def mark_pre_filtered(post_ids: list[str], reason: str = None):
     with get_conn() as conn:
         with get_cursor(conn) as cur:
             cur.execute("""
                 UPDATE raw_posts
-                SET pre_filtered_out = TRUE
+                SET pre_filtered_out = TRUE, pre_filter_reason = %s
                 WHERE post_id = ANY(%s)
-            """, (post_ids,))
+            """, (reason, post_ids))
 
 
 # ---- Pass 1: Refilter functions ----
 
-def update_post_refilter(post_id: str, is_fraud: bool, is_idv: bool, confidence: float):
+def update_post_refilter(post_id: str, is_fraud: bool, is_idv: bool, confidence: float,
+                         tier: str = None):
+    """Store a Pass 1 verdict. `tier` records which cascade tier produced it."""
     with get_conn() as conn:
         with get_cursor(conn) as cur:
             cur.execute("""
@@ -157,64 +249,80 @@ def update_post_refilter(post_id: str, is_fraud: bool, is_idv: bool, confidence:
                 SET is_fraud = %s,
                     is_idv = %s,
                     refilter_confidence = %s,
+                    refilter_tier = %s,
                     refilter_done = TRUE
                 WHERE post_id = %s
-            """, (is_fraud, is_idv, confidence, post_id))
+            """, (is_fraud, is_idv, confidence, tier, post_id))
 
 
-def get_unrefiltered_posts(batch_size: int = 50):
+def get_unrefiltered_posts(batch_size: int = 50, by_yield: bool = False):
+    """Next posts for Pass 1. by_yield: highest subreddit yield first (unscored subreddits lead)."""
+    order = "post_id"
+    if by_yield:
+        order = """COALESCE((SELECT sy.yield_rate FROM source_yield sy
+                                  WHERE sy.dimension = 'subreddit' AND sy.key = raw_posts.subreddit), 1) DESC,
+                         post_id"""
     with get_conn() as conn:
         with get_cursor(conn) as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT post_id, title, selftext, subreddit, score, num_comments
                 FROM raw_posts
                 WHERE refilter_done = FALSE
                   AND pre_filtered_out IS NOT TRUE
-                ORDER BY post_id
+                  AND {_NOT_BACKING_OFF.format(alias="raw_posts")}
+                ORDER BY {order}
                 LIMIT %s
-            """, (batch_size,))
+            """, ("refilter", batch_size))
             return cur.fetchall()
 
 
 def get_unrefiltered_count():
     with get_conn() as conn:
         with get_cursor(conn) as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT COUNT(*) as cnt FROM raw_posts
                 WHERE refilter_done = FALSE AND pre_filtered_out IS NOT TRUE
-            """)
+                  AND {_NOT_BACKING_OFF.format(alias="raw_posts")}
+            """, ("refilter",))
             return cur.fetchone()["cnt"]
 
 
 def get_random_unrefiltered_posts(sample_size: int):
     with get_conn() as conn:
         with get_cursor(conn) as cur:
-            cur.execute("""
+            cur.execute(f"""
                 SELECT post_id, title, selftext, subreddit, score, num_comments
                 FROM raw_posts
                 WHERE refilter_done = FALSE
                   AND pre_filtered_out IS NOT TRUE
+                  AND {_NOT_BACKING_OFF.format(alias="raw_posts")}
                 ORDER BY RANDOM()
                 LIMIT %s
-            """, (sample_size,))
+            """, ("refilter", sample_size))
             return cur.fetchall()
 
 
 # ---- Comment functions ----
 
-def get_relevant_posts_without_comments(batch_size: int = 100):
+def get_relevant_posts_without_comments(batch_size: int = 100, exclude: list[str] = None):
+    """Next posts for comment collection, with what's needed to build their URL.
+
+    exclude: posts fetched but not yet written (still in the writer's queue).
+    """
     with get_conn() as conn:
         with get_cursor(conn) as cur:
-            cur.execute("""
-                SELECT post_id
+            cur.execute(f"""
+                SELECT post_id, permalink, subreddit
                 FROM raw_posts
                 WHERE (is_fraud = TRUE OR is_idv = TRUE)
                   AND comments_fetched = FALSE
                   AND num_comments > 0
+                  AND NOT (post_id = ANY(%s))
+                  AND {_NOT_BACKING_OFF.format(alias="raw_posts")}
                 ORDER BY score DESC
                 LIMIT %s
-            """, (batch_size,))
-            return [r["post_id"] for r in cur.fetchall()]
+            """, (exclude or [], "comments", batch_size))
+            return cur.fetchall()
 
 
 def get_top_comments_for_post(post_id: str, limit: int = 5):
@@ -230,6 +338,78 @@ def get_top_comments_for_post(post_id: str, limit: int = 5):
             return cur.fetchall()
 
 
+# ---- Metadata refresh ----
+
+# Re-check interval by post age: young posts still move, old ones have settled
+_REFRESH_DUE = """COALESCE(metadata_refreshed_at, collected_at) < NOW() - CASE
+                    WHEN created_utc > NOW() - INTERVAL '2 days' THEN INTERVAL '1 hour'
+                    WHEN created_utc > NOW() - INTERVAL '7 days' THEN INTERVAL '6 hours'
+                    WHEN created_utc > NOW() - INTERVAL '30 days' THEN INTERVAL '1 day'
+                    ELSE INTERVAL '7 days' END"""
+
+
+def get_posts_due_for_refresh(limit: int):
+    """Posts whose score/num_comments are due for a refresh.
+
+    Skips posts Pass 1 already ruled out. Recent, high-activity posts come first.
+    """
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT post_id, post_fullname
+                FROM raw_posts
+                WHERE post_fullname IS NOT NULL
+                  AND NOT (refilter_done AND is_fraud IS NOT TRUE AND is_idv IS NOT TRUE)
+                  AND {_REFRESH_DUE}
+                ORDER BY LN(2 + GREATEST(score, 0) + 2 * num_comments)
+                         / (1 + EXTRACT(EPOCH FROM NOW() - created_utc) / 86400) DESC
+                LIMIT %s
+            """, (limit,))
+            return cur.fetchall()
+
+
+def count_posts_due_for_refresh() -> int:
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT COUNT(*) AS cnt FROM raw_posts
+                WHERE post_fullname IS NOT NULL
+                  AND NOT (refilter_done AND is_fraud IS NOT TRUE AND is_idv IS NOT TRUE)
+                  AND {_REFRESH_DUE}
+            """)
+            return cur.fetchone()["cnt"]
+
+
+def update_post_metadata_batch(updates: list[dict], post_ids: list[str]) -> int:
+    """Bulk-write refreshed metrics and stamp every requested post as refreshed.
+
+    Posts Reddit no longer returns are stamped too, so they aren't re-requested
+    until their next interval. Returns the number of posts whose metrics changed.
+    """
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            changed = 0
+            if updates:
+                extras.execute_values(cur, """
+                    UPDATE raw_posts p
+                    SET score = v.score, num_comments = v.num_comments,
+                        upvote_ratio = v.upvote_ratio
+                    FROM (VALUES %s) AS v (post_id, score, num_comments, upvote_ratio)
+                    WHERE p.post_id = v.post_id
+                      AND (p.score IS DISTINCT FROM v.score
+                           OR p.num_comments IS DISTINCT FROM v.num_comments
+                           OR p.upvote_ratio IS DISTINCT FROM v.upvote_ratio)
+                """, [(u["post_id"], u["score"], u["num_comments"], u["upvote_ratio"])
+                      for u in updates],
+                    template="(%s, %s::int, %s::int, %s::real)", page_size=len(updates))
+                changed = cur.rowcount
+            cur.execute("""
+                UPDATE raw_posts SET metadata_refreshed_at = NOW()
+                WHERE post_id = ANY(%s)
+            """, (post_ids,))
+            return changed
+
+
 # ---- Pre-filter functions ----
 
 def get_posts_for_prefilter():
@@ -237,7 +417,8 @@ def get_posts_for_prefilter():
     with get_conn() as conn:
         with get_cursor(conn) as cur:
             cur.execute("""
-                SELECT post_id, title, selftext, score
+                SELECT post_id, title, selftext, score,
+                       subreddit, collection_source, search_query
                 FROM raw_posts
                 WHERE refilter_done = FALSE
                   AND pre_filtered_out = FALSE
@@ -245,71 +426,305 @@ def get_posts_for_prefilter():
             return cur.fetchall()
 
 
-# ---- Classification functions ----
+def get_pre_filtered_posts(reason: str):
+    """Posts still waiting for Pass 1 that were pre-filtered for one reason."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT post_id, subreddit, collection_source, search_query
+                FROM raw_posts
+                WHERE refilter_done = FALSE
+                  AND pre_filtered_out = TRUE
+                  AND pre_filter_reason = %s
+            """, (reason,))
+            return cur.fetchall()
 
-def insert_fraud_classification(post_id: str, classification: dict, model: str = None):
+
+def unmark_pre_filtered(post_ids: list[str]) -> int:
     with get_conn() as conn:
         with get_cursor(conn) as cur:
             cur.execute("""
-                INSERT INTO fraud_classifications
-                    (post_id, is_relevant, fraud_type, industry, loss_bracket, channel,
-                     notable_quote, tags, llm_model)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (post_id) DO UPDATE SET
-                    is_relevant = EXCLUDED.is_relevant,
-                    fraud_type = EXCLUDED.fraud_type,
-                    industry = EXCLUDED.industry,
-                    loss_bracket = EXCLUDED.loss_bracket,
-                    channel = EXCLUDED.channel,
-                    notable_quote = EXCLUDED.notable_quote,
-                    tags = EXCLUDED.tags,
-                    llm_model = EXCLUDED.llm_model,
-                    classified_at = NOW()
-            """, (
-                post_id,
-                classification.get("is_relevant", True),
-                classification["fraud_type"],
-                classification["industry"],
-                classification["loss_bracket"],
-                classification["channel"],
-                classification.get("notable_quote"),
-                json.dumps(classification.get("tags", [])),
-                model,
-            ))
-
-
-def insert_idv_classification(post_id: str, classification: dict, model: str = None):
+                UPDATE raw_posts
+                SET pre_filtered_out = FALSE, pre_filter_reason = NULL
+                WHERE post_id = ANY(%s)
+            """, (post_ids,))
+            return cur.rowcount
+
+
+def get_pre_filter_reason_counts():
     with get_conn() as conn:
         with get_cursor(conn) as cur:
             cur.execute("""
-                INSERT INTO idv_classifications
-                    (post_id, is_relevant, verification_type, friction_type,
-                     trigger_reason, platform_name, sentiment,
-                     notable_quote, tags, llm_model)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (post_id) DO UPDATE SET
-                    is_relevant = EXCLUDED.is_relevant,
-                    verification_type = EXCLUDED.verification_type,
-                    friction_type = EXCLUDED.friction_type,
-                    trigger_reason = EXCLUDED.trigger_reason,
-                    platform_name = EXCLUDED.platform_name,
-                    sentiment = EXCLUDED.sentiment,
-                    notable_quote = EXCLUDED.notable_quote,
-                    tags = EXCLUDED.tags,
-                    llm_model = EXCLUDED.llm_model,
-                    classified_at = NOW()
-            """, (
-                post_id,
-                classification.get("is_relevant", True),
-                classification["verification_type"],
-                classification["friction_type"],
-                classification.get("trigger_reason", "unknown"),
-                classification.get("platform_name"),
-                classification["sentiment"],
-                classification.get("notable_quote"),
-                json.dumps(classification.get("tags", [])),
-                model,
-            ))
+                SELECT COALESCE(pre_filter_reason, 'unrecorded') AS reason, COUNT(*) AS posts
+                FROM raw_posts
+                WHERE pre_filtered_out = TRUE
+                GROUP BY 1
+                ORDER BY posts DESC
+            """)
+            return cur.fetchall()
+
+
+# ---- Classification functions ----
+
+def _lock_for_cube(cur, track: str, post_id: str) -> tuple[str, dict | None]:
+    """Lock the post and read its current row. Returns (subreddit, old row or None)."""
+    dims = [d for d in CUBE_DIMENSIONS[track] if d != "subreddit"]
+    cur.execute(f"""
+        SELECT p.subreddit, c.post_id IS NOT NULL AS has_row, c.is_relevant, c.tags,
+               {", ".join(f"c.{d}" for d in dims)}
+        FROM raw_posts p
+        LEFT JOIN {_CLASSIFICATION_TABLES[track]} c ON c.post_id = p.post_id
+        WHERE p.post_id = %s
+        FOR UPDATE OF p
+    """, (post_id,))
+    row = cur.fetchone()
+    if row is None:
+        return None, None
+    return row["subreddit"], (row if row["has_row"] else None)
+
+
+def _write_tags(cur, track: str, post_id: str, old: dict | None, tags: list):
+    """Mirror a row's JSONB tags into classification_tags (skipped when unchanged)."""
+    new_tags = tag_list(tags)
+    if old is not None and tag_list(old["tags"]) == new_tags:
+        return
+    cur.execute("DELETE FROM classification_tags WHERE track = %s AND post_id = %s",
+                (track, post_id))
+    if new_tags:
+        extras.execute_values(cur, """
+            INSERT INTO classification_tags (track, post_id, tag) VALUES %s
+        """, [(track, post_id, t) for t in new_tags])
+
+
+def _apply_cube_delta(cur, change: Counter):
+    """Add per-cell count changes to classification_cube (sorted, so concurrent writers lock in one order)."""
+    if not change:
+        return
+    extras.execute_values(cur, """
+        INSERT INTO classification_cube (track, dim_a, val_a, dim_b, val_b, count)
+        VALUES %s
+        ON CONFLICT (track, dim_a, val_a, dim_b, val_b)
+        DO UPDATE SET count = classification_cube.count + EXCLUDED.count
+    """, [(*cell, n) for cell, n in sorted(change.items())], page_size=len(change))
+
+
+def _archive_replaced(cur, track: str, post_id: str, replaced_by: str):
+    """Copy the current row to classification_history if a different prompt version is replacing it."""
+    if replaced_by is None:
+        return
+    cur.execute(f"""
+        INSERT INTO classification_history (track, post_id, prompt_version, replaced_by, snapshot)
+        SELECT %s, c.post_id, c.prompt_version, %s, to_jsonb(c)
+        FROM {_CLASSIFICATION_TABLES[track]} c
+        WHERE c.post_id = %s AND c.prompt_version IS DISTINCT FROM %s
+        ON CONFLICT (track, post_id, replaced_by) DO NOTHING
+    """, (track, replaced_by, post_id, replaced_by))
+
+
+def _upsert_fraud_classification(cur, post_id: str, classification: dict, model: str = None,
+                                 prompt_version: str = None) -> Counter:
+    """Upsert one fraud row. Returns its classification_cube change for _apply_cube_delta."""
+    subreddit, old = _lock_for_cube(cur, "fraud", post_id)
+    if old is not None:
+        _archive_replaced(cur, "fraud", post_id, prompt_version)
+    cur.execute("""
+        INSERT INTO fraud_classifications
+            (post_id, is_relevant, fraud_type, industry, loss_bracket, channel,
+             notable_quote, tags, llm_model, prompt_version)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (post_id) DO UPDATE SET
+            is_relevant = EXCLUDED.is_relevant,
+            fraud_type = EXCLUDED.fraud_type,
+            industry = EXCLUDED.industry,
+            loss_bracket = EXCLUDED.loss_bracket,
+            channel = EXCLUDED.channel,
+            notable_quote = EXCLUDED.notable_quote,
+            tags = EXCLUDED.tags,
+            llm_model = EXCLUDED.llm_model,
+            prompt_version = EXCLUDED.prompt_version,
+            classified_at = NOW()
+    """, (
+        post_id,
+        classification.get("is_relevant", True),
+        classification["fraud_type"],
+        classification["industry"],
+        classification["loss_bracket"],
+        classification["channel"],
+        classification.get("notable_quote"),
+        json.dumps(classification.get("tags", [])),
+        model,
+        prompt_version,
+    ))
+    _write_tags(cur, "fraud", post_id, old, classification.get("tags", []))
+    return cube_delta("fraud", old, {
+        "is_relevant": classification.get("is_relevant", True),
+        "tags": classification.get("tags", []),
+        "fraud_type": classification["fraud_type"],
+        "industry": classification["industry"],
+        "channel": classification["channel"],
+        "loss_bracket": classification["loss_bracket"],
+        "subreddit": subreddit,
+    })
+
+
+def _upsert_idv_classification(cur, post_id: str, classification: dict, model: str = None,
+                               prompt_version: str = None) -> Counter:
+    """Upsert one IDV row. Returns its classification_cube change for _apply_cube_delta."""
+    subreddit, old = _lock_for_cube(cur, "idv", post_id)
+    if old is not None:
+        _archive_replaced(cur, "idv", post_id, prompt_version)
+    cur.execute("""
+        INSERT INTO idv_classifications
+            (post_id, is_relevant, verification_type, friction_type,
+             trigger_reason, platform_name, sentiment,
+             notable_quote, tags, llm_model, prompt_version)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (post_id) DO UPDATE SET
+            is_relevant = EXCLUDED.is_relevant,
+            verification_type = EXCLUDED.verification_type,
+            friction_type = EXCLUDED.friction_type,
+            trigger_reason = EXCLUDED.trigger_reason,
+            platform_name = EXCLUDED.platform_name,
+            sentiment = EXCLUDED.sentiment,
+            notable_quote = EXCLUDED.notable_quote,
+            tags = EXCLUDED.tags,
+            llm_model = EXCLUDED.llm_model,
+            prompt_version = EXCLUDED.prompt_version,
+            classified_at = NOW()
+    """, (
+        post_id,
+        classification.get("is_relevant", True),
+        classification["verification_type"],
+        classification["friction_type"],
+        classification.get("trigger_reason", "unknown"),
+        classification.get("platform_name"),
+        classification["sentiment"],
+        classification.get("notable_quote"),
+        json.dumps(classification.get("tags", [])),
+        model,
+        prompt_version,
+    ))
+    _write_tags(cur, "idv", post_id, old, classification.get("tags", []))
+    return cube_delta("idv", old, {
+        "is_relevant": classification.get("is_relevant", True),
+        "tags": classification.get("tags", []),
+        "verification_type": classification["verification_type"],
+        "friction_type": classification["friction_type"],
+        "trigger_reason": classification.get("trigger_reason", "unknown"),
+        "platform_name": classification.get("platform_name"),
+        "sentiment": classification["sentiment"],
+        "subreddit": subreddit,
+    })
+
+
+def insert_fraud_classification(post_id: str, classification: dict, model: str = None,
+                                prompt_version: str = None):
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            _apply_cube_delta(cur, _upsert_fraud_classification(
+                cur, post_id, classification, model, prompt_version))
+
+
+def insert_idv_classification(post_id: str, classification: dict, model: str = None,
+                              prompt_version: str = None):
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            _apply_cube_delta(cur, _upsert_idv_classification(
+                cur, post_id, classification, model, prompt_version))
+
+
+def insert_classifications_batch(track: str, results: list[tuple[str, dict]], model: str = None,
+                                 prompt_versions: dict = None):
+    """Upsert many Pass 2 results for one track in a single transaction.
+
+    Args:
+        track: "fraud", "idv", or "dual"
+        results: (post_id, classification) pairs. For "dual" the classification
+                 is {"fraud": ..., "idv": ..., "prompt_versions": {...}} and
+                 both tables are written.
+        prompt_versions: {"fraud": version, "idv": version} recorded on each row
+    """
+    prompt_versions = prompt_versions or {}
+    change = Counter()
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            for post_id, classification in results:
+                if track == "dual":
+                    versions = classification.get("prompt_versions", prompt_versions)
+                    change.update(_upsert_fraud_classification(
+                        cur, post_id, classification["fraud"], model, versions.get("fraud")))
+                    change.update(_upsert_idv_classification(
+                        cur, post_id, classification["idv"], model, versions.get("idv")))
+                elif track == "fraud":
+                    change.update(_upsert_fraud_classification(
+                        cur, post_id, classification, model, prompt_versions.get("fraud")))
+                else:
+                    change.update(_upsert_idv_classification(
+                        cur, post_id, classification, model, prompt_versions.get("idv")))
+            _apply_cube_delta(cur, change)
+    return len(results)
+
+
+def _newer_row_exists(cur, table: str, post_id: str, ts: str) -> bool:
+    """Whether the row was classified after `ts` (a naive UTC journal timestamp).
+
+    classified_at is a naive NOW() in the session time zone, so both sides are
+    compared as timestamptz: the cast reads classified_at in that zone and the
+    journal time is passed with an explicit UTC offset.
+    """
+    cur.execute(f"""
+        SELECT classified_at::timestamptz > %s AS newer FROM {table} WHERE post_id = %s
+    """, (datetime.fromisoformat(ts).replace(tzinfo=timezone.utc), post_id))
+    row = cur.fetchone()
+    return row is not None and bool(row["newer"])
+
+
+def apply_journaled_classifications(track: str, entries: list[dict]) -> int:
+    """Replay journaled Pass 2 results (see journal.py) in one transaction.
+
+    A table row classified after the entry was journaled is kept, so replaying
+    an old entry never clobbers a newer result. Returns entries written.
+    batch_files.ingest_results uses it too, with the export time as each ts.
+    """
+    written = 0
+    change = Counter()
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            for e in entries:
+                result, versions, model = e["result"], e.get("prompt_versions") or {}, e.get("model")
+                parts = ([("fraud", result["fraud"]), ("idv", result["idv"])]
+                         if track == "dual" else [(track, result)])
+                wrote = False
+                for part, classification in parts:
+                    if _newer_row_exists(cur, _CLASSIFICATION_TABLES[part], e["post_id"], e["ts"]):
+                        continue
+                    upsert = _upsert_fraud_classification if part == "fraud" else _upsert_idv_classification
+                    change.update(upsert(cur, e["post_id"], classification, model, versions.get(part)))
+                    wrote = True
+                written += wrote
+            _apply_cube_delta(cur, change)
+    return written
+
+
+def apply_journaled_refilters(entries: list[dict]) -> int:
+    """Replay journaled Pass 1 verdicts onto posts that are still unrefiltered."""
+    written = 0
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            for e in entries:
+                r = e["result"]
+                cur.execute("""
+                    UPDATE raw_posts
+                    SET is_fraud = %s,
+                        is_idv = %s,
+                        refilter_confidence = %s,
+                        refilter_tier = %s,
+                        refilter_done = TRUE
+                    WHERE post_id = %s AND refilter_done = FALSE
+                """, (r.get("is_fraud"), r.get("is_idv"), r.get("confidence"),
+                      r.get("tier"), e["post_id"]))
+                written += cur.rowcount
+    return written
 
 
 def get_unclassified_fraud_posts(batch_size: int = 50):
@@ -401,15 +816,23 @@ def get_collection_stats():
 def get_ready_unclassified_posts(track: str, batch_size: int = 500, random_order: bool = False):
     """Get unclassified posts that have comments fetched and are ready for Pass 2.
 
+    Posts in retry backoff or dead-lettered for the track are skipped.
+
     Args:
-        track: "fraud" or "idv"
+        track: "fraud", "idv", or "dual" (flagged both, classified in neither table)
         batch_size: max posts to return
         random_order: if True, return random sample (for testing)
     """
     if track == "fraud":
-        flag, table = "is_fraud", "fraud_classifications"
+        pending = """p.is_fraud = TRUE
+                  AND p.post_id NOT IN (SELECT post_id FROM fraud_classifications)"""
+    elif track == "idv":
+        pending = """p.is_idv = TRUE
+                  AND p.post_id NOT IN (SELECT post_id FROM idv_classifications)"""
     else:
-        flag, table = "is_idv", "idv_classifications"
+        pending = """p.is_fraud = TRUE AND p.is_idv = TRUE
+                  AND p.post_id NOT IN (SELECT post_id FROM fraud_classifications)
+                  AND p.post_id NOT IN (SELECT post_id FROM idv_classifications)"""
 
     order = "ORDER BY RANDOM()" if random_order else "ORDER BY p.score DESC"
 
@@ -417,14 +840,32 @@ def get_ready_unclassified_posts(track: str, batch_size: int = 500, random_order
         with get_cursor(conn) as cur:
             cur.execute(f"""
                 SELECT p.post_id, p.title, p.selftext, p.subreddit,
-                       p.score, p.num_comments
+                       p.score, p.num_comments, p.refilter_confidence
                 FROM raw_posts p
-                WHERE p.{flag} = TRUE
+                WHERE {pending}
                   AND p.comments_fetched = TRUE
-                  AND p.post_id NOT IN (SELECT post_id FROM {table})
+                  AND {_NOT_BACKING_OFF.format(alias="p")}
                 {order}
                 LIMIT %s
-            """, (batch_size,))
+            """, (track, batch_size))
+            return cur.fetchall()
+
+
+def get_dual_classified_sample(sample_size: int):
+    """Random posts that already have both a fraud and an IDV classification."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT p.post_id, p.title, p.selftext, p.subreddit,
+                       p.score, p.num_comments,
+                       row_to_json(fc) AS fraud, row_to_json(ic) AS idv
+                FROM raw_posts p
+                JOIN fraud_classifications fc ON fc.post_id = p.post_id
+                JOIN idv_classifications ic ON ic.post_id = p.post_id
+                WHERE p.is_fraud = TRUE AND p.is_idv = TRUE
+                ORDER BY RANDOM()
+                LIMIT %s
+            """, (sample_size,))
             return cur.fetchall()
 
 
@@ -454,3 +895,753 @@ def get_classification_progress():
                 "fraud_ready": fraud_ready,
                 "idv_ready": idv_ready,
             }
+
+
+# ---- Prompt versions & stale reclassification ----
+
+_CLASSIFICATION_TABLES = {"fraud": "fraud_classifications", "idv": "idv_classifications"}
+
+
+def register_prompt_versions(versions: list[dict]):
+    """Record prompt versions (from prompt_registry.build_version) if not already known."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            for v in versions:
+                cur.execute("""
+                    INSERT INTO prompt_versions
+                        (version, track, llm_model, prompt_hash, schema_hash,
+                         field_hashes, system_prompt)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (version) DO NOTHING
+                """, (
+                    v["version"], v["track"], v["llm_model"], v["prompt_hash"],
+                    v["schema_hash"], json.dumps(v["field_hashes"]), v["system_prompt"],
+                ))
+
+
+def get_prompt_field_hashes(versions: list[str]) -> dict[str, dict]:
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT version, field_hashes FROM prompt_versions
+                WHERE version = ANY(%s)
+            """, (versions,))
+            return {r["version"]: r["field_hashes"] for r in cur.fetchall()}
+
+
+def get_prompt_version_counts(track: str):
+    """Row counts per stored prompt_version for one classification table."""
+    table = _CLASSIFICATION_TABLES[track]
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT prompt_version, COUNT(*) AS cnt, MAX(classified_at) AS last_classified
+                FROM {table}
+                GROUP BY prompt_version
+                ORDER BY cnt DESC
+            """)
+            return cur.fetchall()
+
+
+def stamp_legacy_prompt_version(track: str, version: str) -> int:
+    """Assign `version` to rows classified before versions were recorded."""
+    table = _CLASSIFICATION_TABLES[track]
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"UPDATE {table} SET prompt_version = %s WHERE prompt_version IS NULL",
+                        (version,))
+            return cur.rowcount
+
+
+def _stale_condition(current_versions: list[str], scope: dict | None) -> tuple[str, list]:
+    """WHERE fragment selecting stale rows, optionally limited per old version.
+
+    scope maps old version (None for legacy rows) -> {field: values | None};
+    rows are kept when any listed field holds one of its values (None = any).
+    Old versions missing from scope keep every row.
+    """
+    params = [current_versions]
+    stale = "(c.prompt_version IS NULL OR c.prompt_version <> ALL(%s))"
+    if scope is None:
+        return stale, params
+
+    clauses = []
+    for version, fields in scope.items():
+        match = "c.prompt_version IS NULL" if version is None else "c.prompt_version = %s"
+        if version is not None:
+            params.append(version)
+        if not fields:
+            clauses.append(f"({match} AND FALSE)")
+            continue
+        field_terms = []
+        for field, values in fields.items():
+            if values is None:
+                field_terms.append("TRUE")
+            else:
+                field_terms.append(f"c.{field} = ANY(%s)")
+                params.append(values)
+        clauses.append(f"({match} AND ({' OR '.join(field_terms)}))")
+
+    unscoped = [v for v in scope if v is not None]
+    params.append(unscoped)
+    clauses.append("(c.prompt_version IS NOT NULL AND c.prompt_version <> ALL(%s))"
+                   if None in scope else
+                   "(c.prompt_version IS NULL OR c.prompt_version <> ALL(%s))")
+    return f"{stale} AND ({' OR '.join(clauses)})", params
+
+
+def count_stale_classifications(track: str, current_versions: list[str],
+                                scope: dict = None) -> int:
+    table = _CLASSIFICATION_TABLES[track]
+    where, params = _stale_condition(current_versions, scope)
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"SELECT COUNT(*) AS cnt FROM {table} c WHERE {where}", params)
+            return cur.fetchone()["cnt"]
+
+
+def get_stale_prompt_versions(track: str, current_versions: list[str]) -> list:
+    table = _CLASSIFICATION_TABLES[track]
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT DISTINCT prompt_version FROM {table}
+                WHERE prompt_version IS NULL OR prompt_version <> ALL(%s)
+            """, (current_versions,))
+            return [r["prompt_version"] for r in cur.fetchall()]
+
+
+def fetch_stale_for_reclassify(track: str, current_versions: list[str], batch_size: int,
+                               scope: dict = None):
+    """Get stale rows to reclassify. The old row is archived when the new one is written."""
+    table = _CLASSIFICATION_TABLES[track]
+    where, params = _stale_condition(current_versions, scope)
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT p.post_id, p.title, p.selftext, p.subreddit,
+                       p.score, p.num_comments, p.refilter_confidence
+                FROM {table} c
+                JOIN raw_posts p ON p.post_id = c.post_id
+                WHERE {where}
+                ORDER BY p.score DESC
+                LIMIT %s
+            """, params + [batch_size])
+            return cur.fetchall()
+
+
+def get_reclassification_pairs(track: str, replaced_by: str):
+    """Archived (before) and current (after) rows for posts reclassified into `replaced_by`."""
+    table = _CLASSIFICATION_TABLES[track]
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT h.post_id, h.prompt_version AS old_version,
+                       h.snapshot AS before, row_to_json(c) AS after
+                FROM classification_history h
+                JOIN {table} c ON c.post_id = h.post_id AND c.prompt_version = h.replaced_by
+                WHERE h.track = %s AND h.replaced_by = %s
+            """, (track, replaced_by))
+            return cur.fetchall()
+
+
+# ---- Failed posts: retry backoff and dead letters ----
+
+def record_post_failures(track: str, failures: list[tuple[str, str, str]], base_minutes: int,
+                         max_hours: int, max_attempts: int) -> list[dict]:
+    """Record failed attempts and schedule the next one on exponential backoff.
+
+    Args:
+        failures: (post_id, error_class, error message) triples
+        base_minutes: delay after the first failure; doubles on each further one
+        max_hours: cap on the delay
+        max_attempts: attempts after which the post is dead-lettered
+
+    Returns the updated rows (post_id, attempts, dead, next_eligible_at).
+    """
+    rows = []
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            for post_id, error_class, error in failures:
+                cur.execute("""
+                    INSERT INTO post_failures
+                        (track, post_id, error_class, last_error, attempts, next_eligible_at, dead)
+                    VALUES (%(track)s, %(post_id)s, %(error_class)s, %(error)s, 1,
+                            NOW() + make_interval(mins => %(base)s), 1 >= %(max_attempts)s)
+                    ON CONFLICT (track, post_id) DO UPDATE SET
+                        error_class = EXCLUDED.error_class,
+                        last_error = EXCLUDED.last_error,
+                        attempts = post_failures.attempts + 1,
+                        last_failed_at = NOW(),
+                        next_eligible_at = NOW() + LEAST(
+                            make_interval(mins => %(base)s) * power(2, post_failures.attempts),
+                            make_interval(hours => %(max_hours)s)),
+                        dead = post_failures.attempts + 1 >= %(max_attempts)s
+                    RETURNING post_id, attempts, dead, next_eligible_at
+                """, {
+                    "track": track, "post_id": post_id, "error_class": error_class,
+                    "error": (error or "")[:500] or None, "base": base_minutes,
+                    "max_hours": max_hours, "max_attempts": max_attempts,
+                })
+                rows.append(cur.fetchone())
+    return rows
+
+
+def clear_post_failures(track: str, post_ids: list[str]) -> int:
+    """Forget failures for posts that have now succeeded on a track."""
+    if not post_ids:
+        return 0
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("DELETE FROM post_failures WHERE track = %s AND post_id = ANY(%s)",
+                        (track, list(post_ids)))
+            return cur.rowcount
+
+
+def get_post_failures(track: str = None, dead_only: bool = False, limit: int = 50):
+    conditions, params = [], []
+    if track:
+        conditions.append("f.track = %s")
+        params.append(track)
+    if dead_only:
+        conditions.append("f.dead")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT f.track, f.post_id, f.error_class, f.last_error, f.attempts,
+                       f.first_failed_at, f.last_failed_at, f.next_eligible_at, f.dead,
+                       p.subreddit, LEFT(p.title, 80) AS title
+                FROM post_failures f
+                JOIN raw_posts p ON p.post_id = f.post_id
+                {where}
+                ORDER BY f.dead DESC, f.last_failed_at DESC
+                LIMIT %s
+            """, (*params, limit))
+            return cur.fetchall()
+
+
+def get_post_failure_summary():
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT track, error_class,
+                       COUNT(*) FILTER (WHERE dead) AS dead,
+                       COUNT(*) FILTER (WHERE NOT dead AND next_eligible_at > NOW()) AS backing_off,
+                       COUNT(*) FILTER (WHERE NOT dead AND next_eligible_at <= NOW()) AS eligible
+                FROM post_failures
+                GROUP BY track, error_class
+                ORDER BY track, dead DESC, error_class
+            """)
+            return cur.fetchall()
+
+
+def requeue_post_failures(track: str = None, post_ids: list[str] = None,
+                          dead_only: bool = True) -> int:
+    """Make failed posts eligible again now, with a fresh attempt budget."""
+    conditions, params = [], []
+    if track:
+        conditions.append("track = %s")
+        params.append(track)
+    if post_ids:
+        conditions.append("post_id = ANY(%s)")
+        params.append(list(post_ids))
+    if dead_only:
+        conditions.append("dead")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                UPDATE post_failures
+                SET dead = FALSE, attempts = 0, next_eligible_at = NOW()
+                {where}
+            """, params)
+            return cur.rowcount
+
+
+# ---- Source yield ----
+
+_YIELD_DIMENSIONS = ("subreddit", "collection_source", "search_query")
+
+
+def refresh_source_yields(prior_strength: float) -> float:
+    """Rebuild source_yield from current outcomes. Returns the global relevance rate.
+
+    A post counts as relevant when Pass 1 flagged it and Pass 2 (if it has run)
+    did not reject it. Each key's rate is smoothed toward the global rate with a
+    beta prior worth prior_strength posts.
+    """
+    dims = "\n                    UNION ALL ".join(
+        f"SELECT '{d}', {d}, refiltered, relevant FROM outcomes WHERE {d} IS NOT NULL"
+        for d in _YIELD_DIMENSIONS)
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT COALESCE(AVG(CASE WHEN (p.is_fraud IS TRUE AND fc.is_relevant IS NOT FALSE)
+                                           OR (p.is_idv IS TRUE AND ic.is_relevant IS NOT FALSE)
+                                         THEN 1.0 ELSE 0.0 END), 0) AS rate
+                FROM raw_posts p
+                LEFT JOIN fraud_classifications fc ON fc.post_id = p.post_id
+                LEFT JOIN idv_classifications ic ON ic.post_id = p.post_id
+                WHERE p.refilter_done = TRUE
+            """)
+            rate = float(cur.fetchone()["rate"])
+            cur.execute("DELETE FROM source_yield")
+            cur.execute(f"""
+                WITH outcomes AS (
+                    SELECT p.subreddit, p.collection_source, p.search_query,
+                           p.refilter_done AS refiltered,
+                           p.refilter_done AND (
+                               (p.is_fraud IS TRUE AND fc.is_relevant IS NOT FALSE)
+                               OR (p.is_idv IS TRUE AND ic.is_relevant IS NOT FALSE)) AS relevant
+                    FROM raw_posts p
+                    LEFT JOIN fraud_classifications fc ON fc.post_id = p.post_id
+                    LEFT JOIN idv_classifications ic ON ic.post_id = p.post_id
+                ), keyed (dimension, key, refiltered, relevant) AS (
+                    {dims}
+                )
+                INSERT INTO source_yield (dimension, key, posts, refiltered, relevant, yield_rate)
+                SELECT dimension, key, COUNT(*),
+                       COUNT(*) FILTER (WHERE refiltered),
+                       COUNT(*) FILTER (WHERE relevant),
+                       (COUNT(*) FILTER (WHERE relevant) + %(k)s * %(rate)s)
+                           / (COUNT(*) FILTER (WHERE refiltered) + %(k)s)
+                FROM keyed
+                GROUP BY dimension, key
+            """, {"k": prior_strength, "rate": rate})
+            return rate
+
+
+def get_source_yields(dimension: str = None):
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            if dimension:
+                cur.execute("""
+                    SELECT * FROM source_yield WHERE dimension = %s ORDER BY yield_rate DESC
+                """, (dimension,))
+            else:
+                cur.execute("SELECT * FROM source_yield ORDER BY dimension, yield_rate DESC")
+            return cur.fetchall()
+
+
+# ---- Classification cube ----
+
+def _grouped_counts(cur, track: str, dims: list[str], pairs: bool) -> dict[tuple, int]:
+    """One GROUPING SETS scan over relevant rows: {cube cell: count}."""
+    col = lambda d: f"{'p' if d == 'subreddit' else 'c'}.{d}"
+    base_cols = ", ".join(f"COALESCE({col(d)}, '') AS {d}" for d in dims)
+    sets = ["()"] + [f"({d})" for d in dims]
+    if pairs:
+        sets += [f"({a}, {b})" for a, b in combinations(dims, 2)]
+    cur.execute(f"""
+        SELECT {", ".join(dims)}, GROUPING({", ".join(dims)}) AS g, COUNT(*) AS n
+        FROM (
+            SELECT {base_cols}
+            FROM {_CLASSIFICATION_TABLES[track]} c
+            JOIN raw_posts p ON p.post_id = c.post_id
+            WHERE c.is_relevant = TRUE
+        ) base
+        GROUP BY GROUPING SETS ({", ".join(sets)})
+    """)
+    return {cell_for_grouping(track, r, r["g"], dims): r["n"] for r in cur.fetchall()}
+
+
+def rebuild_classification_cube(track: str) -> dict:
+    """Recompute one track's cube cells in a single GROUPING SETS scan.
+
+    Returns {"cells": n, "drifted": m}, where m counts cells whose incremental
+    count differed from the recomputed one.
+    """
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("LOCK TABLE classification_cube IN EXCLUSIVE MODE")
+            fresh = _grouped_counts(cur, track, CUBE_DIMENSIONS[track], pairs=True)
+            cur.execute(f"""
+                SELECT t.tag, COUNT(*) AS n
+                FROM classification_tags t
+                JOIN {_CLASSIFICATION_TABLES[track]} c ON c.post_id = t.post_id
+                WHERE t.track = %s AND c.is_relevant = TRUE
+                GROUP BY t.tag
+            """, (track,))
+            fresh.update({(track, "tag", r["tag"], "", ""): r["n"] for r in cur.fetchall()})
+
+            cur.execute("""
+                SELECT track, dim_a, val_a, dim_b, val_b, count
+                FROM classification_cube WHERE track = %s AND count <> 0
+            """, (track,))
+            current = {(r["track"], r["dim_a"], r["val_a"], r["dim_b"], r["val_b"]): r["count"]
+                       for r in cur.fetchall()}
+            drifted = sum(current.get(c, 0) != fresh.get(c, 0) for c in set(current) | set(fresh))
+
+            cur.execute("DELETE FROM classification_cube WHERE track = %s", (track,))
+            if fresh:
+                extras.execute_values(cur, """
+                    INSERT INTO classification_cube (track, dim_a, val_a, dim_b, val_b, count)
+                    VALUES %s
+                """, [(*cell, n) for cell, n in fresh.items()], page_size=1000)
+            return {"cells": len(fresh), "drifted": drifted}
+
+
+def backfill_classification_tags(track: str) -> int:
+    """Fill classification_tags from the JSONB tags of existing rows. Returns rows added."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                INSERT INTO classification_tags (track, post_id, tag)
+                SELECT DISTINCT %s, c.post_id, BTRIM(t.tag)
+                FROM {_CLASSIFICATION_TABLES[track]} c,
+                     LATERAL jsonb_array_elements_text(c.tags) AS t(tag)
+                WHERE jsonb_typeof(c.tags) = 'array'
+                  AND BTRIM(t.tag) <> ''
+                ON CONFLICT DO NOTHING
+            """, (track,))
+            return cur.rowcount
+
+
+def get_cube_cells(track: str):
+    """Every non-zero classification_cube cell for one track."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT dim_a, val_a, dim_b, val_b, count
+                FROM classification_cube WHERE track = %s AND count > 0
+            """, (track,))
+            return cur.fetchall()
+
+
+def count_tagged_posts(track: str, tags: list[str] = (), patterns: list[str] = (),
+                       column: str = None, values: list[str] = ()) -> int:
+    """Relevant posts carrying any of `tags` or a tag ILIKE one of `patterns`,
+    or whose classification `column` is one of `values`."""
+    if column is not None and column not in CUBE_DIMENSIONS[track]:
+        raise ValueError(f"Unknown {track} dimension {column!r}")
+    table = _CLASSIFICATION_TABLES[track]
+    by_column = f"UNION SELECT post_id FROM {table} WHERE {column} = ANY(%s)" if column else ""
+    params = [track, list(tags), list(patterns)] + ([list(values)] if column else [])
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT COUNT(*) AS n
+                FROM (
+                    SELECT post_id FROM classification_tags
+                    WHERE track = %s AND (tag = ANY(%s) OR tag ILIKE ANY(%s))
+                    {by_column}
+                ) matched
+                JOIN {table} c ON c.post_id = matched.post_id
+                WHERE c.is_relevant = TRUE
+            """, params)
+            return cur.fetchone()["n"]
+
+
+# ---- Trend rollups ----
+
+# (bucket step, moving-average frame before the current bucket, buckets averaged)
+_TREND_GRAINS = {"week": ("7 days", "21 days", 4), "month": ("1 month", "2 months", 3)}
+
+# Rescan this far behind the watermark: classified_at is the writing transaction's
+# start time, so a long batch can commit rows stamped before the last refresh
+_TRENDS_OVERLAP = "15 minutes"
+
+
+def refresh_classification_trends(track: str, rebuild: bool = False) -> dict:
+    """Recount the trend buckets holding rows classified since the last refresh.
+
+    A post's buckets follow its created_utc, which never changes, so recounting
+    every bucket with a new or reclassified row keeps the rollups exact. Moving
+    averages and deltas are then recomputed from the earliest recounted bucket
+    on. rebuild=True recounts everything (needed after classification rows are
+    deleted). Returns {"buckets": recounted buckets, "rows": rollup rows written}.
+    """
+    table = _CLASSIFICATION_TABLES[track]
+    dims = CUBE_DIMENSIONS[track]
+    col = lambda d: f"{'p' if d == 'subreddit' else 'c'}.{d}"
+
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("LOCK TABLE classification_trends IN EXCLUSIVE MODE")
+            cur.execute("SELECT classified_through FROM classification_trends_state WHERE track = %s",
+                        (track,))
+            state = cur.fetchone()
+            since = None if rebuild or state is None else state["classified_through"]
+
+            cur.execute(f"""
+                SELECT ARRAY_AGG(DISTINCT date_trunc('week', p.created_utc)::date) AS week,
+                       ARRAY_AGG(DISTINCT date_trunc('month', p.created_utc)::date) AS month,
+                       MAX(c.classified_at) AS through
+                FROM {table} c
+                JOIN raw_posts p ON p.post_id = c.post_id
+                WHERE %s::timestamp IS NULL
+                   OR c.classified_at > %s::timestamp - INTERVAL '{_TRENDS_OVERLAP}'
+            """, (since, since))
+            touched = cur.fetchone()
+            if since is None:
+                cur.execute("DELETE FROM classification_trends WHERE track = %s", (track,))
+            if touched["through"] is None:
+                return {"buckets": 0, "rows": 0}
+
+            rows = 0
+            for grain, (step, frame, periods) in _TREND_GRAINS.items():
+                buckets = touched[grain]
+                cur.execute("""
+                    DELETE FROM classification_trends
+                    WHERE track = %s AND grain = %s AND bucket = ANY(%s)
+                """, (track, grain, buckets))
+                cur.execute(f"""
+                    INSERT INTO classification_trends (track, grain, dim, val, bucket, count)
+                    SELECT %s, %s,
+                           CASE {" ".join(f"WHEN GROUPING({d}) = 0 THEN '{d}'" for d in dims)} ELSE '' END,
+                           COALESCE({", ".join(dims)}, ''),
+                           bucket, COUNT(*)
+                    FROM (
+                        SELECT date_trunc(%s, p.created_utc)::date AS bucket,
+                               {", ".join(f"COALESCE({col(d)}, '') AS {d}" for d in dims)}
+                        FROM {table} c
+                        JOIN raw_posts p ON p.post_id = c.post_id
+                        WHERE c.is_relevant = TRUE
+                          AND p.created_utc >= %s AND p.created_utc < %s::date + INTERVAL '{step}'
+                          AND date_trunc(%s, p.created_utc)::date = ANY(%s)
+                    ) base
+                    GROUP BY GROUPING SETS ((bucket), {", ".join(f"(bucket, {d})" for d in dims)})
+                """, (track, grain, grain, min(buckets), max(buckets), grain, buckets))
+                rows += cur.rowcount
+
+                # A missing bucket counts as 0, hence SUM over a RANGE frame rather than AVG over rows
+                cur.execute(f"""
+                    UPDATE classification_trends t
+                    SET moving_avg = w.moving_avg,
+                        delta = w.count - w.previous,
+                        delta_pct = CASE WHEN w.previous > 0
+                                         THEN (w.count - w.previous) * 100.0 / w.previous END
+                    FROM (
+                        SELECT dim, val, bucket, count,
+                               (SUM(count) OVER recent / {periods}.0)::real AS moving_avg,
+                               COALESCE(SUM(count) OVER previous, 0) AS previous
+                        FROM classification_trends
+                        WHERE track = %s AND grain = %s
+                          AND bucket >= %s::date - INTERVAL '{frame}' - INTERVAL '{step}'
+                        WINDOW series AS (PARTITION BY dim, val ORDER BY bucket),
+                               recent AS (series RANGE BETWEEN INTERVAL '{frame}' PRECEDING AND CURRENT ROW),
+                               previous AS (series RANGE BETWEEN INTERVAL '{step}' PRECEDING
+                                                           AND INTERVAL '{step}' PRECEDING)
+                    ) w
+                    WHERE t.track = %s AND t.grain = %s AND t.bucket >= %s
+                      AND t.dim = w.dim AND t.val = w.val AND t.bucket = w.bucket
+                      AND (t.moving_avg, t.delta) IS DISTINCT FROM (w.moving_avg, w.count - w.previous)
+                """, (track, grain, min(buckets), track, grain, min(buckets)))
+
+            cur.execute("""
+                INSERT INTO classification_trends_state (track, classified_through)
+                VALUES (%s, %s)
+                ON CONFLICT (track) DO UPDATE SET
+                    classified_through = GREATEST(classification_trends_state.classified_through,
+                                                  EXCLUDED.classified_through),
+                    refreshed_at = NOW()
+            """, (track, touched["through"]))
+            return {"buckets": len(touched["week"]) + len(touched["month"]), "rows": rows}
+
+
+# ---- Data version ----
+
+def get_data_version() -> int:
+    """Current data_version stamp (0 before the first bump)."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("SELECT version FROM data_version WHERE id = TRUE")
+            row = cur.fetchone()
+            return row["version"] if row else 0
+
+
+def bump_data_version(phase: str) -> int:
+    """Advance the data_version stamp that invalidates the API result cache."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                INSERT INTO data_version (id, version, phase, updated_at)
+                VALUES (TRUE, 1, %s, NOW())
+                ON CONFLICT (id) DO UPDATE SET
+                    version = data_version.version + 1,
+                    phase = EXCLUDED.phase,
+                    updated_at = NOW()
+                RETURNING version
+            """, (phase,))
+            return cur.fetchone()["version"]
+
+
+# ---- Full-text search ----
+
+_HEADLINE_OPTS = 'MaxFragments=2, MaxWords=18, MinWords=6, FragmentDelimiter=" … ", StartSel=«, StopSel=»'
+
+
+def search_posts(query: str, track: str = None, filters: dict = None, limit: int = 20,
+                 comments: bool = True) -> list[dict]:
+    """Full-text search over post titles/bodies and (optionally) their comments.
+
+    `query` uses web search syntax ("quoted phrase", or, -exclude). Posts rank by
+    ts_rank_cd, with matching comments adding half their rank. `track` limits
+    hits to relevant posts of that track; `filters` ({dimension: value}) further
+    restrict by its classification columns. Each hit has a «highlighted» snippet
+    of the post and, when comments matched, of its best comment.
+    """
+    filters = filters or {}
+    if filters and not track:
+        raise ValueError("filters need a track")
+    unknown = [d for d in filters if d not in CUBE_DIMENSIONS[track]] if track else []
+    if unknown:
+        raise ValueError(f"Unknown {track} dimensions: {unknown}")
+
+    comment_hits = """
+        UNION ALL
+        SELECT cm.post_id, ts_rank_cd(cm.body_tsv, q.tsq) * 0.5
+        FROM comments cm, q WHERE cm.body_tsv @@ q.tsq
+    """ if comments else ""
+    relevant = ""
+    if track:
+        relevant = (f"JOIN {_CLASSIFICATION_TABLES[track]} c ON c.post_id = p.post_id "
+                    f"AND c.is_relevant = TRUE"
+                    + "".join(f" AND {'p' if d == 'subreddit' else 'c'}.{d} = %s" for d in filters))
+    best_comment = f"""
+        (SELECT ts_headline('english', cm.body, q.tsq, %s)
+         FROM comments cm
+         WHERE cm.post_id = top.post_id AND cm.body_tsv @@ q.tsq
+         ORDER BY ts_rank_cd(cm.body_tsv, q.tsq) DESC
+         LIMIT 1)""" if comments else "NULL"
+
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            # Headlines are computed for the final page only
+            cur.execute(f"""
+                WITH q AS (SELECT websearch_to_tsquery('english', %s) AS tsq),
+                hits AS (
+                    SELECT p.post_id, ts_rank_cd(p.search_tsv, q.tsq) AS rank
+                    FROM raw_posts p, q WHERE p.search_tsv @@ q.tsq
+                    {comment_hits}
+                ),
+                top AS (
+                    SELECT p.post_id, p.title, p.selftext, p.subreddit, p.permalink,
+                           p.score, p.created_utc, SUM(h.rank) AS rank
+                    FROM hits h
+                    JOIN raw_posts p ON p.post_id = h.post_id
+                    {relevant}
+                    GROUP BY p.post_id
+                    ORDER BY rank DESC, p.score DESC NULLS LAST
+                    LIMIT %s
+                )
+                SELECT top.post_id, top.title, top.subreddit, top.permalink, top.score,
+                       top.created_utc, top.rank,
+                       ts_headline('english', COALESCE(top.title, '') || ' | ' || COALESCE(top.selftext, ''),
+                                   q.tsq, %s) AS snippet,
+                       {best_comment} AS comment_snippet
+                FROM top, q
+                ORDER BY top.rank DESC, top.score DESC NULLS LAST
+            """, [query, *filters.values(), limit, _HEADLINE_OPTS]
+                + ([_HEADLINE_OPTS] if comments else []))
+            return cur.fetchall()
+
+
+# ---- Similar posts ----
+
+def get_similarity_candidates() -> list[dict]:
+    """The similar-posts corpus (Pass 1 relevant posts) and whether each has its comments."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT post_id, comments_fetched
+                FROM raw_posts
+                WHERE is_fraud = TRUE OR is_idv = TRUE
+                ORDER BY post_id
+            """)
+            return cur.fetchall()
+
+
+def get_similarity_texts(post_ids: list[str], comments_per_post: int = 5) -> list[dict]:
+    """Title, body, top comments (joined by newlines) and comments_fetched of each post."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT p.post_id, p.title, p.selftext, p.comments_fetched,
+                       (SELECT string_agg(t.body, E'\\n')
+                        FROM (SELECT cm.body
+                              FROM comments cm
+                              WHERE cm.post_id = p.post_id AND cm.body IS NOT NULL
+                              ORDER BY cm.is_submitter DESC, cm.score DESC NULLS LAST
+                              LIMIT %s) t) AS comments
+                FROM raw_posts p
+                WHERE p.post_id = ANY(%s)
+            """, (comments_per_post, post_ids))
+            return cur.fetchall()
+
+
+def get_post_summaries(post_ids: list[str]) -> dict[str, dict]:
+    """{post_id: title, subreddit, score, created_utc, permalink} for display."""
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute("""
+                SELECT post_id, title, subreddit, score, created_utc, permalink
+                FROM raw_posts
+                WHERE post_id = ANY(%s)
+            """, (post_ids,))
+            return {r["post_id"]: r for r in cur.fetchall()}
+
+
+# ---- Parquet export ----
+
+# Exported table -> (FROM clause with the table as t, partition timestamp, sort key).
+# Classifications are partitioned by their post's month.
+_EXPORT_SOURCES = {
+    "raw_posts": ("raw_posts t", "t.created_utc", "t.post_id"),
+    "comments": ("comments t", "t.created_utc", "t.comment_id"),
+    "fraud_classifications": ("fraud_classifications t JOIN raw_posts p ON p.post_id = t.post_id",
+                              "p.created_utc", "t.post_id"),
+    "idv_classifications": ("idv_classifications t JOIN raw_posts p ON p.post_id = t.post_id",
+                            "p.created_utc", "t.post_id"),
+}
+
+
+def _export_month(table: str) -> str:
+    return f"COALESCE(to_char({_EXPORT_SOURCES[table][1]}, 'YYYY-MM'), 'unknown')"
+
+
+def get_export_partitions(table: str, columns: list[str], watermark: str) -> list[dict]:
+    """Per partition month: rows, a fingerprint of the exported columns and the latest `watermark`.
+
+    The fingerprint is the row count plus a sum of per-row hashes, so any
+    insert, update or delete in the month changes it, whatever the row order.
+    """
+    source = _EXPORT_SOURCES[table][0]
+    row = ", ".join(f"t.{c}" for c in columns)
+    with get_conn() as conn:
+        with get_cursor(conn) as cur:
+            cur.execute(f"""
+                SELECT {_export_month(table)} AS month,
+                       COUNT(*) AS rows,
+                       COUNT(*) || ':' || SUM(('x' || LEFT(md5(ROW({row})::text), 15))::bit(60)::bigint)
+                           AS fingerprint,
+                       MAX(t.{watermark}) AS watermark
+                FROM {source}
+                GROUP BY 1
+                ORDER BY 1
+            """)
+            return cur.fetchall()
+
+
+def iter_export_rows(table: str, columns: list[str], months: list[str], batch_size: int = 10000):
+    """Yield batches of rows in the given partition months, ordered by month.
+
+    Reads through a server-side cursor, so memory holds one batch however
+    large the table. Each row also carries its partition as "month".
+    """
+    source, _, key = _EXPORT_SOURCES[table]
+    with get_conn() as conn:
+        with conn.cursor(name=f"export_{table}", cursor_factory=extras.RealDictCursor) as cur:
+            cur.itersize = batch_size
+            cur.execute(f"""
+                SELECT {_export_month(table)} AS month, {", ".join(f"t.{c}" for c in columns)}
+                FROM {source}
+                WHERE {_export_month(table)} = ANY(%s)
+                ORDER BY 1, {key}
+            """, (months,))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
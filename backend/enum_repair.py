@@ -0,0 +1,393 @@
+"""Local repair of near-miss Pass 2 output so validation failures don't cost another LLM call.
+
+Most ValidationErrors from DeepSeek are a single enum value that is a synonym,
+a plural, or a near-miss spelling of an allowed Literal. This module fixes
+those locally, in order:
+
+    1. normalization (case, spaces, hyphens, slashes)
+    2. per-field alias tables (known synonyms → allowed value)
+    3. plural and generic-suffix stripping ("selfies", "phishing_scam")
+    4. fuzzy match to the nearest allowed value or alias (difflib, FUZZY_CUTOFF),
+       only when it beats the runner-up value by FUZZY_MARGIN
+
+Ordinal fields (ORDINAL_FIELDS: loss_bracket) stop after step 2: a near-miss
+spelling of a bracket is usually a different amount ("over_10k" is closest to
+"over_100k"), so those go back to the LLM instead.
+
+It also coerces tags into a clean list, drops unexpected extra keys, and
+stringifies freeform fields. Every repair is logged and counted per field so
+the alias tables can be tuned; anything still invalid is left for the caller
+to re-request from the LLM.
+"""
+
+import difflib
+import threading
+from collections import Counter
+from typing import Literal, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from backend.utils import setup_logger
+
+log = setup_logger("enum_repair")
+
+FUZZY_CUTOFF = 0.8
+FUZZY_MARGIN = 0.1
+ORDINAL_FIELDS = {"loss_bracket"}
+MAX_TAGS = 5
+MIN_TAGS = 2
+
+# Words LLMs append to enum values ("phishing_scam", "payment_fraud_case")
+GENERIC_SUFFIXES = ("_scams", "_scam", "_fraud", "_attack", "_case", "_issue", "_issues")
+
+# Known LLM synonyms per field, keyed by the normalized (lowercase, underscored) value.
+FIELD_ALIASES = {
+    "fraud_type": {
+        "identity_fraud": "identity_theft",
+        "stolen_identity": "identity_theft",
+        "familial_fraud": "identity_theft",
+        "account_hijacking": "account_takeover",
+        "account_compromise": "account_takeover",
+        "hacked_account": "account_takeover",
+        "smishing": "phishing",
+        "vishing": "phishing",
+        "spear_phishing": "phishing",
+        "catfishing": "romance_scam",
+        "pig_butchering": "investment_scam",
+        "crypto_scam": "investment_scam",
+        "ponzi_scheme": "investment_scam",
+        "job_scam": "employment_scam",
+        "fake_job": "employment_scam",
+        "credit_card_fraud": "payment_fraud",
+        "card_fraud": "payment_fraud",
+        "check_fraud": "payment_fraud",
+        "shopping_scam": "payment_fraud",
+        "refund_scam": "payment_fraud",
+        "deepfake": "deepfake_ai",
+        "ai_voice_cloning": "deepfake_ai",
+        "sim_swapping": "sim_swap",
+        "port_out_fraud": "sim_swap",
+        "breach": "data_breach",
+        "impersonation": "business_impersonation",
+        "tech_support_scam": "business_impersonation",
+        "government_impersonation": "business_impersonation",
+        "fake_id": "document_forgery",
+        "forgery": "document_forgery",
+    },
+    "industry": {
+        "bank": "banking",
+        "credit_union": "banking",
+        "payments": "fintech",
+        "payment_app": "fintech",
+        "cryptocurrency": "crypto",
+        "e_commerce": "ecommerce",
+        "online_shopping": "ecommerce",
+        "marketplace": "ecommerce",
+        "retail": "ecommerce",
+        "social_network": "social_media",
+        "gig": "gig_economy",
+        "rideshare": "gig_economy",
+        "delivery": "gig_economy",
+        "gov": "government",
+        "public_sector": "government",
+        "telecommunications": "telecom",
+        "housing": "real_estate",
+        "rental": "real_estate",
+        "gambling": "gaming",
+        "online_dating": "dating",
+    },
+    "loss_bracket": {
+        "unknown": "unspecified",
+        "not_specified": "unspecified",
+        "not_mentioned": "unspecified",
+        "n_a": "unspecified",
+        "no_loss": "none",
+        "zero": "none",
+        "0": "none",
+        "less_than_100": "under_100",
+        "100_1k": "100_to_1k",
+        "1k_10k": "1k_to_10k",
+        "10k_100k": "10k_to_100k",
+        "100_to_1000": "100_to_1k",
+        "1000_to_10000": "1k_to_10k",
+        "10000_to_100000": "10k_to_100k",
+        "more_than_100k": "over_100k",
+        "over_100000": "over_100k",
+        "100k+": "over_100k",
+    },
+    "channel": {
+        "phone_call": "phone",
+        "call": "phone",
+        "voice": "phone",
+        "text": "sms",
+        "text_message": "sms",
+        "whatsapp": "messaging_app",
+        "telegram": "messaging_app",
+        "discord": "messaging_app",
+        "web": "website",
+        "online": "website",
+        "mobile_app": "app",
+        "application": "app",
+        "postal_mail": "mail",
+        "letter": "mail",
+        "face_to_face": "in_person",
+    },
+    "verification_type": {
+        "selfie": "selfie_photo",
+        "face_match": "selfie_photo",
+        "id_upload": "document_upload",
+        "document": "document_upload",
+        "id_scan": "document_upload",
+        "age_estimation": "facial_age_estimation",
+        "liveness": "liveness_check",
+        "video_selfie": "liveness_check",
+        "kba": "knowledge_based",
+        "security_questions": "knowledge_based",
+        "ssn_check": "database_lookup",
+        "phone": "phone_verification",
+        "sms_verification": "phone_verification",
+        "not_specified": "unknown",
+    },
+    "friction_type": {
+        "unknown": "other",
+        "rejection": "false_rejection",
+        "delay": "too_slow",
+        "slow": "too_slow",
+        "reverification": "excessive_reverification",
+        "repeated_verification": "excessive_reverification",
+        "privacy": "privacy_concern",
+        "accessibility": "accessibility_issue",
+        "mismatch": "info_mismatch",
+        "name_mismatch": "info_mismatch",
+        "no_alternative": "no_alternative_method",
+        "no_recourse": "no_alternative_method",
+        "geo_restriction": "country_restriction",
+        "country_not_supported": "country_restriction",
+        "bug": "technical_failure",
+        "technical_issue": "technical_failure",
+        "no_friction": "none",
+    },
+    "trigger_reason": {
+        "info_mismatch": "unknown",
+        "other": "unknown",
+        "none": "unknown",
+        "signup": "new_account",
+        "onboarding": "new_account",
+        "registration": "new_account",
+        "age_verification": "age_gate",
+        "account_locked": "account_recovery",
+        "recovery": "account_recovery",
+        "random": "periodic_recheck",
+        "reverification": "periodic_recheck",
+        "fraud_flag": "suspicious_activity",
+        "withdrawal": "transaction",
+        "cashout": "transaction",
+        "payment": "transaction",
+        "new_policy": "policy_change",
+        "regulation": "policy_change",
+        "expired_id": "document_update",
+        "new_device": "new_device_location",
+        "login_location": "new_device_location",
+    },
+    "sentiment": {
+        "frustrated": "negative",
+        "angry": "negative",
+        "happy": "positive",
+        "both": "mixed",
+        "ambivalent": "mixed",
+    },
+}
+
+_lock = threading.Lock()
+_outputs = Counter()        # model name -> outputs that reached validation
+_repaired = Counter()       # (model name, field) -> successful repairs
+_unrepairable = Counter()   # (model name, field) -> errors left for an LLM retry
+
+
+def _normalize(value) -> str:
+    return str(value).strip().lower().replace(" ", "_").replace("-", "_").replace("/", "_")
+
+
+def _allowed_values(model_cls: type[BaseModel], field: str) -> tuple[str, ...] | None:
+    info = model_cls.model_fields.get(field)
+    if info is None or get_origin(info.annotation) is not Literal:
+        return None
+    return get_args(info.annotation)
+
+
+def _repair_enum(field: str, value, allowed: tuple[str, ...]) -> tuple[str, str] | None:
+    """Map a bad enum value to an allowed one. Returns (value, method) or None."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+
+    aliases = FIELD_ALIASES.get(field, {})
+    norm = _normalize(value)
+    if norm in allowed:
+        return norm, "normalized"
+    if aliases.get(norm) in allowed:
+        return aliases[norm], "alias"
+    if field in ORDINAL_FIELDS:
+        return None
+
+    # Plurals and generic suffixes ("selfies", "phishing_scam")
+    for suffix, method in (("s", "plural"), *((s, "suffix") for s in GENERIC_SUFFIXES)):
+        if norm.endswith(suffix) and len(norm) > len(suffix) + 1:
+            stem = norm[: -len(suffix)]
+            if stem in allowed:
+                return stem, method
+            if aliases.get(stem) in allowed:
+                return aliases[stem], method
+
+    # Near-miss spellings of either an allowed value or a known alias, scored per
+    # target value; a near tie between two values is ambiguous and left to the LLM
+    scores = {}
+    for candidate in [*allowed, *(a for a in aliases if aliases[a] in allowed)]:
+        target = candidate if candidate in allowed else aliases[candidate]
+        ratio = difflib.SequenceMatcher(None, norm, candidate).ratio()
+        scores[target] = max(scores.get(target, 0.0), ratio)
+    ranked = sorted(scores.values(), reverse=True) + [0.0]
+    best = max(scores, key=scores.get)
+    if ranked[0] >= FUZZY_CUTOFF and ranked[0] - ranked[1] >= FUZZY_MARGIN:
+        return best, "fuzzy"
+
+    return None
+
+
+def _coerce_tags(value) -> list[str] | None:
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    if not isinstance(value, list):
+        return None
+
+    tags = []
+    for t in value:
+        if t is None:
+            continue
+        tag = _normalize(t).strip("_#")
+        if tag and tag not in tags:
+            tags.append(tag)
+    tags = tags[:MAX_TAGS]
+    return tags if len(tags) >= MIN_TAGS else None
+
+
+def _coerce_text(value) -> str | None:
+    if isinstance(value, list):
+        value = " ".join(str(v) for v in value if v)
+    if isinstance(value, (int, float)):
+        value = str(value)
+    return value if isinstance(value, str) else None
+
+
+def repair_output(model_cls: type[BaseModel], data: dict, errors: list[dict],
+                  post_id: str = None) -> dict | None:
+    """Try to fix the fields named in `errors` locally.
+
+    Returns the validated, dumped model on success, or None if any error could
+    not be repaired (the caller should then re-request from the LLM).
+    """
+    name = model_cls.__name__
+    fixed = dict(data)
+    repairs = []
+    failed_fields = []
+
+    for err in errors:
+        field = err["loc"][0] if err.get("loc") else None
+        if not isinstance(field, str):
+            failed_fields.append(str(field))
+            continue
+
+        if err["type"] == "extra_forbidden":
+            fixed.pop(field, None)
+            repairs.append((field, data.get(field), None, "dropped_extra"))
+            continue
+
+        if field not in fixed:
+            failed_fields.append(field)
+            continue
+
+        value = fixed[field]
+        allowed = _allowed_values(model_cls, field)
+
+        if allowed is not None:
+            result = _repair_enum(field, value, allowed)
+            if result:
+                fixed[field] = result[0]
+                repairs.append((field, value, result[0], result[1]))
+                continue
+        elif field == "tags":
+            tags = _coerce_tags(value)
+            if tags is not None:
+                fixed[field] = tags
+                repairs.append((field, value, tags, "coerced"))
+                continue
+        elif field in ("notable_quote", "platform_name"):
+            text = _coerce_text(value)
+            if text is not None:
+                fixed[field] = text
+                repairs.append((field, value, text, "coerced"))
+                continue
+
+        failed_fields.append(field)
+
+    with _lock:
+        for field in failed_fields:
+            _unrepairable[(name, field)] += 1
+
+    if failed_fields:
+        return None
+
+    try:
+        validated = model_cls(**fixed)
+    except ValidationError as e:
+        with _lock:
+            for err in e.errors():
+                _unrepairable[(name, str(err["loc"][0]) if err.get("loc") else "?")] += 1
+        return None
+
+    with _lock:
+        for field, _, _, _ in repairs:
+            _repaired[(name, field)] += 1
+    for field, before, after, method in repairs:
+        log.info(f"[{name}] post {post_id}: repaired {field} {before!r} -> {after!r} ({method})")
+
+    return validated.model_dump()
+
+
+def record_output(model_cls: type[BaseModel]):
+    """Count an LLM output that reached validation (denominator for repair rates)."""
+    with _lock:
+        _outputs[model_cls.__name__] += 1
+
+
+def repair_stats() -> dict:
+    """Per-model, per-field repair and unrepairable counts plus rates."""
+    with _lock:
+        outputs = dict(_outputs)
+        repaired = dict(_repaired)
+        unrepairable = dict(_unrepairable)
+
+    stats = {}
+    for name, total in outputs.items():
+        fields = {f for (n, f) in list(repaired) + list(unrepairable) if n == name}
+        stats[name] = {
+            "outputs": total,
+            "fields": {
+                f: {
+                    "repaired": repaired.get((name, f), 0),
+                    "unrepairable": unrepairable.get((name, f), 0),
+                    "repair_rate": repaired.get((name, f), 0) / total if total else 0.0,
+                }
+                for f in sorted(fields)
+            },
+        }
+    return stats
+
+
+def print_repair_stats():
+    for name, s in repair_stats().items():
+        if not s["fields"]:
+            continue
+        print(f"Repairs ({name}, {s['outputs']} outputs validated):")
+        for field, c in s["fields"].items():
+            print(f"  {field:<20} {c['repaired']:>5} repaired ({c['repair_rate']*100:.1f}%) | "
+                  f"{c['unrepairable']} unrepairable")
@@ -0,0 +1,81 @@
+"""Retry scheduling and dead-lettering for posts that fail classification or comment fetch.
+
+Every failed post gets a row in post_failures per track (refilter, fraud, idv,
+dual, comments) with its error class and attempt count. It is skipped by the
+work queries until next_eligible_at, which backs off exponentially from
+BASE_BACKOFF_MINUTES up to MAX_BACKOFF_HOURS. After MAX_ATTEMPTS failures the
+post is dead-lettered and never picked up again until requeued by hand.
+Success on a later attempt deletes the row.
+
+Usage:
+    python -m backend.pipeline failures                      # Summary + dead letters
+    python -m backend.pipeline failures --track fraud        # One track
+    python -m backend.pipeline failures-requeue --track fraud             # All dead fraud posts
+    python -m backend.pipeline failures-requeue --post-id abc --post-id def
+"""
+
+from backend.db import (
+    record_post_failures, clear_post_failures, get_post_failures,
+    get_post_failure_summary, requeue_post_failures,
+)
+from backend.utils import setup_logger
+
+log = setup_logger("failures")
+
+BASE_BACKOFF_MINUTES = 15
+MAX_BACKOFF_HOURS = 24
+MAX_ATTEMPTS = 5
+
+
+def record_failures(track: str, failures: list[tuple[str, str, str]]):
+    """Record (post_id, error_class, message) failures; logs posts that just went dead."""
+    if not failures:
+        return
+    try:
+        rows = record_post_failures(track, failures, BASE_BACKOFF_MINUTES,
+                                    MAX_BACKOFF_HOURS, MAX_ATTEMPTS)
+    except Exception as e:
+        log.error(f"Could not record {len(failures)} {track} failures: {e}")
+        return
+    for row in rows:
+        if row["dead"]:
+            log.warning(f"[{track}] post {row['post_id']} dead-lettered after "
+                        f"{row['attempts']} attempts")
+
+
+def clear_failures(track: str, post_ids: list[str]):
+    if not post_ids:
+        return
+    try:
+        clear_post_failures(track, post_ids)
+    except Exception as e:
+        log.error(f"Could not clear {track} failures: {e}")
+
+
+def print_failures(track: str = None, limit: int = 50):
+    summary = get_post_failure_summary()
+    if not summary:
+        log.info("No recorded failures.")
+        return
+
+    log.info(f"{'Track':<10} {'Error class':<28} {'Dead':>6} {'Backoff':>8} {'Eligible':>9}")
+    for row in summary:
+        if track and row["track"] != track:
+            continue
+        log.info(f"{row['track']:<10} {row['error_class']:<28} {row['dead']:>6} "
+                 f"{row['backing_off']:>8} {row['eligible']:>9}")
+
+    dead = get_post_failures(track, dead_only=True, limit=limit)
+    if dead:
+        log.info(f"Dead letters (latest {len(dead)}):")
+        for row in dead:
+            log.info(f"  [{row['track']}] {row['post_id']} r/{row['subreddit']} "
+                     f"{row['attempts']} attempts, {row['error_class']}: "
+                     f"{(row['last_error'] or '')[:80]} | {row['title']}")
+
+
+def requeue(track: str = None, post_ids: list[str] = None):
+    """Requeue dead letters (or specific posts, dead or backing off) for the next run."""
+    count = requeue_post_failures(track, post_ids, dead_only=not post_ids)
+    log.info(f"Requeued {count} posts")
+    return count
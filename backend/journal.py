@@ -0,0 +1,251 @@
+"""Append-only local journal of paid LLM results, written before the DB write.
+
+If Postgres is unreachable or the process is killed mid-run, every validated
+Pass 1 verdict and Pass 2 classification is still on disk and can be loaded
+later with `python -m backend.pipeline journal-replay` instead of being paid
+for again.
+
+Layout (JOURNAL_DIR, default ./journal):
+    results-<start>-<pid>-<n>.jsonl   one segment per process, rotated by size
+    applied.log                       ids of entries known to be in the DB
+
+Appends are buffered and fsynced every FSYNC_EVERY entries or FSYNC_INTERVAL
+seconds, whichever comes first, so a crash loses at most that window. The
+applied log is only an optimization: replay re-checks the DB and never
+overwrites a newer row, so re-applying an entry is harmless.
+
+Usage:
+    python -m backend.pipeline journal-replay            # Load unapplied entries
+    python -m backend.pipeline journal-replay --dry-run  # Count them only
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from backend.utils import setup_logger
+
+log = setup_logger("journal")
+
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")
+FSYNC_EVERY = 50
+FSYNC_INTERVAL = 2.0
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+APPLIED_LOG = "applied.log"
+
+
+class ResultJournal:
+    """Thread-safe appender for one process's journal segments."""
+
+    def __init__(self, directory: str = JOURNAL_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._applied = open(os.path.join(directory, APPLIED_LOG), "a", encoding="utf-8")
+        self._pending = 0
+        self._last_sync = time.time()
+        self._open_segment()
+
+    def _open_segment(self):
+        if self._segment:
+            self._sync(self._segment)
+            self._segment.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(self.directory, f"results-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.jsonl")
+        self._segment = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _sync(f):
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _maybe_sync(self, force: bool = False):
+        if force or self._pending >= FSYNC_EVERY or time.time() - self._last_sync >= FSYNC_INTERVAL:
+            self._sync(self._segment)
+            self._sync(self._applied)
+            self._pending = 0
+            self._last_sync = time.time()
+
+    def append(self, kind: str, track: str, post_id: str, result: dict, **meta) -> str:
+        """Record one validated result. Returns the entry id to pass to mark_applied()."""
+        entry = {
+            "id": uuid.uuid4().hex,
+            "ts": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+            "kind": kind,
+            "track": track,
+            "post_id": post_id,
+            "result": result,
+            **meta,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self._segment.write(line)
+            self._pending += 1
+            self._maybe_sync()
+            if self._segment.tell() >= SEGMENT_MAX_BYTES:
+                self._open_segment()
+        return entry["id"]
+
+    def mark_applied(self, entry_ids: list[str]):
+        ids = [i for i in entry_ids if i]
+        if not ids:
+            return
+        with self._lock:
+            self._applied.write("".join(f"{i}\n" for i in ids))
+            self._maybe_sync()
+
+    def close(self):
+        with self._lock:
+            self._maybe_sync(force=True)
+            self._segment.close()
+            self._applied.close()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> ResultJournal:
+    """Process-wide journal, opened on first use."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = ResultJournal()
+            atexit.register(close_journal)
+        return _journal
+
+
+def close_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is not None:
+            _journal.close()
+            _journal = None
+
+
+# ============================================================
+# Replay
+# ============================================================
+
+def _segments(directory: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(directory, "results-*.jsonl")))
+
+
+def _applied_ids(directory: str) -> set[str]:
+    path = os.path.join(directory, APPLIED_LOG)
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def pending_entries(directory: str = JOURNAL_DIR) -> list[dict]:
+    """Unapplied entries across all segments, oldest first.
+
+    A torn final line (crash mid-write) is skipped.
+    """
+    applied = _applied_ids(directory)
+    entries = []
+    for path in _segments(directory):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    log.warning(f"Skipping torn journal line in {os.path.basename(path)}")
+                    continue
+                if entry["id"] not in applied:
+                    entries.append(entry)
+    entries.sort(key=lambda e: e["ts"])
+    return entries
+
+
+def replay(directory: str = JOURNAL_DIR, dry_run: bool = False, batch_size: int = 500) -> dict:
+    """Bulk-load unapplied journal entries into the DB.
+
+    Entries are applied oldest first, per (kind, track), in batches. Rows that
+    already hold a newer result are left alone; Pass 1 verdicts only fill posts
+    that are still unrefiltered. Fully applied segments are deleted afterwards.
+    """
+    from backend.db import apply_journaled_classifications, apply_journaled_refilters
+
+    entries = pending_entries(directory)
+    groups = defaultdict(list)
+    for e in entries:
+        groups[(e["kind"], e["track"])].append(e)
+
+    log.info(f"Journal: {len(entries)} unapplied entries in {len(_segments(directory))} segments")
+    for (kind, track), items in sorted(groups.items()):
+        log.info(f"  {kind}/{track}: {len(items)}")
+
+    stats = {"pending": len(entries), "applied": 0, "skipped": 0}
+    if dry_run or not entries:
+        return stats
+
+    journal = ResultJournal(directory)
+    try:
+        for (kind, track), items in sorted(groups.items()):
+            for i in range(0, len(items), batch_size):
+                batch = items[i:i + batch_size]
+                if kind == "pass1":
+                    applied = apply_journaled_refilters(batch)
+                else:
+                    applied = apply_journaled_classifications(track, batch)
+                stats["applied"] += applied
+                stats["skipped"] += len(batch) - applied
+                journal.mark_applied([e["id"] for e in batch])
+    finally:
+        journal.close()
+
+    removed = compact(directory)
+    log.info(f"Replay done: {stats['applied']} written, {stats['skipped']} already superseded, "
+             f"{removed} segments removed")
+    return stats
+
+
+def _writer_alive(path: str) -> bool:
+    """Whether the process that created a segment (pid in its name) is still running."""
+    try:
+        pid = int(os.path.basename(path).split("-")[2])
+    except (IndexError, ValueError):
+        return False
+    if pid == os.getpid():
+        return _journal is not None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def compact(directory: str = JOURNAL_DIR) -> int:
+    """Delete segments whose entries are all applied. Returns segments removed.
+
+    Segments that belong to a process that is still running are left alone,
+    since it may still be appending to them.
+    """
+    applied = _applied_ids(directory)
+    removed = 0
+    for path in _segments(directory):
+        if _writer_alive(path):
+            continue
+        ids = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ids.append(json.loads(line)["id"])
+                except json.JSONDecodeError:
+                    continue  # torn write; never replayable
+        if all(i in applied for i in ids):
+            os.remove(path)
+            removed += 1
+    return removed
@@ -79,32 +79,27 @@ def _extract_json(text: str) -> str | None:
 
 
 # ============================================================
-# Pass 1 Client: GPT-OSS-120B (structured JSON output)
+# Request Bodies (shared with the offline batch files, see batch_files.py)
 # ============================================================
 
-def call_llm(system_prompt: str, user_prompt: str, model: str = None,
-             temperature: float = None, max_tokens: int = None,
-             json_schema: dict = None,
-             reasoning_effort: str = None) -> dict | None:
-    """Call OpenRouter with json_schema structured output and return parsed JSON.
-
-    Used by Pass 1 for boolean routing (is_fraud / is_idv).
-    """
-    model = model or PASS1_MODEL
-    temperature = temperature if temperature is not None else LLM_TEMPERATURE
-
-    headers = {
+def _headers() -> dict:
+    return {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
     }
 
+
+def build_llm_body(system_prompt: str, user_prompt: str, model: str = None,
+                   temperature: float = None, max_tokens: int = None,
+                   json_schema: dict = None, reasoning_effort: str = None) -> dict:
+    """Chat completion body for Pass 1 (json_schema structured output)."""
     body = {
-        "model": model,
+        "model": model or PASS1_MODEL,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        "temperature": temperature,
+        "temperature": temperature if temperature is not None else LLM_TEMPERATURE,
     }
 
     if max_tokens is not None:
@@ -119,14 +114,93 @@ def call_llm(system_prompt: str, user_prompt: str, model: str = None,
     if reasoning_effort:
         body["reasoning"] = {"effort": reasoning_effort}
 
+    return body
+
+
+def build_deepseek_body(system_prompt: str, user_prompt: str, reasoning: str = None) -> dict:
+    """Chat completion body for Pass 2 (json_object output, DeepSeek provider only)."""
+    body = {
+        "model": PASS2_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.1,
+        "provider": {
+            "order": ["DeepSeek"],
+            "allow_fallbacks": False,
+        },
+    }
+
+    if reasoning:
+        body["reasoning"] = {"effort": reasoning}
+
+    return body
+
+
+def send_chat_request(body: dict, timeout: float = DEEPSEEK_TIMEOUT,
+                      max_retries: int = DEEPSEEK_MAX_RETRIES) -> tuple[int, dict | None, str | None]:
+    """POST a prebuilt body, retrying 429s, 5xx and timeouts.
+
+    Returns (status_code, response JSON, error). status_code is 0 when no
+    response was received. Content is not parsed; that is the caller's job.
+    """
+    status, error = 0, None
+    for attempt in range(1, max_retries + 1):
+        try:
+            resp = httpx.post(OPENROUTER_BASE_URL, headers=_headers(), json=body, timeout=timeout)
+            status = resp.status_code
+            if status == 200:
+                return status, resp.json(), None
+            error = resp.text[:300]
+            if status == 429 or status >= 500:
+                time.sleep(min(2 ** attempt * 3, 30))
+                continue
+            return status, None, error
+        except httpx.TimeoutException:
+            error = "timeout"
+            time.sleep(3 * attempt)
+        except Exception as e:
+            error = str(e)
+            time.sleep(2 * attempt)
+    return status, None, error
+
+
+# ============================================================
+# Pass 1 Client: GPT-OSS-120B (structured JSON output)
+# ============================================================
+
+def call_llm(system_prompt: str, user_prompt: str, model: str = None,
+             temperature: float = None, max_tokens: int = None,
+             json_schema: dict = None,
+             reasoning_effort: str = None,
+             usage: dict = None) -> dict | None:
+    """Call OpenRouter with json_schema structured output and return parsed JSON.
+
+    Used by Pass 1 for boolean routing (is_fraud / is_idv). If `usage` is a
+    dict, it is filled with token counts, OpenRouter's reported cost, and
+    wall-clock latency summed over all attempts.
+    """
+    headers = _headers()
+    body = build_llm_body(system_prompt, user_prompt, model, temperature, max_tokens,
+                          json_schema, reasoning_effort)
+
+    if usage is not None:
+        body["usage"] = {"include": True}
+        usage.update({"prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "latency": 0.0})
+
     for attempt in range(1, LLM_MAX_RETRIES + 1):
         try:
+            start = time.time()
             resp = httpx.post(
                 OPENROUTER_BASE_URL,
                 headers=headers,
                 json=body,
                 timeout=30.0,
             )
+            if usage is not None:
+                usage["latency"] += time.time() - start
 
             if resp.status_code == 429:
                 wait = min(2 ** attempt * 5, 60)
@@ -142,6 +216,11 @@ def call_llm(system_prompt: str, user_prompt: str, model: str = None,
                 return None
 
             data = resp.json()
+            if usage is not None:
+                reported = data.get("usage") or {}
+                usage["prompt_tokens"] += reported.get("prompt_tokens") or 0
+                usage["completion_tokens"] += reported.get("completion_tokens") or 0
+                usage["cost"] += reported.get("cost") or 0.0
             content = data["choices"][0]["message"].get("content") or ""
 
             if not content.strip():
@@ -189,27 +268,8 @@ def call_deepseek(system_prompt: str, user_prompt: str,
     Used by Pass 2 for deep classification (fraud type, IDV friction, etc.).
     Uses json_object response format with DeepSeek provider routing.
     """
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    body = {
-        "model": PASS2_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "response_format": {"type": "json_object"},
-        "temperature": 0.1,
-        "provider": {
-            "order": ["DeepSeek"],
-            "allow_fallbacks": False,
-        },
-    }
-
-    if reasoning:
-        body["reasoning"] = {"effort": reasoning}
+    headers = _headers()
+    body = build_deepseek_body(system_prompt, user_prompt, reasoning)
 
     for attempt in range(1, DEEPSEEK_MAX_RETRIES + 1):
         try:
@@ -0,0 +1,97 @@
+"""Refresh score / num_comments / upvote_ratio for collected posts via /api/info.
+
+These metrics are frozen at collection time, but they drive the ordering of
+Pass 2, the comment queue and the dashboard. Re-running collection tiers to
+update them costs one request per listing page and most of those posts are
+irrelevant. Instead, /api/info.json takes up to 100 fullnames (t3_...) per
+request, so keeping 50k posts fresh takes about 500 requests.
+
+Posts are re-checked on an age-based interval: hourly for the first two days,
+every 6 hours for the first week, daily up to 30 days, then weekly. Due posts
+are refreshed most-active-and-recent first. Posts Pass 1 ruled out are skipped.
+
+Usage:
+    python -m backend.pipeline refresh-metadata               # Up to --limit posts (default 10000)
+    python -m backend.pipeline refresh-metadata --limit 50000
+"""
+
+import time
+
+from backend.config import REDDIT_BASE_URL, REDDIT_REQUEST_DELAY
+from backend.db import (
+    get_posts_due_for_refresh, count_posts_due_for_refresh,
+    update_post_metadata_batch, start_run, finish_run,
+)
+from backend.reddit_collector import _reddit_get
+from backend.utils import setup_logger
+
+log = setup_logger("metadata_refresh")
+
+INFO_BATCH_SIZE = 100  # /api/info accepts at most 100 ids per request
+
+
+def fetch_info(fullnames: list[str]) -> list[dict] | None:
+    """Current metrics for up to 100 posts. None on API failure."""
+    data = _reddit_get(f"{REDDIT_BASE_URL}/api/info.json",
+                       params={"id": ",".join(fullnames), "raw_json": 1})
+    if data is None or "data" not in data:
+        return None
+
+    posts = []
+    for child in data["data"].get("children", []):
+        if child.get("kind") != "t3":
+            continue
+        d = child["data"]
+        posts.append({
+            "post_id": d["id"],
+            "score": d.get("score", 0),
+            "num_comments": d.get("num_comments", 0),
+            "upvote_ratio": d.get("upvote_ratio"),
+        })
+    return posts
+
+
+def run_refresh(limit: int = 10000):
+    """Refresh up to `limit` due posts, INFO_BATCH_SIZE per request."""
+    due = count_posts_due_for_refresh()
+    target = min(due, limit)
+    log.info(f"{due} posts due for a metadata refresh; refreshing up to {target} "
+             f"(~{-(-target // INFO_BATCH_SIZE)} requests)")
+    if target == 0:
+        return 0
+
+    run_id = start_run("metadata_refresh", "api_info", {"limit": limit, "due": due})
+
+    requests = refreshed = changed = missing = failed = 0
+    start = time.time()
+
+    while refreshed < target:
+        batch = get_posts_due_for_refresh(min(INFO_BATCH_SIZE, target - refreshed))
+        if not batch:
+            break
+
+        posts = fetch_info([p["post_fullname"] for p in batch])
+        requests += 1
+        if posts is None:
+            failed += 1
+            if failed >= 5:
+                log.error("Five failed /api/info requests; stopping. Rerun to resume.")
+                break
+            time.sleep(5)
+            continue
+
+        changed += update_post_metadata_batch(posts, [p["post_id"] for p in batch])
+        missing += len(batch) - len(posts)
+        refreshed += len(batch)
+
+        if requests % 20 == 0:
+            log.info(f"Progress: {refreshed}/{target} posts | {requests} requests | "
+                     f"{changed} changed | {missing} no longer returned")
+
+        time.sleep(REDDIT_REQUEST_DELAY)
+
+    finish_run(run_id, refreshed, refreshed - missing, failed)
+    log.info(f"Metadata refresh complete: {refreshed} posts in {requests} requests "
+             f"({refreshed / requests if requests else 0:.0f} posts/request, "
+             f"{time.time() - start:.0f}s) | {changed} changed | {missing} no longer returned")
+    return refreshed
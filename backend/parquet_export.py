@@ -0,0 +1,239 @@
+"""Columnar export of the corpus for local analytics (DuckDB, Polars, pandas).
+
+Ad-hoc analysis against Neon competes with the dashboard for compute. This
+phase copies raw_posts, comments and both classification tables into
+month-partitioned, zstd-compressed Parquet:
+
+    parquet/<table>/month=YYYY-MM/data.parquet   hive-style; rows without a date go in month=unknown
+    parquet/manifest.json
+
+Posts and comments are partitioned by their created_utc, classifications by
+their post's. Tags become list<string> columns. Full-text search vectors are
+left out.
+
+Re-runs are incremental. One aggregate query per table fingerprints every
+month (row count plus a sum of per-row hashes). Only months whose fingerprint
+differs from the manifest are streamed, through a server-side cursor, and
+rewritten. A day of collection therefore rewrites the current month, plus any
+months that reclassification or a metadata refresh touched. Each file is
+written beside the old one and swapped in. Months that no longer have rows are
+deleted. The manifest records, per table and per partition, the row count, the
+fingerprint and the watermark: the latest collected_at / classified_at exported.
+
+Needs pyarrow; the other phases do not.
+
+Usage:
+    python -m backend.pipeline export-parquet              # Rewrite changed partitions
+    python -m backend.pipeline export-parquet --rebuild    # Rewrite every partition
+
+    duckdb -c "SELECT month, COUNT(*) FROM read_parquet('parquet/raw_posts/*/*.parquet',
+               hive_partitioning = true) GROUP BY 1 ORDER BY 1"
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only export-parquet needs it
+    pa = pq = None
+
+from backend.cube import tag_list
+from backend.db import get_export_partitions, iter_export_rows
+from backend.utils import setup_logger
+
+log = setup_logger("parquet_export")
+
+EXPORT_DIR = "parquet"
+MANIFEST_FILE = "manifest.json"
+DATA_FILE = "data.parquet"
+ROW_GROUP_ROWS = 100_000
+COMPRESSION = "zstd"
+
+_POST_COLUMNS = [
+    ("post_id", "string"), ("post_fullname", "string"),
+    ("title", "string"), ("selftext", "string"), ("url", "string"),
+    ("subreddit", "string"), ("author", "string"), ("score", "int"), ("upvote_ratio", "real"),
+    ("num_comments", "int"), ("created_utc", "timestamp"), ("permalink", "string"),
+    ("is_self", "bool"), ("over_18", "bool"), ("link_flair_text", "string"),
+    ("stickied", "bool"), ("locked", "bool"),
+    ("collection_source", "string"), ("search_query", "string"),
+    ("collected_at", "timestamp"), ("metadata_refreshed_at", "timestamp"),
+    ("pre_filtered_out", "bool"), ("pre_filter_reason", "string"),
+    ("is_fraud", "bool"), ("is_idv", "bool"), ("refilter_confidence", "real"),
+    ("refilter_tier", "string"), ("refilter_done", "bool"), ("comments_fetched", "bool"),
+]
+
+_COMMENT_COLUMNS = [
+    ("comment_id", "string"), ("post_id", "string"),
+    ("body", "string"), ("author", "string"), ("score", "int"), ("created_utc", "timestamp"),
+    ("parent_id", "string"), ("is_submitter", "bool"), ("depth", "int"),
+    ("permalink", "string"), ("stickied", "bool"), ("distinguished", "string"),
+    ("collected_at", "timestamp"),
+]
+
+_CLASSIFICATION_META = [
+    ("notable_quote", "string"), ("tags", "tags"),
+    ("llm_model", "string"), ("prompt_version", "string"), ("classified_at", "timestamp"),
+]
+
+# table -> (columns, watermark column)
+EXPORT_TABLES = {
+    "raw_posts": (_POST_COLUMNS, "collected_at"),
+    "comments": (_COMMENT_COLUMNS, "collected_at"),
+    "fraud_classifications": ([
+        ("post_id", "string"), ("is_relevant", "bool"),
+        ("fraud_type", "string"), ("industry", "string"), ("loss_bracket", "string"),
+        ("channel", "string"), *_CLASSIFICATION_META,
+    ], "classified_at"),
+    "idv_classifications": ([
+        ("post_id", "string"), ("is_relevant", "bool"),
+        ("verification_type", "string"), ("friction_type", "string"), ("trigger_reason", "string"),
+        ("platform_name", "string"), ("sentiment", "string"), *_CLASSIFICATION_META,
+    ], "classified_at"),
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("export-parquet needs pyarrow (pip install -r requirements.txt)")
+
+
+def _schema(columns: list[tuple[str, str]]):
+    types = {
+        "string": pa.string(), "int": pa.int32(), "real": pa.float32(), "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us"), "tags": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _iso(ts: datetime | None) -> str | None:
+    return ts.isoformat(timespec="seconds") if ts else None
+
+
+# ============================================================
+# Manifest
+# ============================================================
+
+def _read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"tables": {}}
+
+
+def _write_manifest(directory: str, manifest: dict):
+    manifest["exported_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    tmp = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(directory, MANIFEST_FILE))
+
+
+# ============================================================
+# Export
+# ============================================================
+
+class _PartitionWriter:
+    """Writes one month's file in row groups, then swaps it in for the old one."""
+
+    def __init__(self, path: str, schema, tags: list[str]):
+        self.path, self.schema, self.tags = path, schema, tags
+        self.tmp = path + ".tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.writer = pq.ParquetWriter(self.tmp, schema, compression=COMPRESSION)
+        self.pending: list[dict] = []
+        self.rows = 0
+
+    def add(self, row: dict):
+        for column in self.tags:
+            row[column] = tag_list(row[column])
+        self.pending.append(row)
+        if len(self.pending) >= ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.writer.write_table(pa.Table.from_pylist(self.pending, schema=self.schema))
+            self.rows += len(self.pending)
+            self.pending = []
+
+    def close(self) -> int:
+        self._flush()
+        self.writer.close()
+        os.replace(self.tmp, self.path)
+        return os.path.getsize(self.path)
+
+
+def export_table(table: str, manifest: dict, directory: str = EXPORT_DIR,
+                 rebuild: bool = False) -> dict:
+    """Rewrite the changed partitions of one table and update its manifest entry."""
+    columns, watermark = EXPORT_TABLES[table]
+    names = [name for name, _ in columns]
+    schema = _schema(columns)
+    tags = [name for name, kind in columns if kind == "tags"]
+
+    known = manifest["tables"].get(table, {}).get("partitions", {})
+    current = {p["month"]: p for p in get_export_partitions(table, names, watermark)}
+    changed = sorted(
+        month for month, p in current.items()
+        if rebuild or known.get(month, {}).get("fingerprint") != p["fingerprint"]
+        or not os.path.exists(os.path.join(directory, table, f"month={month}", DATA_FILE))
+    )
+
+    partitions = {m: known[m] for m in current if m in known and m not in changed}
+    writer, month = None, None
+    for batch in (iter_export_rows(table, names, changed) if changed else []):
+        for row in batch:
+            if row["month"] != month:
+                if writer:
+                    partitions[month] = _entry(current[month], writer)
+                month = row["month"]
+                writer = _PartitionWriter(os.path.join(directory, table, f"month={month}", DATA_FILE),
+                                          schema, tags)
+            writer.add(row)
+    if writer:
+        partitions[month] = _entry(current[month], writer)
+
+    for gone in set(known) - set(current):
+        shutil.rmtree(os.path.join(directory, table, f"month={gone}"), ignore_errors=True)
+
+    watermarks = [p["watermark"] for p in partitions.values() if p["watermark"]]
+    manifest["tables"][table] = {
+        "rows": sum(p["rows"] for p in partitions.values()),
+        "watermark": max(watermarks) if watermarks else None,
+        "partitions": dict(sorted(partitions.items())),
+    }
+    return {"partitions": len(current), "rewritten": len(changed),
+            "removed": len(set(known) - set(current)), "rows": manifest["tables"][table]["rows"]}
+
+
+def _entry(partition: dict, writer: _PartitionWriter) -> dict:
+    size = writer.close()
+    return {
+        "rows": writer.rows,
+        "fingerprint": partition["fingerprint"],
+        "watermark": _iso(partition["watermark"]),
+        "bytes": size,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def export_parquet(directory: str = EXPORT_DIR, rebuild: bool = False) -> dict:
+    """Export every table in EXPORT_TABLES. Returns {table: export_table result}."""
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    manifest = _read_manifest(directory)
+    results = {}
+    for table in EXPORT_TABLES:
+        start = time.time()
+        results[table] = result = export_table(table, manifest, directory, rebuild=rebuild)
+        _write_manifest(directory, manifest)  # after each table, so an interrupted run keeps its progress
+        log.info(f"{table}: {result['rewritten']}/{result['partitions']} partitions rewritten, "
+                 f"{result['removed']} removed, {result['rows']} rows ({time.time() - start:.0f}s)")
+    return results
@@ -2,21 +2,54 @@
 
 Classifies all posts using two independent boolean flags (is_fraud, is_idv).
 Posts can be fraud-only, IDV-only, both, or neither.
+
+Cascade mode classifies with a fast tier (a smaller model at low reasoning
+effort, roughly a quarter of the medium call's cost) first and escalates to
+the medium-effort call only when the fast verdict is below
+PASS1_CASCADE_THRESHOLD confidence or contradicts strong keyword signals.
+raw_posts.refilter_tier records which tier produced each verdict.
 """
 
+import os
+import re
+import threading
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from backend.config import PASS1_MODEL
+from backend.config import PASS1_MODEL, PASS1_FAST_MODEL, PASS1_CASCADE_THRESHOLD
 from backend.db import (
     get_unrefiltered_posts, get_unrefiltered_count,
     get_random_unrefiltered_posts, update_post_refilter,
     start_run, finish_run,
 )
 from backend.llm_client import call_llm
+from backend.journal import get_journal
+from backend.failures import record_failures, clear_failures
+from backend.compaction import compact_body, record_savings, print_compaction_stats
 from backend.utils import setup_logger
 
 log = setup_logger("pass1_classifier")
 
 LLM_CONCURRENCY = 20
+BODY_TOKEN_BUDGET = 1200  # ~5000 chars of uncompacted text
+
+# Cascade tiers: call_llm settings per tier. The fast tier sets its effort
+# explicitly; leaving it unset means the provider default, which is not cheaper.
+TIERS = {
+    "fast": {"model": PASS1_FAST_MODEL, "reasoning_effort": "low"},
+    "medium": {"model": PASS1_MODEL, "reasoning_effort": "medium"},
+}
+
+# Keyword signals checked against fast-tier "false" verdicts. A post that says
+# "scam" in the title or names an IDV vendor but comes back negative escalates.
+FRAUD_SIGNAL = re.compile(
+    r"\b(scam(med|mer|s)?|fraud(ulent)?|phish(ing)?|identity theft|stolen identity|"
+    r"hacked|account takeover|sim swap)\b", re.IGNORECASE)
+IDV_SIGNAL = re.compile(
+    r"\b(kyc|id\.me|persona|jumio|onfido|veriff|sumsub|liveness|selfie verification|"
+    r"identity verification|verify (my|your) identity|age verification)\b", re.IGNORECASE)
+
+_cascade_lock = threading.Lock()
+_cascade_counts = Counter()
 
 SYSTEM_PROMPT = """You classify Reddit posts for a fraud & identity-verification intelligence dashboard.
 
@@ -79,9 +112,9 @@ REFILTER_SCHEMA = {
 
 
 def _build_user_prompt(post: dict) -> str:
-    body = (post["selftext"] or "").strip()
-    if len(body) > 5000:
-        body = body[:5000] + "\n[...truncated]"
+    raw = (post["selftext"] or "").strip()
+    body = compact_body(raw, BODY_TOKEN_BUDGET)
+    record_savings("pass1", post["post_id"], raw[:5000], body)
 
     return f"""Classify this Reddit post:
 
@@ -91,26 +124,66 @@ Body: {body}
 Score: {post['score']} | Comments: {post['num_comments']}"""
 
 
-def _process_single_post(post: dict) -> dict:
-    """Process a single post through LLM. Thread-safe."""
-    prompt = _build_user_prompt(post)
-
+def _classify(post: dict, prompt: str, tier: str, usage: dict = None) -> dict | None:
+    """One Pass 1 call at the given tier. Returns normalized flags or None."""
     result = call_llm(
         SYSTEM_PROMPT, prompt,
         json_schema=REFILTER_SCHEMA,
-        reasoning_effort="medium",
+        usage=usage,
+        **TIERS[tier],
     )
-
     if result is None:
+        return None
+    return {
+        "is_fraud": bool(result.get("is_fraud", False)),
+        "is_idv": bool(result.get("is_idv", False)),
+        "confidence": float(result.get("confidence", 0.0)),
+    }
+
+
+def _escalation_reason(post: dict, verdict: dict) -> str | None:
+    """Why a fast-tier verdict should be re-checked at medium effort, if at all."""
+    if verdict["confidence"] < PASS1_CASCADE_THRESHOLD:
+        return "low_confidence"
+    text = f"{post['title']}\n{post['selftext'] or ''}"
+    if not verdict["is_fraud"] and FRAUD_SIGNAL.search(post["title"]):
+        return "fraud_signal"
+    if not verdict["is_idv"] and IDV_SIGNAL.search(text):
+        return "idv_signal"
+    return None
+
+
+def _process_single_post(post: dict, cascade: bool = False) -> dict:
+    """Process a single post through LLM. Thread-safe."""
+    prompt = _build_user_prompt(post)
+
+    tier = "medium"
+    verdict = None
+    if cascade:
+        verdict = _classify(post, prompt, "fast")
+        reason = "fast_error" if verdict is None else _escalation_reason(post, verdict)
+        with _cascade_lock:
+            _cascade_counts[reason or "accepted"] += 1
+        if reason is None:
+            tier = "fast"
+        else:
+            verdict = None
+
+    if verdict is None:
+        verdict = _classify(post, prompt, "medium")
+
+    if verdict is None:
         log.warning(f"LLM returned no result for post {post['post_id']}")
-        update_post_refilter(post["post_id"], is_fraud=None, is_idv=None, confidence=0.0)
-        return {"status": "error", "post_id": post["post_id"]}
+        return {"status": "error", "post_id": post["post_id"],
+                "error_class": "llm_no_response", "error": "LLM returned no result"}
 
-    is_fraud = result.get("is_fraud", False)
-    is_idv = result.get("is_idv", False)
-    confidence = float(result.get("confidence", 0.0))
+    is_fraud = verdict["is_fraud"]
+    is_idv = verdict["is_idv"]
 
-    update_post_refilter(post["post_id"], is_fraud=is_fraud, is_idv=is_idv, confidence=confidence)
+    entry_id = get_journal().append("pass1", "refilter", post["post_id"], {**verdict, "tier": tier})
+    update_post_refilter(post["post_id"], is_fraud=is_fraud, is_idv=is_idv,
+                         confidence=verdict["confidence"], tier=tier)
+    get_journal().mark_applied([entry_id])
 
     if is_fraud and is_idv:
         status = "both"
@@ -124,46 +197,59 @@ def _process_single_post(post: dict) -> dict:
     return {"status": status, "post_id": post["post_id"]}
 
 
-def refilter_batch(posts: list[dict]) -> dict:
+def refilter_batch(posts: list[dict], cascade: bool = False) -> dict:
     """Refilter a batch of posts using concurrent LLM calls."""
     counts = {"fraud": 0, "idv": 0, "both": 0, "neither": 0, "errors": 0}
 
     with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
         futures = {
-            executor.submit(_process_single_post, post): post
+            executor.submit(_process_single_post, post, cascade): post
             for post in posts
         }
 
+        succeeded, failures = [], []
         for future in as_completed(futures):
+            post_id = futures[future]["post_id"]
             try:
                 result = future.result()
                 status = result["status"]
                 if status == "error":
                     counts["errors"] += 1
+                    failures.append((post_id, result["error_class"], result["error"]))
                 else:
                     counts[status] += 1
+                    succeeded.append(post_id)
             except Exception as e:
                 log.error(f"Unexpected error in worker: {e}")
                 counts["errors"] += 1
+                failures.append((post_id, f"exception:{type(e).__name__}", str(e)))
 
+    # Failed posts stay unrefiltered and are retried on backoff (see failures.py)
+    record_failures("refilter", failures)
+    clear_failures("refilter", succeeded)
     return counts
 
 
-def run_refilter(sample_size: int = None):
+def run_refilter(sample_size: int = None, cascade: bool = False, by_yield: bool = False):
     """Run Pass 1 refilter.
 
     Args:
         sample_size: If set, process only this many random posts (for validation).
                      If None, process all unfiltered posts.
+        cascade: Classify with the fast tier first and escalate uncertain posts.
+        by_yield: Full run only: process the highest-yield subreddits first (see yield_model.py).
     """
+    mode = f"cascade, escalate below {PASS1_CASCADE_THRESHOLD}" if cascade else "medium reasoning"
+    reasoning = "cascade" if cascade else "medium"
+
     if sample_size:
         posts = get_random_unrefiltered_posts(sample_size)
         total = len(posts)
-        log.info(f"Starting refilter on RANDOM SAMPLE of {total} posts ({LLM_CONCURRENCY} workers, medium reasoning)")
+        log.info(f"Starting refilter on RANDOM SAMPLE of {total} posts ({LLM_CONCURRENCY} workers, {mode})")
 
         run_id = start_run("refilter_v2", "pass1_sample", {
             "model": PASS1_MODEL, "sample_size": sample_size,
-            "concurrency": LLM_CONCURRENCY, "reasoning": "medium",
+            "concurrency": LLM_CONCURRENCY, "reasoning": reasoning,
         })
 
         # Process sample in one big batch (or chunks if large)
@@ -173,7 +259,7 @@ def run_refilter(sample_size: int = None):
 
         for i in range(0, len(posts), batch_size):
             batch = posts[i:i + batch_size]
-            counts = refilter_batch(batch)
+            counts = refilter_batch(batch, cascade)
             for k in totals:
                 totals[k] += counts[k]
             processed += len(batch)
@@ -191,7 +277,7 @@ def run_refilter(sample_size: int = None):
 
     else:
         total = get_unrefiltered_count()
-        log.info(f"Starting FULL refilter. {total} posts to process ({LLM_CONCURRENCY} workers, medium reasoning)")
+        log.info(f"Starting FULL refilter. {total} posts to process ({LLM_CONCURRENCY} workers, {mode})")
 
         if total == 0:
             log.info("No posts to refilter.")
@@ -199,7 +285,7 @@ def run_refilter(sample_size: int = None):
 
         run_id = start_run("refilter_v2", "pass1_full", {
             "model": PASS1_MODEL, "total": total,
-            "concurrency": LLM_CONCURRENCY, "reasoning": "medium",
+            "concurrency": LLM_CONCURRENCY, "reasoning": reasoning, "by_yield": by_yield,
         })
 
         totals = {"fraud": 0, "idv": 0, "both": 0, "neither": 0, "errors": 0}
@@ -207,11 +293,11 @@ def run_refilter(sample_size: int = None):
         batch_size = LLM_CONCURRENCY * 2
 
         while True:
-            batch = get_unrefiltered_posts(batch_size=batch_size)
+            batch = get_unrefiltered_posts(batch_size=batch_size, by_yield=by_yield)
             if not batch:
                 break
 
-            counts = refilter_batch(batch)
+            counts = refilter_batch(batch, cascade)
             for k in totals:
                 totals[k] += counts[k]
             processed += len(batch)
@@ -229,6 +315,90 @@ def run_refilter(sample_size: int = None):
         return totals
 
 
+def compare_cascade(sample_size: int = 200):
+    """Cost, latency and agreement of the cascade vs always-medium on a random sample.
+
+    Every sampled post is classified at both tiers (nothing is written). The
+    cascade verdict is the fast one when it would have been accepted and the
+    medium one otherwise, so escalated posts agree with always-medium by
+    construction; the interesting number is agreement on accepted posts.
+    """
+    from backend.eval_pass2 import EVAL_DIR
+
+    posts = get_random_unrefiltered_posts(sample_size)
+    log.info(f"Cascade comparison on {len(posts)} posts "
+             f"(fast={PASS1_FAST_MODEL}, threshold={PASS1_CASCADE_THRESHOLD})")
+
+    def run_both(post):
+        prompt = _build_user_prompt(post)
+        fast_usage, medium_usage = {}, {}
+        fast = _classify(post, prompt, "fast", usage=fast_usage)
+        medium = _classify(post, prompt, "medium", usage=medium_usage)
+        return post, fast, fast_usage, medium, medium_usage
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+        for future in as_completed([executor.submit(run_both, p) for p in posts]):
+            post, fast, fast_usage, medium, medium_usage = future.result()
+            if medium is None:
+                continue
+            reason = "fast_error" if fast is None else _escalation_reason(post, fast)
+            rows.append({"fast": fast, "medium": medium, "reason": reason,
+                         "fast_usage": fast_usage, "medium_usage": medium_usage})
+
+    if not rows:
+        log.warning("No posts classified; nothing to report.")
+        return
+
+    def flags(v):
+        return (v["is_fraud"], v["is_idv"])
+
+    n = len(rows)
+    accepted = [r for r in rows if r["reason"] is None]
+    reasons = Counter(r["reason"] for r in rows if r["reason"])
+
+    medium_cost = sum(r["medium_usage"]["cost"] for r in rows)
+    medium_latency = sum(r["medium_usage"]["latency"] for r in rows)
+    cascade_cost = sum(r["fast_usage"]["cost"] + (r["medium_usage"]["cost"] if r["reason"] else 0)
+                       for r in rows)
+    cascade_latency = sum(r["fast_usage"]["latency"] + (r["medium_usage"]["latency"] if r["reason"] else 0)
+                          for r in rows)
+    medium_tokens = sum(r["medium_usage"]["completion_tokens"] for r in rows)
+    cascade_tokens = sum(r["fast_usage"]["completion_tokens"]
+                         + (r["medium_usage"]["completion_tokens"] if r["reason"] else 0) for r in rows)
+
+    raw_agree = sum(1 for r in rows if r["fast"] and flags(r["fast"]) == flags(r["medium"]))
+    accepted_agree = sum(1 for r in accepted if flags(r["fast"]) == flags(r["medium"]))
+    cascade_agree = accepted_agree + (n - len(accepted))
+
+    def pct(a, b):
+        return f"{a / b * 100:.1f}%" if b else "n/a"
+
+    lines = [
+        "# Pass 1 Cascade vs Always-Medium", "",
+        f"Sample: {n} posts | fast tier: {PASS1_FAST_MODEL} (low effort) | "
+        f"medium tier: {PASS1_MODEL} | threshold: {PASS1_CASCADE_THRESHOLD}", "",
+        "| Metric | Always-medium | Cascade |", "|--------|---------------|---------|",
+        f"| Cost (USD) | {medium_cost:.4f} | {cascade_cost:.4f} |",
+        f"| Completion tokens | {medium_tokens} | {cascade_tokens} |",
+        f"| Mean latency (s) | {medium_latency / n:.2f} | {cascade_latency / n:.2f} |",
+        f"| Agreement with always-medium | 100% | {pct(cascade_agree, n)} |", "",
+        f"- Escalated: {n - len(accepted)} ({pct(n - len(accepted), n)})"
+        + (f" — {', '.join(f'{k}: {v}' for k, v in reasons.most_common())}" if reasons else ""),
+        f"- Fast verdicts accepted: {len(accepted)}, agreeing with medium: {pct(accepted_agree, len(accepted))}",
+        f"- Fast vs medium raw agreement (before escalation): {pct(raw_agree, n)}",
+        f"- Cost saved: {pct(medium_cost - cascade_cost, medium_cost)}",
+    ]
+    for line in lines:
+        print(line)
+
+    os.makedirs(EVAL_DIR, exist_ok=True)
+    path = os.path.join(EVAL_DIR, "pass1_cascade_report.md")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    print(f"\nReport saved to {path}")
+
+
 def _print_summary(totals: dict, total: int):
     relevant = totals["fraud"] + totals["idv"] + totals["both"]
     log.info("=" * 60)
@@ -240,7 +410,13 @@ def _print_summary(totals: dict, total: int):
     log.info(f"  Neither:          {totals['neither']} ({totals['neither']/total*100:.1f}%)")
     log.info(f"  Errors:           {totals['errors']}")
     log.info(f"  Total relevant:   {relevant} ({relevant/total*100:.1f}%)")
+    if _cascade_counts:
+        fast = _cascade_counts["accepted"]
+        escalated = sum(_cascade_counts.values()) - fast
+        reasons = ", ".join(f"{k}: {v}" for k, v in _cascade_counts.items() if k != "accepted")
+        log.info(f"  Cascade:          {fast} fast verdicts, {escalated} escalated ({reasons or 'none'})")
     log.info("=" * 60)
+    print_compaction_stats()
 
 
 if __name__ == "__main__":
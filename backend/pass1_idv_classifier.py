@@ -16,11 +16,15 @@ from backend.db import (
     start_run, finish_run,
 )
 from backend.llm_client import call_deepseek
+from backend.journal import get_journal
+from backend.failures import record_failures, clear_failures
+from backend.compaction import compact_body, record_savings, print_compaction_stats
 from backend.utils import setup_logger
 
 log = setup_logger("pass1_idv")
 
 LLM_CONCURRENCY = 30
+BODY_TOKEN_BUDGET = 1200  # ~5000 chars of uncompacted text
 
 SYSTEM_PROMPT = """You classify Reddit posts for an identity verification intelligence dashboard.
 
@@ -55,9 +59,9 @@ Respond with ONLY a JSON object: {"is_idv": true/false, "confidence": 0.0-1.0}""
 
 
 def _build_user_prompt(post: dict) -> str:
-    body = (post["selftext"] or "").strip()
-    if len(body) > 5000:
-        body = body[:5000] + "\n[...truncated]"
+    raw = (post["selftext"] or "").strip()
+    body = compact_body(raw, BODY_TOKEN_BUDGET)
+    record_savings("pass1-idv", post["post_id"], raw[:5000], body)
 
     return (
         f"Classify this Reddit post:\n\n"
@@ -76,8 +80,8 @@ def _process_single_post(post: dict) -> dict:
 
     if result is None:
         log.warning(f"LLM returned no result for post {post['post_id']}")
-        update_post_refilter(post["post_id"], is_fraud=None, is_idv=None, confidence=0.0)
-        return {"status": "error", "post_id": post["post_id"]}
+        return {"status": "error", "post_id": post["post_id"],
+                "error_class": "llm_no_response", "error": "LLM returned no result"}
 
     is_idv = result.get("is_idv", False)
     if isinstance(is_idv, str):
@@ -85,7 +89,10 @@ def _process_single_post(post: dict) -> dict:
 
     confidence = float(result.get("confidence", 0.0))
 
+    entry_id = get_journal().append("pass1", "idv", post["post_id"],
+                                    {"is_fraud": None, "is_idv": is_idv, "confidence": confidence})
     update_post_refilter(post["post_id"], is_fraud=None, is_idv=is_idv, confidence=confidence)
+    get_journal().mark_applied([entry_id])
 
     return {
         "status": "idv" if is_idv else "not_idv",
@@ -103,18 +110,26 @@ def classify_batch(posts: list[dict]) -> dict:
             for post in posts
         }
 
+        succeeded, failures = [], []
         for future in as_completed(futures):
+            post_id = futures[future]["post_id"]
             try:
                 result = future.result()
                 status = result["status"]
                 if status == "error":
                     counts["errors"] += 1
+                    failures.append((post_id, result["error_class"], result["error"]))
                 else:
                     counts[status] += 1
+                    succeeded.append(post_id)
             except Exception as e:
                 log.error(f"Unexpected error in worker: {e}")
                 counts["errors"] += 1
+                failures.append((post_id, f"exception:{type(e).__name__}", str(e)))
 
+    # Failed posts stay unrefiltered and are retried on backoff (see failures.py)
+    record_failures("refilter", failures)
+    clear_failures("refilter", succeeded)
     return counts
 
 
@@ -203,6 +218,7 @@ def _print_summary(totals: dict, total: int):
     log.info(f"  Not IDV:          {totals['not_idv']} ({totals['not_idv']/total*100:.1f}%)")
     log.info(f"  Errors:           {totals['errors']}")
     log.info("=" * 60)
+    print_compaction_stats()
 
 
 if __name__ == "__main__":
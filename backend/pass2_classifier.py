@@ -5,20 +5,36 @@ Usage:
     python -m backend.pass2_classifier test-idv 5        # Test batch of 5 IDV posts
     python -m backend.pass2_classifier run-fraud 20      # Classify fraud posts (20 concurrent workers)
     python -m backend.pass2_classifier run-idv 20        # Classify IDV posts (20 concurrent workers)
+    python -m backend.pass2_classifier test-dual 5       # Test fused fraud+IDV call on 5 dual-flagged posts
+    python -m backend.pass2_classifier run-dual 20       # Classify dual-flagged posts with one fused call each
+    python -m backend.pass2_classifier agree-dual 50     # Fused vs two-call agreement on 50 classified posts
     python -m backend.pass2_classifier progress           # Check progress
 """
 
 import sys
 import time
+import queue
+import threading
 from typing import Literal, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pydantic import BaseModel, Field, ConfigDict, ValidationError
 
 from backend.llm_client import call_deepseek
+from backend.enum_repair import repair_output, record_output, print_repair_stats
+from backend.prompt_registry import build_version
+from backend.journal import get_journal, close_journal
+from backend.failures import record_failures, clear_failures
+from backend import reasoning_router
+from backend.reasoning_router import AUTO, choose_effort, escalate, print_router_stats
+from backend.compaction import (
+    compact_body, compact_comments, record_savings, print_compaction_stats,
+)
 from backend.db import (
     get_top_comments_for_post,
     insert_fraud_classification, insert_idv_classification,
+    insert_classifications_batch, get_dual_classified_sample, register_prompt_versions,
     get_ready_unclassified_posts, get_classification_progress,
+    open_ready_listener, wait_for_ready_posts, close_ready_listener,
 )
 
 # ============================================================
@@ -26,6 +42,20 @@ from backend.db import (
 # ============================================================
 
 MAX_RETRIES = 3
+PASS2_MODEL_LABEL = "deepseek-v3.2"
+
+# Streaming (run_continuous) settings
+QUEUE_DEPTH_PER_WORKER = 3     # bounded work queue holds workers * this many posts
+REFILL_THRESHOLD = 0.5         # producer tops up once the queue drops below this fraction
+POLL_INTERVAL = 30             # fallback DB re-check when no readiness event arrives
+IDLE_TIMEOUT = 1200            # stop after this long with nothing ready and nothing in flight
+WRITER_BATCH_SIZE = 25         # max results per writer transaction
+
+_failure = threading.local()   # last failure (error_class, message) per worker thread
+
+# Input token budgets (see compaction.py)
+BODY_TOKEN_BUDGET = 750        # ~3000 chars of uncompacted text
+COMMENT_TOKEN_BUDGET = 125     # ~500 chars per comment
 
 # ============================================================
 # Pydantic Validation Models
@@ -210,6 +240,43 @@ tags: 2-5 freeform descriptive tags capturing contextual details not covered by
 Comments marked (OP) are from the original poster and often contain additional details about the verification experience, workarounds tried, or resolution status."""
 
 
+# Output-format sentence of the single-track prompts. It is left out of the
+# fused prompt, where it would contradict the two-key response format.
+_SINGLE_TRACK_OUTPUT = " Respond with ONLY a valid JSON object."
+
+
+def _track_instructions(system_prompt: str) -> str:
+    return system_prompt.replace(_SINGLE_TRACK_OUTPUT, "")
+
+
+FUSED_SYSTEM_PROMPT = f"""You are a fraud and identity verification analyst extracting structured data from a Reddit post and its comments. The post was flagged as discussing both fraud and identity verification, so classify it on two independent tracks in a single response.
+
+Respond with ONLY a valid JSON object with exactly two keys:
+  "fraud": an object with is_relevant, fraud_type, industry, loss_bracket, channel, notable_quote, tags, following the FRAUD TRACK instructions.
+  "idv": an object with is_relevant, verification_type, friction_type, trigger_reason, platform_name, sentiment, notable_quote, tags, following the IDV TRACK instructions.
+
+Judge each track on its own merits: is_relevant, notable_quote, and tags may differ between the two objects.
+
+=== FRAUD TRACK ===
+{_track_instructions(FRAUD_SYSTEM_PROMPT)}
+
+=== IDV TRACK ===
+{_track_instructions(IDV_SYSTEM_PROMPT)}"""
+
+
+# ============================================================
+# Prompt Versions
+# ============================================================
+
+# Recorded on every classification row; see prompt_registry and backend.reclassify
+PROMPT_VERSIONS = {
+    "fraud": build_version("fraud", FRAUD_SYSTEM_PROMPT, [FraudClassification], PASS2_MODEL_LABEL),
+    "idv": build_version("idv", IDV_SYSTEM_PROMPT, [IDVClassification], PASS2_MODEL_LABEL),
+    "dual": build_version("dual", FUSED_SYSTEM_PROMPT, [FraudClassification, IDVClassification],
+                          PASS2_MODEL_LABEL),
+}
+
+
 # ============================================================
 # Response Pre-processing & Validation
 # ============================================================
@@ -235,11 +302,8 @@ def _preprocess(data: dict) -> dict:
         if field in data and isinstance(data[field], str):
             data[field] = data[field].strip().lower().replace(" ", "_").replace("-", "_")
 
-    # Fix common LLM enum mismatches
-    if data.get("friction_type") == "unknown":
-        data["friction_type"] = "other"
-    if data.get("trigger_reason") == "info_mismatch":
-        data["trigger_reason"] = "unknown"
+    # Remaining enum mismatches (synonyms, plurals, typos) are fixed by
+    # enum_repair only when validation actually fails, so each one is logged.
 
     # Ensure tags is a list
     if "tags" in data:
@@ -259,21 +323,27 @@ def _format_user_prompt(post: dict) -> str:
     """Format a post + comments into the user prompt."""
     comments = get_top_comments_for_post(post["post_id"], limit=5)
 
-    body = (post["selftext"] or "")[:3000]
-
-    comments_text = ""
-    if comments:
-        parts = []
-        for i, c in enumerate(comments, 1):
-            op_tag = " (OP)" if c["is_submitter"] else ""
-            author = c["author"] or "[deleted]"
-            parts.append(
-                f"[Comment {i} | Score: {c['score']} | By: {author}{op_tag}]\n"
-                f"{c['body'][:500]}"
-            )
-        comments_text = "\n\n".join(parts)
-    else:
-        comments_text = "(No comments available)"
+    raw = post["selftext"] or ""
+    body = compact_body(raw, BODY_TOKEN_BUDGET)
+    compacted = compact_comments([c["body"] or "" for c in comments], body, COMMENT_TOKEN_BUDGET)
+
+    parts = []
+    for c, text in zip(comments, compacted):
+        if not text:
+            continue  # bot boilerplate, quote-only, or a repeat of the body
+        op_tag = " (OP)" if c["is_submitter"] else ""
+        author = c["author"] or "[deleted]"
+        parts.append(
+            f"[Comment {len(parts) + 1} | Score: {c['score']} | By: {author}{op_tag}]\n"
+            f"{text}"
+        )
+    comments_text = "\n\n".join(parts) if parts else "(No comments available)"
+
+    record_savings(
+        "pass2", post["post_id"],
+        raw[:3000] + "".join((c["body"] or "")[:500] for c in comments),
+        body + "".join(compacted),
+    )
 
     return (
         f"Classify this Reddit post:\n\n"
@@ -289,71 +359,162 @@ def _format_user_prompt(post: dict) -> str:
 # Classification Pipeline
 # ============================================================
 
-def classify_fraud_post(post: dict, reasoning: str = None) -> dict | None:
-    """Classify a single fraud post. Returns validated dict or None."""
-    user_prompt = _format_user_prompt(post)
+def _set_failure(error_class: str, message: str = None):
+    _failure.info = (error_class, message)
+
+
+def last_failure() -> tuple[str, str | None]:
+    """(error_class, message) of the last failed classification on this thread."""
+    return getattr(_failure, "info", ("unknown", None))
 
+
+def _classify_post(post: dict, model_cls, system_prompt: str, reasoning: str = None,
+                   user_prompt: str = None) -> dict | None:
+    """Classify a single post against one track. Returns validated dict or None.
+
+    reasoning="auto" picks the effort per post (see reasoning_router) and
+    retries one level higher after a validation failure.
+    """
+    user_prompt = user_prompt or _format_user_prompt(post)
+    track = _MODEL_TRACKS[model_cls]
+    auto = reasoning == AUTO
+    effort = choose_effort(track, post) if auto else reasoning
+
+    responded = False
     for attempt in range(1, MAX_RETRIES + 1):
-        raw = call_deepseek(FRAUD_SYSTEM_PROMPT, user_prompt, reasoning=reasoning)
+        start = time.time()
+        raw = call_deepseek(system_prompt, user_prompt, reasoning=effort)
         if raw is None:
+            reasoning_router.record(track, post, effort, time.time() - start, "no_response")
             continue
+        responded = True
+
+        validated = _validate(model_cls, _preprocess(raw), post["post_id"], attempt)
+        reasoning_router.record(track, post, effort, time.time() - start,
+                                "valid" if validated is not None else "invalid")
+        if validated is not None:
+            return validated
+        if auto:
+            effort = escalate(effort)
+
+    if not responded:
+        _set_failure("llm_no_response", f"no usable response after {MAX_RETRIES} attempts")
+    return None
 
-        processed = _preprocess(raw)
 
-        try:
-            validated = FraudClassification(**processed)
-            return validated.model_dump()
-        except ValidationError as e:
-            errors = e.errors()
-            print(f"  [VALIDATION] Post {post['post_id']} attempt {attempt}:")
-            for err in errors:
-                print(f"    - {err['loc']}: {err['msg']} (got: {err.get('input', '?')})")
-            if attempt < MAX_RETRIES:
-                continue
-            return None
+def _validate(model_cls, processed: dict, post_id: str, attempt: int = 1) -> dict | None:
+    """Validate an LLM output, repairing near-miss values locally before giving up."""
+    record_output(model_cls)
+    try:
+        return model_cls(**processed).model_dump()
+    except ValidationError as e:
+        errors = e.errors()
+
+    repaired = repair_output(model_cls, processed, errors, post_id=post_id)
+    if repaired is not None:
+        return repaired
 
+    print(f"  [VALIDATION] Post {post_id} attempt {attempt} (unrepairable):")
+    for err in errors:
+        print(f"    - {err['loc']}: {err['msg']} (got: {err.get('input', '?')})")
+    _set_failure("validation", "; ".join(f"{e['loc']}: {e['msg']}" for e in errors))
     return None
 
 
+def classify_fraud_post(post: dict, reasoning: str = None) -> dict | None:
+    """Classify a single fraud post. Returns validated dict or None."""
+    return _classify_post(post, FraudClassification, FRAUD_SYSTEM_PROMPT, reasoning)
+
+
 def classify_idv_post(post: dict, reasoning: str = None) -> dict | None:
     """Classify a single IDV post. Returns validated dict or None."""
-    user_prompt = _format_user_prompt(post)
+    return _classify_post(post, IDVClassification, IDV_SYSTEM_PROMPT, reasoning)
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        raw = call_deepseek(IDV_SYSTEM_PROMPT, user_prompt, reasoning=reasoning)
-        if raw is None:
-            continue
 
-        processed = _preprocess(raw)
+def classify_dual_post(post: dict, reasoning: str = None) -> dict | None:
+    """Classify a post flagged both fraud and IDV with one fused call.
 
-        try:
-            validated = IDVClassification(**processed)
-            return validated.model_dump()
-        except ValidationError as e:
-            errors = e.errors()
-            print(f"  [VALIDATION] Post {post['post_id']} attempt {attempt}:")
-            for err in errors:
-                print(f"    - {err['loc']}: {err['msg']} (got: {err.get('input', '?')})")
-            if attempt < MAX_RETRIES:
+    Returns {"fraud": ..., "idv": ..., "prompt_versions": ...} or None. Each half is validated on its
+    own; a half that fails validation (or a fused call that never returns)
+    falls back to the regular single-track call for that track only, reusing
+    the already formatted prompt.
+    """
+    user_prompt = _format_user_prompt(post)
+    effort = choose_effort("dual", post) if reasoning == AUTO else reasoning
+
+    raw = None
+    for _ in range(MAX_RETRIES):
+        start = time.time()
+        raw = call_deepseek(FUSED_SYSTEM_PROMPT, user_prompt, reasoning=effort)
+        reasoning_router.record("dual", post, effort, time.time() - start,
+                                "no_response" if raw is None else "valid")
+        if raw is not None:
+            break
+
+    tracks = {
+        "fraud": (FraudClassification, FRAUD_SYSTEM_PROMPT),
+        "idv": (IDVClassification, IDV_SYSTEM_PROMPT),
+    }
+    result = {"prompt_versions": {}}
+    for track, (model_cls, system_prompt) in tracks.items():
+        part = raw.get(track) if isinstance(raw, dict) else None
+        if isinstance(part, dict):
+            validated = _validate(model_cls, _preprocess(part), post["post_id"])
+            if validated is not None:
+                result[track] = validated
+                result["prompt_versions"][track] = PROMPT_VERSIONS["dual"]["version"]
                 continue
+            print(f"  [FUSED] Post {post['post_id']} {track} half invalid, "
+                  f"falling back to single-track call")
+        else:
+            print(f"  [FUSED] Post {post['post_id']} missing {track} half, "
+                  f"falling back to single-track call")
+
+        fallback = _classify_post(post, model_cls, system_prompt, reasoning, user_prompt)
+        if fallback is None:
             return None
+        result[track] = fallback
+        result["prompt_versions"][track] = PROMPT_VERSIONS[track]["version"]
 
-    return None
+    return result
+
+
+_MODEL_TRACKS = {FraudClassification: "fraud", IDVClassification: "idv"}
+reasoning_router.register_models(list(_MODEL_TRACKS))
+
+_CLASSIFIERS = {
+    "fraud": classify_fraud_post,
+    "idv": classify_idv_post,
+    "dual": classify_dual_post,
+}
 
 
 # ============================================================
 # Batch Processing
 # ============================================================
 
+def _journal_result(track: str, post_id: str, result: dict) -> str:
+    """Persist a validated result locally before its DB write (see journal.py)."""
+    versions = result.get("prompt_versions") if track == "dual" else \
+        {track: PROMPT_VERSIONS[track]["version"]}
+    return get_journal().append("pass2", track, post_id, result,
+                                model=PASS2_MODEL_LABEL, prompt_versions=versions)
+
+
 def _process_fraud_worker(post: dict, reasoning: str = None) -> tuple[str, bool]:
     """Worker function for concurrent fraud classification."""
     post_id = post["post_id"]
     result = classify_fraud_post(post, reasoning=reasoning)
     if result:
-        insert_fraud_classification(post_id, result, model="deepseek-v3.2")
+        entry_id = _journal_result("fraud", post_id, result)
+        insert_fraud_classification(post_id, result, model=PASS2_MODEL_LABEL,
+                                    prompt_version=PROMPT_VERSIONS["fraud"]["version"])
+        get_journal().mark_applied([entry_id])
+        clear_failures("fraud", [post_id])
         return (post_id, True)
     else:
         print(f"  [FAIL] Fraud post {post_id} failed after all retries")
+        record_failures("fraud", [(post_id, *last_failure())])
         return (post_id, False)
 
 
@@ -362,13 +523,41 @@ def _process_idv_worker(post: dict, reasoning: str = None) -> tuple[str, bool]:
     post_id = post["post_id"]
     result = classify_idv_post(post, reasoning=reasoning)
     if result:
-        insert_idv_classification(post_id, result, model="deepseek-v3.2")
+        entry_id = _journal_result("idv", post_id, result)
+        insert_idv_classification(post_id, result, model=PASS2_MODEL_LABEL,
+                                  prompt_version=PROMPT_VERSIONS["idv"]["version"])
+        get_journal().mark_applied([entry_id])
+        clear_failures("idv", [post_id])
         return (post_id, True)
     else:
         print(f"  [FAIL] IDV post {post_id} failed after all retries")
+        record_failures("idv", [(post_id, *last_failure())])
         return (post_id, False)
 
 
+def _process_dual_worker(post: dict, reasoning: str = None) -> tuple[str, bool]:
+    """Worker function for concurrent fused (fraud + IDV) classification."""
+    post_id = post["post_id"]
+    result = classify_dual_post(post, reasoning=reasoning)
+    if result:
+        entry_id = _journal_result("dual", post_id, result)
+        insert_classifications_batch("dual", [(post_id, result)], model=PASS2_MODEL_LABEL)
+        get_journal().mark_applied([entry_id])
+        clear_failures("dual", [post_id])
+        return (post_id, True)
+    else:
+        print(f"  [FAIL] DUAL post {post_id} failed after all retries")
+        record_failures("dual", [(post_id, *last_failure())])
+        return (post_id, False)
+
+
+_BATCH_WORKERS = {
+    "fraud": _process_fraud_worker,
+    "idv": _process_idv_worker,
+    "dual": _process_dual_worker,
+}
+
+
 def run_batch(track: str, workers: int = 20, batch_size: int = 200, reasoning: str = None):
     """Run classification on unclassified posts with concurrent workers."""
     posts = get_ready_unclassified_posts(track, batch_size)
@@ -383,11 +572,9 @@ def run_batch(track: str, workers: int = 20, batch_size: int = 200, reasoning: s
     failed = 0
     start = time.time()
 
+    worker = _BATCH_WORKERS[track]
     with ThreadPoolExecutor(max_workers=workers) as executor:
-        if track == "fraud":
-            futures = {executor.submit(_process_fraud_worker, post, reasoning): post for post in posts}
-        else:
-            futures = {executor.submit(_process_idv_worker, post, reasoning): post for post in posts}
+        futures = {executor.submit(worker, post, reasoning): post for post in posts}
 
         for i, future in enumerate(as_completed(futures), 1):
             post_id, ok = future.result()
@@ -407,71 +594,253 @@ def run_batch(track: str, workers: int = 20, batch_size: int = 200, reasoning: s
     return success, failed
 
 
-def run_continuous(track: str, workers: int = 20, reasoning: str = None):
-    """Run classification continuously, processing all available posts.
+_STOP = object()
 
-    Keeps looping until no more posts are available, then waits 5 min
-    for the comment collector to make more posts ready. Exits after
-    4 consecutive empty checks (20 min).
-    """
-    total_success = 0
-    total_failed = 0
-    wave = 0
-    empty_checks = 0
-    run_start = time.time()
 
-    while empty_checks < 4:
-        posts = get_ready_unclassified_posts(track, batch_size=500)
-
-        if not posts:
-            empty_checks += 1
-            elapsed_total = time.time() - run_start
-            print(f"\n[{elapsed_total/60:.0f}m] No posts available (check {empty_checks}/4). "
-                  f"Total so far: {total_success} ok, {total_failed} fail.")
-            if empty_checks < 4:
-                print("Waiting 5 minutes for comment collector...")
-                time.sleep(300)
-            continue
+def run_continuous(track: str, workers: int = 20, reasoning: str = None, source=None,
+                   exit_when_empty: bool = False):
+    """Run classification continuously as a streaming producer/consumer pipeline.
 
-        empty_checks = 0  # reset on successful fetch
-        wave += 1
-        elapsed_total = time.time() - run_start
-        print(f"\n{'='*60}")
-        print(f"Wave {wave} | {len(posts)} posts | {elapsed_total/60:.0f}m elapsed | "
-              f"Running total: {total_success} ok, {total_failed} fail")
-        print(f"{'='*60}")
+    A producer thread keeps a bounded work queue topped up from the DB,
+    workers pull posts from it as soon as they are free, and a single writer
+    thread batches validated results into the DB. There are no wave barriers,
+    so a slow post only ever occupies its own worker.
 
-        success = 0
-        failed = 0
-        start = time.time()
+    The bounded queues provide backpressure in both directions: the producer
+    blocks when workers fall behind, and workers block when the writer does.
+    Ctrl-C stops the producer, drops posts that have not been sent to the LLM
+    yet, and drains everything already in flight to the DB before exiting.
+    The run ends on its own after IDLE_TIMEOUT seconds with nothing ready.
 
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            if track == "fraud":
-                futures = {executor.submit(_process_fraud_worker, post, reasoning): post for post in posts}
-            else:
-                futures = {executor.submit(_process_idv_worker, post, reasoning): post for post in posts}
+    track is "fraud", "idv", or "dual" (posts flagged both, classified with
+    one fused call and written to both tables in one transaction).
 
-            for i, future in enumerate(as_completed(futures), 1):
-                post_id, ok = future.result()
-                if ok:
-                    success += 1
+    source(batch_size) overrides where posts come from (default: ready,
+    unclassified posts for the track); reclassify uses it to feed stale rows.
+    With exit_when_empty the run ends as soon as the source has nothing left
+    and nothing is in flight, instead of waiting for new posts; use it for
+    finite sources.
+
+    When the queue is starved the producer sleeps on the posts_ready
+    LISTEN/NOTIFY channel, so a post marked by the comment collector is picked
+    up within seconds. Without LISTEN it falls back to polling every
+    POLL_INTERVAL seconds.
+    """
+    classify_fn = _CLASSIFIERS[track]
+    source = source or (lambda n: get_ready_unclassified_posts(track, batch_size=n))
+    versions = {t: v["version"] for t, v in PROMPT_VERSIONS.items()}
+    register_prompt_versions(list(PROMPT_VERSIONS.values()))
+    depth = workers * QUEUE_DEPTH_PER_WORKER
+
+    work_q = queue.Queue(maxsize=depth)
+    result_q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    in_flight = set()    # post_ids queued, classifying, or awaiting write
+    failed_ids = set()   # failed this run; not re-queued until the next run
+    busy_seconds = [0.0] * workers
+    totals = {"success": 0, "failed": 0}
+    run_start = time.time()
+
+    def _progress():
+        elapsed = time.time() - run_start
+        done = totals["success"] + totals["failed"]
+        rate = done / elapsed * 3600 if elapsed > 0 else 0
+        util = sum(busy_seconds) / (workers * elapsed) * 100 if elapsed > 0 else 0
+        print(f"  [{done}] {totals['success']} ok, {totals['failed']} fail | "
+              f"{elapsed/60:.0f}m elapsed | {rate:.0f} posts/hr | "
+              f"queue {work_q.qsize()}/{depth} | utilization {util:.0f}%")
+
+    def _wait_for_ready():
+        """Sleep until a readiness event, POLL_INTERVAL, or stop, whichever is first."""
+        nonlocal listener
+        deadline = time.time() + POLL_INTERVAL
+        while not stop.is_set() and time.time() < deadline:
+            if listener is None:
+                stop.wait(min(1.0, deadline - time.time()))
+                continue
+            try:
+                if wait_for_ready_posts(listener, timeout=min(1.0, deadline - time.time())):
+                    return
+            except Exception as e:
+                print(f"  [LISTEN] Listener lost ({e}), falling back to polling")
+                close_ready_listener(listener)
+                listener = None
+
+    def _producer():
+        idle_since = None
+        while not stop.is_set():
+            free = depth - work_q.qsize()
+            if free < depth * REFILL_THRESHOLD:
+                stop.wait(0.5)
+                continue
+
+            with lock:
+                skip = in_flight | failed_ids
+            posts = source(free + len(skip))
+            fresh = [p for p in posts if p["post_id"] not in skip][:free]
+
+            if not fresh:
+                with lock:
+                    busy = bool(in_flight)
+                if busy:
+                    idle_since = None
+                elif exit_when_empty:
+                    print("\nSource drained, stopping.")
+                    return
+                elif idle_since is None:
+                    idle_since = time.time()
+                    wake = "readiness events" if listener else f"polling every {POLL_INTERVAL}s"
+                    print(f"\nNo posts ready. Waiting on {wake} "
+                          f"(exit after {IDLE_TIMEOUT // 60}m idle)...")
+                elif time.time() - idle_since >= IDLE_TIMEOUT:
+                    print(f"\nNothing ready for {IDLE_TIMEOUT // 60}m, stopping.")
+                    return
+                if exit_when_empty:
+                    stop.wait(1)
                 else:
-                    failed += 1
+                    _wait_for_ready()
+                continue
 
-                if i % 20 == 0 or i == len(posts):
-                    elapsed = time.time() - start
-                    rate = i / elapsed * 3600 if elapsed > 0 else 0
-                    print(f"  [{i}/{len(posts)}] {success} ok, {failed} fail | "
-                          f"{elapsed:.0f}s elapsed | {rate:.0f} posts/hr")
+            idle_since = None
+            for post in fresh:
+                with lock:
+                    in_flight.add(post["post_id"])
+                while not stop.is_set():
+                    try:
+                        work_q.put(post, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+
+    def _worker(slot: int):
+        while True:
+            post = work_q.get()
+            if post is _STOP:
+                return
+            start = time.time()
+            result = None
+            try:
+                result = classify_fn(post, reasoning=reasoning)
+                if result:
+                    item = (post["post_id"], result, _journal_result(track, post["post_id"], result))
+            except Exception as e:
+                # A failed journal append must still reach the writer, which clears in_flight
+                stage = "journal" if result else "exception"
+                print(f"  [ERR] Post {post['post_id']} ({stage}): {e}")
+                _set_failure(f"{stage}:{type(e).__name__}", str(e))
+                result = None
+            busy_seconds[slot] += time.time() - start
+            if not result:
+                item = (post["post_id"], None, last_failure())
+            result_q.put(item)
+
+    def _writer():
+        done = False
+        while not done:
+            item = result_q.get()
+            batch = []
+            while True:
+                if item is _STOP:
+                    done = True
+                    break
+                batch.append(item)
+                if len(batch) >= WRITER_BATCH_SIZE:
+                    break
+                try:
+                    item = result_q.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
 
-        total_success += success
-        total_failed += failed
+            ok = [(pid, res) for pid, res, _ in batch if res]
+            failures = [(pid, *failure) for pid, res, failure in batch if not res]
+            bad = [pid for pid, _, _ in failures]
+            for pid, error_class, _ in failures:
+                print(f"  [FAIL] {track.upper()} post {pid} failed after all retries ({error_class})")
+            record_failures(track, failures)
+            if ok:
+                try:
+                    insert_classifications_batch(track, ok, model=PASS2_MODEL_LABEL,
+                                                 prompt_versions=versions)
+                    journal.mark_applied([eid for _, res, eid in batch if res])
+                    clear_failures(track, [pid for pid, _ in ok])
+                except Exception as e:
+                    print(f"  [DB] Write failed for {len(ok)} results: {e} "
+                          f"(kept in journal; load with journal-replay)")
+                    bad.extend(pid for pid, _ in ok)
+                    ok = []
+
+            with lock:
+                for pid, _, _ in batch:
+                    in_flight.discard(pid)
+                failed_ids.update(bad)
+            before = totals["success"] + totals["failed"]
+            totals["success"] += len(ok)
+            totals["failed"] += len(bad)
+            if (before + len(batch)) // 20 > before // 20:
+                _progress()
+
+    journal = get_journal()
+    listener = open_ready_listener()
+    print(f"Streaming {track} classification: {workers} workers, "
+          f"queue depth {depth}, writer batches of {WRITER_BATCH_SIZE}, "
+          f"{'LISTEN/NOTIFY wake-ups' if listener else 'polling (LISTEN unavailable)'}")
+
+    producer = threading.Thread(target=_producer, name="pass2-producer", daemon=True)
+    worker_threads = [
+        threading.Thread(target=_worker, args=(i,), name=f"pass2-worker-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    writer = threading.Thread(target=_writer, name="pass2-writer", daemon=True)
+
+    writer.start()
+    for t in worker_threads:
+        t.start()
+    producer.start()
+
+    try:
+        while producer.is_alive():
+            producer.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Draining in-flight posts (Ctrl-C again to abort)...")
+        stop.set()
+        producer.join()
+
+    # Drain: drop posts that were never sent to the LLM, let the rest finish.
+    dropped = 0
+    while True:
+        try:
+            post = work_q.get_nowait()
+        except queue.Empty:
+            break
+        with lock:
+            in_flight.discard(post["post_id"])
+        dropped += 1
+    if dropped:
+        print(f"Dropped {dropped} queued posts that had not started.")
+
+    for _ in worker_threads:
+        work_q.put(_STOP)
+    for t in worker_threads:
+        t.join()
+    result_q.put(_STOP)
+    writer.join()
+    close_ready_listener(listener)
+    close_journal()
 
     total_elapsed = time.time() - run_start
+    util = sum(busy_seconds) / (workers * total_elapsed) * 100 if total_elapsed > 0 else 0
     print(f"\n{'='*60}")
-    print(f"FINISHED: {total_success} classified, {total_failed} failed")
-    print(f"Total time: {total_elapsed/3600:.1f} hours")
+    print(f"FINISHED: {totals['success']} classified, {totals['failed']} failed")
+    print(f"Total time: {total_elapsed/3600:.1f} hours | Worker utilization: {util:.0f}%")
     print(f"{'='*60}")
+    print_repair_stats()
+    print_compaction_stats()
+    print_router_stats()
+    return totals["success"], totals["failed"]
 
 
 # ============================================================
@@ -484,7 +853,7 @@ def test_batch(track: str, count: int = 5, reasoning: str = None):
 
     print(f"=== TEST: {count} {track} posts ===\n")
 
-    classify_fn = classify_fraud_post if track == "fraud" else classify_idv_post
+    classify_fn = _CLASSIFIERS[track]
     success = 0
     failed = 0
 
@@ -507,6 +876,71 @@ def test_batch(track: str, count: int = 5, reasoning: str = None):
         print()
 
     print(f"=== Results: {success}/{count} valid, {failed}/{count} failed ===")
+    print_repair_stats()
+    print_compaction_stats()
+    print_router_stats()
+
+
+def check_dual_agreement(sample_size: int = 50, reasoning: str = "low"):
+    """Compare the fused call against existing two-call results (nothing is written).
+
+    Samples posts that already have both a fraud and an IDV classification,
+    re-classifies them with FUSED_SYSTEM_PROMPT, and reports per-field agreement.
+    A half that classify_dual_post had to fill with a single-track call (its
+    prompt version is the track's, not the fused one) is counted as a fallback
+    and left out of the agreement, which covers fused halves only.
+    """
+    from backend.eval_pass2 import FRAUD_FIELDS, IDV_FIELDS, normalize_value
+
+    rows = get_dual_classified_sample(sample_size)
+    print(f"=== FUSED AGREEMENT: {len(rows)} dual-classified posts ===\n")
+
+    fields = [("fraud", f) for f in FRAUD_FIELDS] + [("idv", f) for f in IDV_FIELDS]
+    matches = {key: 0 for key in fields}
+    compared = {"fraud": 0, "idv": 0}
+    fallbacks = {"fraud": 0, "idv": 0}
+    classified = 0
+    failed = 0
+    elapsed_total = 0.0
+
+    for i, row in enumerate(rows, 1):
+        start = time.time()
+        fused = classify_dual_post(row, reasoning=reasoning)
+        elapsed_total += time.time() - start
+        if fused is None:
+            failed += 1
+            continue
+
+        classified += 1
+        from_fused = {t for t in compared
+                      if fused["prompt_versions"][t] == PROMPT_VERSIONS["dual"]["version"]}
+        for track in compared:
+            if track in from_fused:
+                compared[track] += 1
+            else:
+                fallbacks[track] += 1
+        for track, field in fields:
+            if track in from_fused and \
+                    normalize_value(fused[track].get(field)) == normalize_value(row[track].get(field)):
+                matches[(track, field)] += 1
+
+        if i % 10 == 0:
+            print(f"  [{i}/{len(rows)}] classified {classified}, failed {failed}")
+
+    print(f"\n| Track | Field | Agreement |")
+    print(f"|-------|-------|-----------|")
+    for track, field in fields:
+        n = compared[track]
+        pct = matches[(track, field)] / n * 100 if n else 0
+        print(f"| {track} | {field} | {pct:.1f}% ({matches[(track, field)]}/{n}) |")
+
+    print()
+    for track, n in fallbacks.items():
+        rate = n / classified * 100 if classified else 0
+        print(f"{track} half from single-track fallback: {n}/{classified} ({rate:.1f}%)")
+
+    avg = elapsed_total / len(rows) if rows else 0
+    print(f"\n{classified} classified, {failed} failed | avg {avg:.1f}s per fused post")
 
 
 # ============================================================
@@ -528,11 +962,21 @@ if __name__ == "__main__":
     elif cmd == "run-idv":
         workers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
         run_continuous("idv", workers, reasoning=None)
+    elif cmd == "test-dual":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+        test_batch("dual", count, reasoning="low")
+    elif cmd == "run-dual":
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        run_continuous("dual", workers, reasoning="low")
+    elif cmd == "agree-dual":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        check_dual_agreement(count, reasoning="low")
     elif cmd == "progress":
         p = get_classification_progress()
         print(f"Fraud: {p['fraud_done']} done, {p['fraud_ready']} ready")
         print(f"IDV:   {p['idv_done']} done, {p['idv_ready']} ready")
     else:
         print(f"Unknown command: {cmd}")
-        print("Commands: test-fraud, test-idv, run-fraud, run-idv, progress")
+        print("Commands: test-fraud, test-idv, test-dual, run-fraud, run-idv, "
+              "run-dual, agree-dual, progress")
         sys.exit(1)
@@ -1,20 +1,57 @@
 """Pipeline orchestrator — run individual phases or the full pipeline."""
 
 import argparse
-from backend.db import init_schema, get_collection_stats
+from backend.db import (
+    init_schema, get_collection_stats, rebuild_classification_cube, backfill_classification_tags,
+    bump_data_version, refresh_classification_trends,
+)
 from backend.reddit_collector import (
     collect_all, collect_tier1, collect_tier2, collect_tier3,
     collect_tier4, collect_tier5, collect_tier6, collect_tier7, collect_tier8,
     collect_tier9, collect_tier10, collect_tier11, collect_tier12,
 )
 from backend.pre_filter import run_pre_filter
-from backend.pass1_classifier import run_refilter
+from backend.pass1_classifier import run_refilter, compare_cascade
 from backend.comment_collector import run_comment_collection
+from backend.metadata_refresh import run_refresh
 from backend.pass2_classifier import run_continuous
+from backend.journal import replay as journal_replay
+from backend.failures import print_failures, requeue
+from backend.batch_files import JOBS, export_requests, ingest_results
+from backend.yield_model import refresh_yields, print_yield_report
+from backend.reclassify import print_versions, run_reclassify, diff_report
+from backend.snapshot import export_snapshot, has_snapshot
+from backend.parquet_export import export_parquet
+from backend.search import parse_filters, print_search
+from backend.similar import update_index as update_similar_index, print_similar
 from backend.utils import setup_logger
 
 log = setup_logger("pipeline")
 
+# Pass 2 reasoning effort per track (see PROCESS.md, "Pass 2: A/B Testing");
+# --reasoning overrides it, "auto" routes per post (see reasoning_router.py).
+# A fused call has one effort for both tracks, so IDV posts that are also
+# flagged fraud run at "low" rather than IDV's default.
+PASS2_REASONING = {"fraud": "low", "idv": None, "dual": "low"}
+
+# Phases that change classifications; they refresh the trend rollups
+CLASSIFICATION_PHASES = {
+    "pass2-fraud", "pass2-idv", "pass2-dual", "reclassify", "journal-replay",
+    "ingest-results", "cube-rebuild", "tags-backfill",
+}
+
+# Phases that change what the dashboard and its APIs return; they bump
+# data_version, which invalidates the API result cache and any published
+# snapshot, so they also re-export the snapshot once one exists
+DATA_VERSION_PHASES = CLASSIFICATION_PHASES | {"refresh-metadata", "trends"}
+
+
+def refresh_trends(rebuild: bool = False):
+    for track in ("fraud", "idv"):
+        result = refresh_classification_trends(track, rebuild=rebuild)
+        log.info(f"classification_trends [{track}]: {result['buckets']} week/month buckets "
+                 f"recounted ({result['rows']} rows)")
+
 
 def print_stats():
     stats = get_collection_stats()
@@ -46,17 +83,48 @@ def main():
             "collect-tier1", "collect-tier2", "collect-tier3",
             "collect-tier4", "collect-tier5", "collect-tier6",
             "collect-tier7", "collect-tier8",
-            "collect-tier9", "collect-tier10", "collect-tier11", "collect-tier12",
-            "pre-filter", "refilter", "refilter-sample", "comments",
-            "pass2-fraud", "pass2-idv", "stats",
+            "collect-tier9", "collect-tier10", "collect-tier11", "collect-tier12", "refresh-metadata",
+            "pre-filter", "refilter", "refilter-sample", "refilter-cascade-report", "comments",
+            "pass2-fraud", "pass2-idv", "pass2-dual",
+            "prompt-versions", "reclassify", "reclassify-diff", "journal-replay",
+            "failures", "failures-requeue", "export-requests", "ingest-results", "yield",
+            "cube-rebuild", "tags-backfill", "trends", "export-snapshot", "export-parquet", "search",
+            "similar-index", "similar", "stats",
         ],
         help="Which phase to run",
     )
+    parser.add_argument(
+        "target",
+        nargs="?",
+        help=f"export-requests: job ({', '.join(JOBS)}); ingest-results: result JSONL path; "
+             "search: the query; similar: a post_id",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="export-requests: max posts to export; refresh-metadata: max posts to refresh "
+             "(default: 10000); search / similar: max results (default: 20 / 10)",
+    )
     parser.add_argument(
         "--sample-size",
         type=int,
         default=1000,
-        help="Number of random posts for refilter-sample (default: 1000)",
+        help="Number of random posts for refilter-sample / refilter-cascade-report (default: 1000)",
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="refilter: fast tier first, escalate uncertain posts to medium reasoning",
+    )
+    parser.add_argument(
+        "--by-yield",
+        action="store_true",
+        help="refilter: process the highest-yield subreddits first (run the yield phase first)",
+    )
+    parser.add_argument(
+        "--yield-prune",
+        action="store_true",
+        help="pre-filter: also skip posts whose sources have proven low yield",
     )
     parser.add_argument(
         "--workers",
@@ -64,8 +132,73 @@ def main():
         default=20,
         help="Concurrent workers for pass2 classification (default: 20)",
     )
+    parser.add_argument(
+        "--reasoning",
+        choices=["auto", "none", "low", "medium", "high"],
+        help="Pass 2 reasoning effort; auto picks it per post (default: per-track setting)",
+    )
+    parser.add_argument(
+        "--track",
+        choices=["fraud", "idv", "dual", "refilter", "comments"],
+        help="reclassify / reclassify-diff: fraud or idv (default: fraud); "
+             "failures / failures-requeue: limit to one track; search: relevant posts of fraud or idv",
+    )
+    parser.add_argument(
+        "--post-id",
+        action="append",
+        help="failures-requeue: requeue this post (repeatable; default: all dead letters)",
+    )
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help="reclassify: requeue only rows whose prompt version is out of date",
+    )
+    parser.add_argument(
+        "--affected-only",
+        action="store_true",
+        help="reclassify: limit to rows whose stored values sit in edited prompt sections",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="reclassify / journal-replay: report what would be written, then exit",
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        metavar="DIMENSION=VALUE",
+        help="search: restrict to a classification value, e.g. industry=banking (repeatable; needs --track)",
+    )
+    parser.add_argument(
+        "--no-comments",
+        action="store_true",
+        help="search: match post titles and bodies only",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="similar-index: refit and re-index every post instead of adding new ones; "
+             "trends: recount every bucket instead of those with newly classified rows; "
+             "export-parquet: rewrite every partition, changed or not",
+    )
+    parser.add_argument(
+        "--reduction",
+        choices=["svd", "random"],
+        default="svd",
+        help="similar-index --rebuild: truncated SVD (LSA) or a random projection (default: svd)",
+    )
+    parser.add_argument(
+        "--stamp-legacy",
+        action="store_true",
+        help="prompt-versions: mark unversioned rows as produced by the current prompt",
+    )
     args = parser.parse_args()
 
+    def reasoning_for(track: str):
+        if args.reasoning is None:
+            return PASS2_REASONING[track]
+        return None if args.reasoning == "none" else args.reasoning
+
     if args.phase == "init":
         log.info("Initializing database schema...")
         init_schema()
@@ -84,29 +217,139 @@ def main():
         }
         tier_funcs[tier_num]()
 
+    elif args.phase == "refresh-metadata":
+        run_refresh(limit=args.limit or 10000)
+
     elif args.phase == "pre-filter":
-        run_pre_filter()
+        run_pre_filter(yield_prune=args.yield_prune)
 
     elif args.phase == "refilter":
-        run_refilter()
+        run_refilter(cascade=args.cascade, by_yield=args.by_yield)
 
     elif args.phase == "refilter-sample":
-        run_refilter(sample_size=args.sample_size)
+        run_refilter(sample_size=args.sample_size, cascade=args.cascade)
+
+    elif args.phase == "refilter-cascade-report":
+        compare_cascade(sample_size=args.sample_size)
 
     elif args.phase == "comments":
         run_comment_collection()
 
     elif args.phase == "pass2-fraud":
         log.info(f"Starting Pass 2 fraud classification ({args.workers} workers)...")
-        run_continuous("fraud", workers=args.workers, reasoning="low")
+        run_continuous("fraud", workers=args.workers, reasoning=reasoning_for("fraud"))
 
     elif args.phase == "pass2-idv":
         log.info(f"Starting Pass 2 IDV classification ({args.workers} workers)...")
-        run_continuous("idv", workers=args.workers, reasoning=None)
+        run_continuous("idv", workers=args.workers, reasoning=reasoning_for("idv"))
+
+    elif args.phase == "pass2-dual":
+        log.info(f"Starting Pass 2 fused fraud+IDV classification ({args.workers} workers)...")
+        run_continuous("dual", workers=args.workers, reasoning=reasoning_for("dual"))
+
+    elif args.phase == "prompt-versions":
+        print_versions(stamp_legacy=args.stamp_legacy)
+
+    elif args.phase in ("reclassify", "reclassify-diff") and args.track not in (None, "fraud", "idv"):
+        parser.error(f"{args.phase} --track must be fraud or idv")
+
+    elif args.phase == "reclassify":
+        if not args.stale:
+            parser.error("reclassify requires --stale (full reruns: delete rows and rerun pass2)")
+        run_reclassify(
+            args.track or "fraud", workers=args.workers, reasoning=reasoning_for(args.track or "fraud"),
+            affected_only=args.affected_only, dry_run=args.dry_run,
+        )
+
+    elif args.phase == "reclassify-diff":
+        diff_report(args.track or "fraud")
+
+    elif args.phase == "journal-replay":
+        journal_replay(dry_run=args.dry_run)
+
+    elif args.phase == "failures":
+        print_failures(args.track)
+
+    elif args.phase == "failures-requeue":
+        requeue(args.track, args.post_id)
+
+    elif args.phase == "export-requests":
+        if args.target not in JOBS:
+            parser.error(f"export-requests needs a job: {', '.join(JOBS)}")
+        track = args.target.split("-", 1)[-1]
+        reasoning = reasoning_for(track) if track in PASS2_REASONING else None
+        export_requests(args.target, limit=args.limit or 10000, reasoning=reasoning)
+
+    elif args.phase == "ingest-results":
+        if not args.target:
+            parser.error("ingest-results needs the result JSONL path")
+        ingest_results(args.target)
+
+    elif args.phase == "yield":
+        refresh_yields()
+        print_yield_report()
+
+    elif args.phase == "cube-rebuild":
+        for track in ("fraud", "idv"):
+            result = rebuild_classification_cube(track)
+            log.info(f"classification_cube [{track}]: {result['cells']} cells, "
+                     f"{result['drifted']} differed from the incremental counts")
+
+    elif args.phase == "tags-backfill":
+        for track in ("fraud", "idv"):
+            added = backfill_classification_tags(track)
+            result = rebuild_classification_cube(track)
+            log.info(f"classification_tags [{track}]: {added} rows added; "
+                     f"tag counts rebuilt ({result['cells']} cube cells)")
+
+    elif args.phase == "trends":
+        refresh_trends(rebuild=args.rebuild)
+
+    elif args.phase == "export-snapshot":
+        export_snapshot()
+
+    elif args.phase == "export-parquet":
+        try:
+            export_parquet(rebuild=args.rebuild)
+        except RuntimeError as e:  # pyarrow missing
+            parser.error(str(e))
+
+    elif args.phase == "search":
+        if not args.target:
+            parser.error("search needs a query")
+        if args.track not in (None, "fraud", "idv"):
+            parser.error("search --track must be fraud or idv")
+        try:
+            print_search(args.target, track=args.track, filters=parse_filters(args.filter),
+                         limit=args.limit or 20, comments=not args.no_comments)
+        except ValueError as e:
+            parser.error(str(e))
+
+    elif args.phase in ("similar-index", "similar"):
+        if args.phase == "similar" and not args.target:
+            parser.error("similar needs a post_id")
+        try:
+            if args.phase == "similar-index":
+                update_similar_index(rebuild=args.rebuild, reduction=args.reduction)
+            else:
+                print_similar(args.target, k=args.limit or 10)
+        except RuntimeError as e:  # numpy missing, or no index built yet
+            parser.error(str(e))
 
     elif args.phase == "stats":
         print_stats()
 
+    # Fold newly classified rows into the trend rollups before invalidating the cache
+    if args.phase in CLASSIFICATION_PHASES and not args.dry_run:
+        refresh_trends()
+
+    if args.phase in DATA_VERSION_PHASES and not args.dry_run:
+        log.info(f"data_version bumped to {bump_data_version(args.phase)}")
+
+    # Keep a published dashboard snapshot in step with data_version
+    if args.phase in DATA_VERSION_PHASES and not args.dry_run and has_snapshot():
+        export_snapshot()
+
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,14 @@
 """Pre-filter posts before sending to LLM.
 
 Cheaply eliminates obviously unusable posts (deleted content, negative score)
-to save LLM API calls.
+to save LLM API calls. With yield_prune, also skips posts whose sources are
+proven low-yield (see yield_model.py).
 """
 
+from collections import defaultdict
+
 from backend.db import get_posts_for_prefilter, mark_pre_filtered
+from backend.yield_model import LOW_YIELD_REASON, load_yields, is_low_yield
 from backend.utils import setup_logger
 
 log = setup_logger("pre_filter")
@@ -13,12 +17,15 @@ log = setup_logger("pre_filter")
 SKIP_TITLES = {"[deleted]", "[removed]", ""}
 
 
-def run_pre_filter():
+def run_pre_filter(yield_prune: bool = False):
     """Mark posts that should skip LLM filtering."""
     rows = get_posts_for_prefilter()
+    yields = load_yields() if yield_prune else None
+    if yield_prune and not yields:
+        log.warning("source_yield is empty; run the yield phase first. Skipping yield pruning.")
 
-    to_skip = []
-    reasons = {"deleted_content": 0, "negative_score": 0, "no_text_content": 0}
+    to_skip = defaultdict(list)
+    reasons = {"deleted_content": 0, "negative_score": 0, "no_text_content": 0, LOW_YIELD_REASON: 0}
 
     for row in rows:
         title = (row["title"] or "").strip()
@@ -27,31 +34,40 @@ def run_pre_filter():
 
         # Skip if title is deleted/empty AND body is also empty/deleted
         if title in SKIP_TITLES and body in ("[deleted]", "[removed]", ""):
-            to_skip.append(row["post_id"])
+            to_skip["deleted_content"].append(row["post_id"])
             reasons["deleted_content"] += 1
             continue
 
         # Skip posts with negative score (community-rejected)
         if score < 0:
-            to_skip.append(row["post_id"])
+            to_skip["negative_score"].append(row["post_id"])
             reasons["negative_score"] += 1
             continue
 
         # Skip image/link/video posts with no body text AND short title
         # (not enough content for LLM to meaningfully classify)
         if body in ("", "[deleted]", "[removed]") and len(title) < 30:
-            to_skip.append(row["post_id"])
+            to_skip["no_text_content"].append(row["post_id"])
             reasons["no_text_content"] += 1
             continue
 
-    if to_skip:
-        mark_pre_filtered(to_skip)
+        # Skip posts whose subreddit, source and query all have proven low yield
+        if yields and is_low_yield(yields, row):
+            to_skip[LOW_YIELD_REASON].append(row["post_id"])
+            reasons[LOW_YIELD_REASON] += 1
+            continue
+
+    for reason, post_ids in to_skip.items():
+        mark_pre_filtered(post_ids, reason)
 
-    log.info(f"Pre-filter complete: {len(to_skip)} posts filtered out of {len(rows)} checked")
+    skipped = sum(reasons.values())
+    log.info(f"Pre-filter complete: {skipped} posts filtered out of {len(rows)} checked")
     for reason, count in reasons.items():
         if count > 0:
             log.info(f"  {reason}: {count}")
-    return len(to_skip)
+    if reasons[LOW_YIELD_REASON]:
+        log.info(f"  Pass 1 LLM calls avoided by yield pruning: {reasons[LOW_YIELD_REASON]}")
+    return skipped
 
 
 if __name__ == "__main__":
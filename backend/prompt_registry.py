@@ -0,0 +1,127 @@
+"""Prompt/model version registry for Pass 2.
+
+A prompt version is a short hash of everything that shapes a classification:
+the system prompt text, the Pydantic schema it is validated against, and the
+model. Every classification row records the version that produced it, so a
+prompt edit only requires reclassifying rows whose version is out of date.
+
+Besides the overall version, each prompt is split into per-field sections
+(the "fraud_type — ..." header and its "  value: description" lines) and
+every section and enum value gets its own hash. Comparing two versions'
+field hashes tells which fields, and which enum values, an edit touched.
+"""
+
+import hashlib
+import json
+import re
+
+from pydantic import BaseModel
+
+# Enum values that absorb posts when a more specific value is added
+CATCH_ALL_VALUES = ("other", "unknown", "unspecified", "none")
+
+# Pseudo-field holding prompt text that isn't under any field heading
+PREAMBLE = "_preamble"
+
+_FIELD_HEADER = re.compile(r"^(\w+)\s*(?:—|:)\s")
+_VALUE_LINE = re.compile(r"^\s+(\w+):\s")
+
+
+def _hash(*parts: str, length: int = 12) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:length]
+
+
+def _field_sections(system_prompt: str, fields: set[str]) -> dict[str, dict[str, list[str]]]:
+    """Split a prompt into {field: {"_field": header lines, value: lines}}."""
+    sections = {PREAMBLE: {"_field": []}}
+    field, value = PREAMBLE, "_field"
+
+    for line in system_prompt.splitlines():
+        header = _FIELD_HEADER.match(line)
+        if header and header.group(1) in fields:
+            field, value = header.group(1), "_field"
+            sections.setdefault(field, {"_field": []})
+        elif field != PREAMBLE and (m := _VALUE_LINE.match(line)):
+            value = m.group(1)
+        elif not line.startswith(" ") and line.strip():
+            # Unindented prose after a field block belongs to the preamble
+            field, value = PREAMBLE, "_field"
+        sections[field].setdefault(value, []).append(line)
+
+    return sections
+
+
+def field_hashes(system_prompt: str, models: list[type[BaseModel]]) -> dict[str, dict[str, str]]:
+    """Hash each field section (and each enum value line) of a prompt."""
+    fields = {f for m in models for f in m.model_fields}
+    schemas = {}
+    for m in models:
+        for name, prop in m.model_json_schema().get("properties", {}).items():
+            # Enum membership is tracked by the value lines, not the field hash
+            prop = {k: v for k, v in prop.items() if k != "enum"}
+            schemas.setdefault(name, []).append(json.dumps(prop, sort_keys=True))
+
+    hashes = {}
+    for field, parts in _field_sections(system_prompt, fields).items():
+        hashes[field] = {
+            value: _hash("\n".join(lines), *(schemas.get(field, []) if value == "_field" else []))
+            for value, lines in parts.items()
+        }
+    return hashes
+
+
+def build_version(track: str, system_prompt: str, models: list[type[BaseModel]],
+                  llm_model: str) -> dict:
+    """Describe one prompt version. `version` is what classification rows store."""
+    schema = json.dumps([m.model_json_schema() for m in models], sort_keys=True)
+    prompt_hash = _hash(system_prompt)
+    schema_hash = _hash(schema)
+    return {
+        "version": f"{track}-{_hash(prompt_hash, schema_hash, llm_model, length=10)}",
+        "track": track,
+        "llm_model": llm_model,
+        "prompt_hash": prompt_hash,
+        "schema_hash": schema_hash,
+        "field_hashes": field_hashes(system_prompt, models),
+        "system_prompt": system_prompt,
+    }
+
+
+def changed_fields(old_hashes: dict | None, new_hashes: dict,
+                   fields: list[str]) -> dict[str, list[str] | None]:
+    """Which of `fields` an edit could have changed, and for which stored values.
+
+    Returns {field: values} where values is the list of stored enum values whose
+    rows are likely to change, or None meaning every row may change (field
+    header edited, freeform field, unknown old version, or preamble edited).
+    Fields absent from the result are unaffected.
+    """
+    if not old_hashes or old_hashes.get(PREAMBLE) != new_hashes.get(PREAMBLE):
+        return {f: None for f in fields}
+
+    result = {}
+    for field in fields:
+        old, new = old_hashes.get(field, {}), new_hashes.get(field, {})
+        if old == new:
+            continue
+        if old.get("_field") != new.get("_field"):
+            result[field] = None
+            continue
+
+        old_values = set(old) - {"_field"}
+        new_values = set(new) - {"_field"}
+        if not old_values and not new_values:
+            result[field] = None
+            continue
+
+        values = {v for v in old_values & new_values if old[v] != new[v]}  # reworded
+        values |= old_values - new_values                                  # removed
+        if new_values - old_values:                                        # added
+            values |= {v for v in CATCH_ALL_VALUES if v in old_values}
+        result[field] = sorted(values)
+
+    return result
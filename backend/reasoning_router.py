@@ -0,0 +1,138 @@
+"""Per-post reasoning-effort routing for Pass 2.
+
+Reasoning effort used to be fixed per track. With `--reasoning auto`, each post
+gets an effort from cheap features, known before any LLM call:
+
+    - body length in tokens (long posts bury the signal)
+    - comment count (busy threads often add or contradict details)
+    - enum candidates: how many values of the track's main field the text
+      matches by keyword (two or more = ambiguous, none = unclear)
+    - Pass 1 confidence (low confidence = borderline post)
+
+Each feature that fires adds a point. 0 points means no reasoning, 1-2 means
+"low", and 3+ means "medium". A validation failure retries one level higher,
+up to "high". Every call is logged to ROUTER_LOG as a JSONL row (features,
+effort, latency, outcome), and print_router_stats() summarizes latency and
+validity per effort level, so the thresholds below can be tuned.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Literal, get_args, get_origin
+
+from backend.compaction import count_tokens
+from backend.enum_repair import FIELD_ALIASES
+from backend.utils import setup_logger
+
+log = setup_logger("reasoning_router")
+
+AUTO = "auto"
+LEVELS = [None, "low", "medium", "high"]
+
+LONG_BODY_TOKENS = 600
+BUSY_THREAD_COMMENTS = 50
+LOW_PASS1_CONFIDENCE = 0.85
+ROUTER_LOG = os.getenv("ROUTER_LOG", "logs/reasoning_router.jsonl")
+
+# Field whose candidate count signals ambiguity, per track
+ROUTED_FIELDS = {"fraud": ["fraud_type"], "idv": ["friction_type"],
+                 "dual": ["fraud_type", "friction_type"]}
+
+# Values that never count as candidates (catch-alls)
+_IGNORED_VALUES = {"other", "unknown", "none", "unspecified"}
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"calls": 0, "valid": 0, "latency": 0.0})
+_keyword_patterns = {}
+
+
+def _build_patterns(models: list) -> dict[str, dict[str, re.Pattern]]:
+    """{field: {value: regex}} from each Literal value plus its known aliases."""
+    patterns = {}
+    for model_cls in models:
+        for field, info in model_cls.model_fields.items():
+            if get_origin(info.annotation) is not Literal:
+                continue
+            aliases = FIELD_ALIASES.get(field, {})
+            for value in get_args(info.annotation):
+                if value in _IGNORED_VALUES:
+                    continue
+                words = [value] + [a for a, target in aliases.items() if target == value]
+                phrases = [re.escape(w.replace("_", " ")).replace(r"\ ", r"[\s_-]?") for w in words]
+                patterns.setdefault(field, {})[value] = re.compile(
+                    r"\b(" + "|".join(phrases) + r")", re.IGNORECASE)
+    return patterns
+
+
+def register_models(models: list):
+    """Build keyword patterns for the Pass 2 models (called once by pass2_classifier)."""
+    _keyword_patterns.update(_build_patterns(models))
+
+
+def enum_candidates(text: str, field: str) -> list[str]:
+    return [v for v, pattern in _keyword_patterns.get(field, {}).items() if pattern.search(text)]
+
+
+def features(track: str, post: dict) -> dict:
+    text = f"{post.get('title') or ''}\n{post.get('selftext') or ''}"
+    candidates = {f: enum_candidates(text, f) for f in ROUTED_FIELDS[track]}
+    return {
+        "body_tokens": count_tokens(post.get("selftext") or ""),
+        "num_comments": post.get("num_comments") or 0,
+        "candidates": candidates,
+        "pass1_confidence": post.get("refilter_confidence"),
+    }
+
+
+def choose_effort(track: str, post: dict) -> str | None:
+    f = features(track, post)
+    score = 0
+    score += f["body_tokens"] > LONG_BODY_TOKENS
+    score += f["num_comments"] > BUSY_THREAD_COMMENTS
+    score += any(len(c) >= 2 for c in f["candidates"].values())
+    score += all(not c for c in f["candidates"].values())
+    score += f["pass1_confidence"] is not None and f["pass1_confidence"] < LOW_PASS1_CONFIDENCE
+    effort = None if score == 0 else "low" if score <= 2 else "medium"
+    post["_router"] = {"score": score, **f}
+    return effort
+
+
+def escalate(effort: str | None) -> str | None:
+    """One effort level higher (stays at the top level)."""
+    return LEVELS[min(LEVELS.index(effort) + 1, len(LEVELS) - 1)]
+
+
+def record(track: str, post: dict, effort: str | None, latency: float, outcome: str):
+    """Count one call and append it to ROUTER_LOG. outcome: valid / invalid / no_response."""
+    key = (track, effort or "none")
+    with _lock:
+        s = _stats[key]
+        s["calls"] += 1
+        s["valid"] += outcome == "valid"
+        s["latency"] += latency
+        try:
+            os.makedirs(os.path.dirname(ROUTER_LOG) or ".", exist_ok=True)
+            with open(ROUTER_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "ts": time.time(), "track": track, "post_id": post.get("post_id"),
+                    "effort": effort, "latency": round(latency, 2), "outcome": outcome,
+                    "features": post.get("_router"),
+                }) + "\n")
+        except OSError as e:
+            log.warning(f"Could not write {ROUTER_LOG}: {e}")
+
+
+def print_router_stats():
+    with _lock:
+        stats = {k: dict(v) for k, v in _stats.items()}
+    if not stats:
+        return
+    print("Reasoning effort (calls | valid | mean latency):")
+    for (track, effort), s in sorted(stats.items(), key=lambda kv: (kv[0][0], LEVELS.index(
+            None if kv[0][1] == "none" else kv[0][1]))):
+        print(f"  {track:<6} {effort:<7} {s['calls']:>6} | {s['valid'] / s['calls'] * 100:5.1f}% | "
+              f"{s['latency'] / s['calls']:.1f}s")
@@ -0,0 +1,148 @@
+"""Incremental Pass 2 reclassification after prompt or schema edits.
+
+Each classification row records the prompt version that produced it
+(see prompt_registry). When a prompt changes, only rows with an outdated
+version are requeued; with --affected-only, only rows whose stored values sit
+in a field section the edit actually touched. Old rows are archived to
+classification_history in the same transaction that overwrites them, which
+powers the before/after diff report.
+
+Usage:
+    python -m backend.pipeline prompt-versions                        # Versions and row counts
+    python -m backend.pipeline prompt-versions --stamp-legacy         # Adopt unversioned rows
+    python -m backend.pipeline reclassify --track fraud --stale --dry-run
+    python -m backend.pipeline reclassify --track fraud --stale --affected-only
+    python -m backend.pipeline reclassify-diff --track fraud
+"""
+
+import os
+from collections import Counter
+
+from backend.db import (
+    register_prompt_versions, get_prompt_field_hashes, get_prompt_version_counts,
+    stamp_legacy_prompt_version, get_stale_prompt_versions, count_stale_classifications,
+    fetch_stale_for_reclassify, get_reclassification_pairs,
+)
+from backend.eval_pass2 import EVAL_DIR, normalize_value
+from backend.pass2_classifier import (
+    PROMPT_VERSIONS, FraudClassification, IDVClassification, run_continuous,
+)
+from backend.prompt_registry import changed_fields
+from backend.utils import setup_logger
+
+log = setup_logger("reclassify")
+
+TRACK_FIELDS = {
+    "fraud": [f for f in FraudClassification.model_fields],
+    "idv": [f for f in IDVClassification.model_fields],
+}
+
+
+def current_versions(track: str) -> list[str]:
+    """Versions that count as up to date for a table (its own prompt or the fused one)."""
+    return [PROMPT_VERSIONS[track]["version"], PROMPT_VERSIONS["dual"]["version"]]
+
+
+def build_scope(track: str) -> dict:
+    """Map each stale version to the fields/values its rows could change in.
+
+    Old versions are compared against the current version of the same prompt
+    family (fused rows against the current fused prompt), so wrapper text does
+    not make every field look edited.
+    """
+    stale = get_stale_prompt_versions(track, current_versions(track))
+    known = get_prompt_field_hashes([v for v in stale if v])
+
+    scope = {}
+    for version in stale:
+        family = "dual" if version and version.startswith("dual-") else track
+        scope[version] = changed_fields(
+            known.get(version), PROMPT_VERSIONS[family]["field_hashes"], TRACK_FIELDS[track],
+        )
+    return scope
+
+
+def print_versions(stamp_legacy: bool = False):
+    register_prompt_versions(list(PROMPT_VERSIONS.values()))
+    log.info("Current prompt versions:")
+    for track, v in PROMPT_VERSIONS.items():
+        log.info(f"  {track:<6} {v['version']}  (prompt {v['prompt_hash']}, schema {v['schema_hash']})")
+
+    for track in ("fraud", "idv"):
+        if stamp_legacy:
+            stamped = stamp_legacy_prompt_version(track, PROMPT_VERSIONS[track]["version"])
+            log.info(f"Stamped {stamped} unversioned {track} rows as {PROMPT_VERSIONS[track]['version']}")
+
+        current = set(current_versions(track))
+        log.info(f"{track} rows by prompt version:")
+        for row in get_prompt_version_counts(track):
+            state = "current" if row["prompt_version"] in current else "STALE"
+            log.info(f"  {str(row['prompt_version']):<18} {row['cnt']:>7}  {state}  "
+                     f"(last classified {row['last_classified']})")
+
+
+def run_reclassify(track: str, workers: int = 20, reasoning: str = None,
+                   affected_only: bool = False, dry_run: bool = False):
+    """Requeue and reclassify stale rows for one track, then print the diff report."""
+    register_prompt_versions(list(PROMPT_VERSIONS.values()))
+    current = current_versions(track)
+    scope = build_scope(track) if affected_only else None
+
+    total_stale = count_stale_classifications(track, current)
+    selected = count_stale_classifications(track, current, scope)
+    log.info(f"{track}: {total_stale} stale rows, {selected} selected for reclassification")
+    if scope:
+        for version, fields in scope.items():
+            summary = ", ".join(
+                f"{f}={'*' if v is None else '|'.join(v) or '-'}" for f, v in fields.items()
+            ) or "no affected fields"
+            log.info(f"  from {version}: {summary}")
+
+    if dry_run or selected == 0:
+        return selected
+
+    run_continuous(
+        track, workers=workers, reasoning=reasoning, exit_when_empty=True,
+        source=lambda n: fetch_stale_for_reclassify(track, current, n, scope),
+    )
+    diff_report(track)
+    return selected
+
+
+def diff_report(track: str, version: str = None):
+    """Before/after field changes for rows reclassified into `version` (default: current)."""
+    version = version or PROMPT_VERSIONS[track]["version"]
+    pairs = get_reclassification_pairs(track, version)
+    fields = [f for f in TRACK_FIELDS[track] if f not in ("notable_quote", "tags")]
+
+    lines = [f"# Reclassification Diff: {track} → {version}", "",
+             f"{len(pairs)} reclassified posts", "",
+             "| Field | Changed | Rate |", "|-------|---------|------|"]
+    transitions = {f: Counter() for f in fields}
+    for field in fields:
+        changed = 0
+        for p in pairs:
+            before = normalize_value(p["before"].get(field))
+            after = normalize_value(p["after"].get(field))
+            if before != after:
+                changed += 1
+                transitions[field][(before, after)] += 1
+        rate = changed / len(pairs) * 100 if pairs else 0
+        lines.append(f"| {field} | {changed} | {rate:.1f}% |")
+
+    for field in fields:
+        if not transitions[field]:
+            continue
+        lines += ["", f"### {field} transitions", "", "| Before | After | Posts |",
+                  "|--------|-------|-------|"]
+        for (before, after), n in transitions[field].most_common(15):
+            lines.append(f"| {before} | {after} | {n} |")
+
+    for line in lines:
+        print(line)
+
+    os.makedirs(EVAL_DIR, exist_ok=True)
+    path = os.path.join(EVAL_DIR, f"reclassify_{track}_{version}.md")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    print(f"\nReport saved to {path}")
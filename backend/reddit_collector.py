@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 import httpx
 from backend.config import REDDIT_BASE_URL, REDDIT_USER_AGENT, REDDIT_REQUEST_DELAY
 from backend.db import insert_posts_batch, start_run, finish_run
+from backend.yield_model import load_yields, plan_targets, log_plan
 from backend.utils import setup_logger
 
 log = setup_logger("reddit_collector")
@@ -25,11 +26,11 @@ def _get_client() -> httpx.Client:
     return _client
 
 
-def _reddit_get(url: str, params: dict = None) -> dict | None:
-    """Make a GET request to Reddit's .json endpoint.
+def _reddit_request(url: str, params: dict = None) -> httpx.Response | None:
+    """GET a Reddit .json endpoint, waiting out one 429.
 
     Returns:
-        dict: successful response
+        httpx.Response: status 200, body not yet parsed
         None: error (logged)
     """
     client = _get_client()
@@ -48,6 +49,23 @@ def _reddit_get(url: str, params: dict = None) -> dict | None:
             log.error(f"HTTP {resp.status_code} for {url}: {resp.text[:200]}")
             return None
 
+        return resp
+    except Exception as e:
+        log.error(f"Request failed for {url}: {e}")
+        return None
+
+
+def _reddit_get(url: str, params: dict = None) -> dict | None:
+    """Make a GET request to Reddit's .json endpoint.
+
+    Returns:
+        dict: successful response
+        None: error (logged)
+    """
+    resp = _reddit_request(url, params)
+    if resp is None:
+        return None
+    try:
         return resp.json()
     except Exception as e:
         log.error(f"Request failed for {url}: {e}")
@@ -248,8 +266,11 @@ def collect_tier2():
     total_fetched = 0
     failed = 0
 
-    for sub_name, queries in TIER2_SEARCHES.items():
-        for query in queries:
+    yields = load_yields()
+    for sub_name, _ in plan_targets(yields, list(TIER2_SEARCHES), "subreddit"):
+        plan = plan_targets(yields, TIER2_SEARCHES[sub_name])
+        log_plan("tier2_search", plan, 10)
+        for query, pages in plan:
             for sort in ["relevance", "top"]:
                 url = f"{REDDIT_BASE_URL}/r/{sub_name}/search.json"
                 params = {
@@ -265,7 +286,7 @@ def collect_tier2():
 
                 try:
                     posts = _paginated_fetch(url, params, source,
-                                             search_query=query, max_pages=10)
+                                             search_query=query, max_pages=pages)
                     total_fetched += len(posts)
                     if posts:
                         inserted = insert_posts_batch(posts)
@@ -291,7 +312,9 @@ def collect_tier3():
     total_fetched = 0
     failed = 0
 
-    for query in GLOBAL_SEARCH_QUERIES:
+    plan = plan_targets(load_yields(), GLOBAL_SEARCH_QUERIES)
+    log_plan("tier3_global", plan, 10)
+    for query, pages in plan:
         url = f"{REDDIT_BASE_URL}/search.json"
         params = {
             "q": query,
@@ -304,7 +327,7 @@ def collect_tier3():
 
         try:
             posts = _paginated_fetch(url, params, "search_global",
-                                     search_query=query, max_pages=10)
+                                     search_query=query, max_pages=pages)
             total_fetched += len(posts)
             if posts:
                 inserted = insert_posts_batch(posts)
@@ -389,7 +412,9 @@ def _collect_global_queries(queries: list[str], tier_name: str, source_tag: str)
     total_fetched = 0
     failed = 0
 
-    for query in queries:
+    plan = plan_targets(load_yields(), queries)
+    log_plan(tier_name, plan, 10)
+    for query, pages in plan:
         url = f"{REDDIT_BASE_URL}/search.json"
         params = {
             "q": query,
@@ -402,7 +427,7 @@ def _collect_global_queries(queries: list[str], tier_name: str, source_tag: str)
 
         try:
             posts = _paginated_fetch(url, params, source_tag,
-                                     search_query=query, max_pages=10)
+                                     search_query=query, max_pages=pages)
             total_fetched += len(posts)
             if posts:
                 inserted = insert_posts_batch(posts)
@@ -508,8 +533,11 @@ def _collect_subreddit_keyword_searches(subreddit_searches: dict, tier_name: str
     total_fetched = 0
     failed = 0
 
-    for sub_name, queries in subreddit_searches.items():
-        for query in queries:
+    yields = load_yields()
+    for sub_name, _ in plan_targets(yields, list(subreddit_searches), "subreddit"):
+        plan = plan_targets(yields, subreddit_searches[sub_name])
+        log_plan(tier_name, plan, 10)
+        for query, pages in plan:
             url = f"{REDDIT_BASE_URL}/r/{sub_name}/search.json"
             params = {
                 "q": query,
@@ -524,7 +552,7 @@ def _collect_subreddit_keyword_searches(subreddit_searches: dict, tier_name: str
 
             try:
                 posts = _paginated_fetch(url, params, source,
-                                         search_query=query, max_pages=10)
+                                         search_query=query, max_pages=pages)
                 total_fetched += len(posts)
                 if posts:
                     inserted = insert_posts_batch(posts)
@@ -562,7 +590,9 @@ def _collect_mixed_tier(subreddit_searches: dict, global_queries: list[str],
 
     # Part 2: Global queries
     if global_queries:
-        for query in global_queries:
+        plan = plan_targets(load_yields(), global_queries)
+        log_plan(tier_name, plan, 10)
+        for query, pages in plan:
             url = f"{REDDIT_BASE_URL}/search.json"
             params = {
                 "q": query,
@@ -575,7 +605,7 @@ def _collect_mixed_tier(subreddit_searches: dict, global_queries: list[str],
 
             try:
                 posts = _paginated_fetch(url, params, f"{source_tag}_global",
-                                         search_query=query, max_pages=10)
+                                         search_query=query, max_pages=pages)
                 total_fetched += len(posts)
                 if posts:
                     inserted = insert_posts_batch(posts)
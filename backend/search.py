@@ -0,0 +1,49 @@
+"""Full-text search over the corpus (post titles/bodies and comments).
+
+Backed by generated tsvector columns with GIN indexes (raw_posts.search_tsv,
+comments.body_tsv), so a query is an index lookup rather than a table scan.
+Queries use web search syntax: words, "quoted phrases", `or`, and -exclusions.
+
+Usage:
+    python -m backend.pipeline search "selfie rejected"
+    python -m backend.pipeline search "account takeover" --track fraud --filter industry=banking
+    python -m backend.pipeline search '"sim swap" -tmobile' --track fraud --limit 50 --no-comments
+"""
+
+import time
+
+from backend.db import search_posts
+from backend.utils import setup_logger
+
+log = setup_logger("search")
+
+
+def parse_filters(pairs: list[str] | None) -> dict:
+    """["dim=value", ...] -> {dim: value}."""
+    filters = {}
+    for pair in pairs or []:
+        dim, sep, value = pair.partition("=")
+        if not sep or not dim or not value:
+            raise ValueError(f"--filter expects dimension=value, got {pair!r}")
+        filters[dim.strip()] = value.strip()
+    return filters
+
+
+def print_search(query: str, track: str = None, filters: dict = None, limit: int = 20,
+                 comments: bool = True):
+    start = time.time()
+    hits = search_posts(query, track=track, filters=filters, limit=limit, comments=comments)
+    elapsed = (time.time() - start) * 1000
+
+    scope = f" in relevant {track} posts" if track else ""
+    if filters:
+        scope += " where " + ", ".join(f"{d}={v}" for d, v in filters.items())
+    print(f"{len(hits)} results for {query!r}{scope} ({elapsed:.0f} ms)\n")
+
+    for i, h in enumerate(hits, 1):
+        print(f"{i:>3}. [{h['rank']:.3f}] r/{h['subreddit']} | {h['score'] or 0} pts | "
+              f"{h['created_utc']:%Y-%m-%d} | {h['title'][:100]}")
+        print(f"     {h['snippet']}")
+        if h["comment_snippet"]:
+            print(f"     comment: {h['comment_snippet']}")
+        print(f"     https://reddit.com{h['permalink']}\n")
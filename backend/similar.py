@@ -0,0 +1,489 @@
+"""Similar posts: a local TF-IDF / LSA vector index with approximate nearest neighbours.
+
+Each Pass 1 relevant post (is_fraud or is_idv) becomes a vector built from its
+title (counted twice), body and top comments:
+
+    hashed TF-IDF    unigrams and bigrams hashed into N_FEATURES buckets,
+                     sublinear tf, smoothed idf, unit length
+    LSA projection   truncated SVD fit on up to FIT_SAMPLE posts, DIM dimensions
+                     (--reduction random: a Gaussian random projection, no fit)
+    unit length      so cosine similarity is a dot product
+
+Vectors are stored as float16 and read through a memory map. Random-hyperplane
+LSH (LSH_TABLES tables of LSH_BITS bits) narrows a lookup to the posts sharing
+a bucket with the query in any table, probing buckets one bit away when that
+finds too few. The candidates are re-ranked by exact cosine, so once the index
+is open similar() takes a few milliseconds.
+
+similar-index is incremental: new posts, and posts whose comments arrived
+after they were indexed, are vectorized with the stored idf and projection and
+appended; a re-indexed post's older row is ignored. The fit is not updated, so
+the phase logs a hint to --rebuild once the corpus has doubled since the fit.
+
+Index files (INDEX_DIR, not committed):
+    meta.json       settings and row count (written last, so a crashed append is discarded)
+    df.npy          document frequency per hashed feature
+    projection.npy  N_FEATURES x DIM projection
+    planes.npy      LSH hyperplanes
+    vectors.f16     DIM float16 per row, append-only
+    codes.u16       LSH_TABLES bucket codes per row, append-only
+    rows.tsv        post_id and whether its comments had been fetched, one line per row
+
+Needs numpy; the other phases do not.
+
+Usage:
+    python -m backend.pipeline similar-index                       # Index new and changed posts
+    python -m backend.pipeline similar-index --rebuild             # Refit and re-index everything
+    python -m backend.pipeline similar-index --rebuild --reduction random
+    python -m backend.pipeline similar <post_id> --limit 20
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:  # only the similar phases need it
+    np = None
+
+from backend.db import get_similarity_candidates, get_similarity_texts, get_post_summaries
+from backend.utils import setup_logger
+
+log = setup_logger("similar")
+
+INDEX_DIR = "similar_index"
+FORMAT_VERSION = 1
+
+N_FEATURES = 2 ** 17
+DIM = 128
+LSH_TABLES = 8
+LSH_BITS = 12           # 4096 buckets per table
+MIN_CANDIDATES = 200    # below this, also probe the buckets one bit away
+FIT_SAMPLE = 50_000     # SVD is fit on at most this many posts
+COMMENTS_PER_POST = 5
+FETCH_BATCH = 1000
+SEED = 1729
+
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_TOKEN = re.compile(r"[a-z0-9$]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset("""
+    a about after all also am an and any are as at be been before but by can could did do does
+    doing don't for from get got had has have he her here him his how i i'm if in into is it it's
+    its just me more my no not now of on one only or other our out over she so some than that the
+    their them then there they this to too up us very was we were what when where which while who
+    why will with would you your
+""".split())
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The similar-posts index needs numpy (pip install -r requirements.txt)")
+
+
+# ============================================================
+# Vectorizing
+# ============================================================
+
+def _terms(post: dict) -> list[str]:
+    text = " ".join([post["title"] or ""] * 2 + [post["selftext"] or "", post["comments"] or ""])
+    words = [w for w in _TOKEN.findall(_URL.sub(" ", text.lower())) if w not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _term_counts(post: dict) -> dict[int, int]:
+    """Hashed feature -> count. crc32 rather than hash(), which is salted per process."""
+    counts = {}
+    for term in _terms(post):
+        feature = zlib.crc32(term.encode("utf-8")) & (N_FEATURES - 1)
+        counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+
+class _Rows:
+    """Posts as a CSR matrix over the hashed features (every row non-empty)."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr, self.indices, self.data = indptr, indices, data
+        self.n = len(indptr) - 1
+
+    @classmethod
+    def from_posts(cls, posts: list[dict]) -> tuple["_Rows", list[dict]]:
+        """Sublinear term frequencies of the posts that have any terms, and those posts."""
+        kept, indptr, indices, data = [], [0], [], []
+        for post in posts:
+            counts = _term_counts(post)
+            if counts:
+                kept.append(post)
+                indices.extend(counts)
+                data.extend(counts.values())
+                indptr.append(len(indices))
+        data = np.asarray(data, dtype=np.float32)
+        return cls(np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int32),
+                   1 + np.log(data)), kept
+
+    def take(self, rows) -> "_Rows":
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        nnz = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        return _Rows(np.concatenate([[0], np.cumsum(ends - starts)]),
+                     self.indices[nnz], self.data[nnz])
+
+    def document_frequency(self):
+        return np.bincount(self.indices, minlength=N_FEATURES).astype(np.int64)
+
+    def weight(self, idf):
+        """Scale by idf and normalize each row to unit length (in place)."""
+        self.data = self.data * idf[self.indices]
+        norms = np.sqrt(np.add.reduceat(self.data ** 2, self.indptr[:-1]))
+        self.data /= np.repeat(norms, np.diff(self.indptr))
+
+    def dot(self, dense, chunk_rows: int = 512):
+        """self @ dense, a few hundred rows at a time to bound memory."""
+        out = np.empty((self.n, dense.shape[1]), dtype=np.float32)
+        for start in range(0, self.n, chunk_rows):
+            end = min(start + chunk_rows, self.n)
+            lo, hi = self.indptr[start], self.indptr[end]
+            products = self.data[lo:hi, None] * dense[self.indices[lo:hi]]
+            out[start:end] = np.add.reduceat(products, self.indptr[start:end] - lo, axis=0)
+        return out
+
+    def tdot(self, dense, chunk_nnz: int = 200_000):
+        """self.T @ dense, summing the entries of each feature in column order."""
+        order = np.argsort(self.indices, kind="stable")
+        features = self.indices[order]
+        rows = np.repeat(np.arange(self.n), np.diff(self.indptr))[order]
+        data = self.data[order]
+        present, starts = np.unique(features, return_index=True)
+
+        out = np.zeros((N_FEATURES, dense.shape[1]), dtype=np.float32)
+        first = 0
+        while first < len(present):
+            last = max(first + 1, int(np.searchsorted(starts, starts[first] + chunk_nnz)))
+            lo = starts[first]
+            hi = starts[last] if last < len(present) else len(features)
+            products = data[lo:hi, None] * dense[rows[lo:hi]]
+            out[present[first:last]] = np.add.reduceat(products, starts[first:last] - lo, axis=0)
+            first = last
+        return out
+
+
+def _idf(df, documents: int):
+    return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+
+def _fit_svd(rows: _Rows, rng):
+    """N_FEATURES x DIM truncated-SVD projection (randomized, two power iterations)."""
+    width = DIM + 10
+    q, _ = np.linalg.qr(rows.dot(rng.standard_normal((N_FEATURES, width), dtype=np.float32)))
+    for _ in range(2):
+        z, _ = np.linalg.qr(rows.tdot(q))
+        q, _ = np.linalg.qr(rows.dot(z))
+    _, _, vt = np.linalg.svd(rows.tdot(q).T, full_matrices=False)
+    return np.ascontiguousarray(vt[:DIM].T, dtype=np.float32)
+
+
+def _random_projection(rng):
+    return (rng.standard_normal((N_FEATURES, DIM), dtype=np.float32) / np.sqrt(DIM)).astype(np.float32)
+
+
+def _project(rows: _Rows, projection):
+    vectors = rows.dot(projection)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _codes(vectors, planes):
+    """One LSH_BITS-bit bucket code per table for each vector."""
+    bits = (vectors @ planes.T > 0).reshape(len(vectors), LSH_TABLES, LSH_BITS)
+    return (bits.astype(np.uint16) << np.arange(LSH_BITS, dtype=np.uint16)).sum(axis=2, dtype=np.uint16)
+
+
+# ============================================================
+# Index files
+# ============================================================
+
+def _path(directory: str, name: str) -> str:
+    return os.path.join(directory, name)
+
+
+def _read_meta(directory: str) -> dict | None:
+    try:
+        with open(_path(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    settings = (meta.get("format"), meta.get("features"), meta.get("dim"),
+                meta.get("lsh_tables"), meta.get("lsh_bits"))
+    if settings != (FORMAT_VERSION, N_FEATURES, DIM, LSH_TABLES, LSH_BITS):
+        raise RuntimeError(f"{directory} was built with different settings; "
+                           "run similar-index --rebuild")
+    return meta
+
+
+def _write_meta(directory: str, meta: dict):
+    tmp = _path(directory, "meta.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, _path(directory, "meta.json"))
+
+
+def _read_rows(directory: str, n: int) -> tuple[list[str], list[bool]]:
+    post_ids, comments_fetched = [], []
+    with open(_path(directory, "rows.tsv"), encoding="utf-8") as f:
+        for line, _ in zip(f, range(n)):
+            post_id, fetched = line.rstrip("\n").split("\t")
+            post_ids.append(post_id)
+            comments_fetched.append(fetched == "1")
+    return post_ids, comments_fetched
+
+
+def _append(directory: str, meta: dict, posts: list[dict], vectors, codes):
+    """Append rows, dropping anything past meta["rows"] left by an interrupted append."""
+    n = meta["rows"]
+    for name, row_bytes in (("vectors.f16", DIM * 2), ("codes.u16", LSH_TABLES * 2)):
+        with open(_path(directory, name), "ab") as f:
+            f.truncate(n * row_bytes)
+    with open(_path(directory, "rows.tsv"), encoding="utf-8") as f:
+        lines = f.readlines()
+    if len(lines) > n:
+        with open(_path(directory, "rows.tsv"), "w", encoding="utf-8") as f:
+            f.writelines(lines[:n])
+
+    with open(_path(directory, "vectors.f16"), "ab") as f:
+        f.write(vectors.astype(np.float16).tobytes())
+    with open(_path(directory, "codes.u16"), "ab") as f:
+        f.write(codes.astype(np.uint16).tobytes())
+    with open(_path(directory, "rows.tsv"), "a", encoding="utf-8") as f:
+        f.writelines(f"{p['post_id']}\t{int(bool(p['comments_fetched']))}\n" for p in posts)
+
+    meta["rows"] = n + len(posts)
+    meta["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _write_meta(directory, meta)
+
+
+class SimilarIndex:
+    """An open index: memory-mapped vectors plus per-table LSH buckets."""
+
+    def __init__(self, directory: str = INDEX_DIR):
+        _require_numpy()
+        meta = _read_meta(directory)
+        if meta is None:
+            raise RuntimeError(f"No similar-posts index in {directory}; run similar-index first")
+        self.directory = directory
+        self.mtime = os.stat(_path(directory, "meta.json")).st_mtime_ns
+        n = meta["rows"]
+
+        self.planes = np.load(_path(directory, "planes.npy"))
+        self.vectors = np.memmap(_path(directory, "vectors.f16"), dtype=np.float16, mode="r",
+                                 shape=(n, DIM))
+        codes = np.memmap(_path(directory, "codes.u16"), dtype=np.uint16, mode="r",
+                          shape=(n, LSH_TABLES))
+        self.post_ids, _ = _read_rows(directory, n)
+
+        # A re-indexed post appears again later in the file; its latest row wins
+        self.row_of = {post_id: row for row, post_id in enumerate(self.post_ids)}
+        self.current = np.zeros(n, dtype=bool)
+        self.current[list(self.row_of.values())] = True
+
+        # Rows sorted by bucket code per table, so a bucket is one contiguous slice
+        self.order = np.argsort(codes, axis=0, kind="stable").T
+        self.sorted_codes = np.take_along_axis(np.asarray(codes), self.order.T, axis=0).T
+
+    def changed(self) -> bool:
+        try:
+            return os.stat(_path(self.directory, "meta.json")).st_mtime_ns != self.mtime
+        except OSError:
+            return True
+
+    def _bucket_rows(self, codes, neighbours: bool):
+        flips = [0] + ([1 << b for b in range(LSH_BITS)] if neighbours else [])
+        parts = []
+        for table, code in enumerate(codes):
+            column = self.sorted_codes[table]
+            for flip in flips:
+                key = code ^ flip
+                lo = np.searchsorted(column, key, "left")
+                hi = np.searchsorted(column, key, "right")
+                parts.append(self.order[table, lo:hi])
+        return np.unique(np.concatenate(parts))
+
+    def search(self, vector, k: int, exclude: int = -1) -> list[tuple[str, float]]:
+        """Top k current rows by cosine to a unit vector, as (post_id, similarity)."""
+        codes = _codes(vector[None, :], self.planes)[0]
+        candidates = self._bucket_rows(codes, neighbours=False)
+        if len(candidates) < MIN_CANDIDATES:
+            candidates = self._bucket_rows(codes, neighbours=True)
+        candidates = candidates[self.current[candidates] & (candidates != exclude)]
+        if not len(candidates):
+            return []
+
+        scores = self.vectors[candidates].astype(np.float32) @ vector
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.post_ids[candidates[i]], float(scores[i])) for i in top]
+
+    def neighbours(self, post_id: str, k: int = 10) -> list[tuple[str, float]] | None:
+        row = self.row_of.get(post_id)
+        if row is None:
+            return None
+        return self.search(self.vectors[row].astype(np.float32), k, exclude=row)
+
+
+# ============================================================
+# Building
+# ============================================================
+
+def _fetch(post_ids: list[str]) -> list[dict]:
+    posts = []
+    for start in range(0, len(post_ids), FETCH_BATCH):
+        posts += get_similarity_texts(post_ids[start:start + FETCH_BATCH], COMMENTS_PER_POST)
+        if start and start % (FETCH_BATCH * 20) == 0:
+            log.info(f"Fetched {start}/{len(post_ids)} posts")
+    return posts
+
+
+def _build(candidates: list[dict], reduction: str, directory: str) -> dict:
+    rng = np.random.default_rng(SEED)
+    rows, posts = _Rows.from_posts(_fetch([c["post_id"] for c in candidates]))
+    if rows.n == 0:
+        log.info("No relevant posts to index")
+        return {"rows": 0, "added": 0}
+
+    df = rows.document_frequency()
+    rows.weight(_idf(df, rows.n))
+
+    if reduction == "svd" and rows.n < 4 * DIM:
+        log.info(f"Only {rows.n} posts; using a random projection instead of an SVD fit")
+        reduction = "random"
+    if reduction == "svd":
+        sample = rows if rows.n <= FIT_SAMPLE else rows.take(
+            np.sort(rng.choice(rows.n, FIT_SAMPLE, replace=False)))
+        start = time.time()
+        projection = _fit_svd(sample, rng)
+        log.info(f"Fit a {DIM}-dimension SVD on {sample.n} posts ({time.time() - start:.0f}s)")
+    else:
+        projection = _random_projection(rng)
+    planes = rng.standard_normal((LSH_TABLES * LSH_BITS, DIM), dtype=np.float32)
+
+    vectors = _project(rows, projection)
+    codes = _codes(vectors, planes)
+
+    # Build beside the live index and swap it in, so readers never see a half-built one
+    tmp = directory + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(_path(tmp, "df.npy"), df)
+    np.save(_path(tmp, "projection.npy"), projection)
+    np.save(_path(tmp, "planes.npy"), planes)
+    for name in ("vectors.f16", "codes.u16", "rows.tsv"):
+        open(_path(tmp, name), "w").close()
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    meta = {
+        "format": FORMAT_VERSION, "features": N_FEATURES, "dim": DIM,
+        "lsh_tables": LSH_TABLES, "lsh_bits": LSH_BITS, "reduction": reduction,
+        "rows": 0, "documents": rows.n, "fit_documents": rows.n, "built_at": now,
+    }
+    _append(tmp, meta, posts, vectors, codes)
+
+    old = directory + ".old"
+    if os.path.exists(directory):
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return {"rows": meta["rows"], "added": rows.n}
+
+
+def _update(candidates: list[dict], meta: dict, directory: str) -> dict:
+    post_ids, comments_fetched = _read_rows(directory, meta["rows"])
+    indexed = dict(zip(post_ids, comments_fetched))
+    todo = [c["post_id"] for c in candidates
+            if c["post_id"] not in indexed or (c["comments_fetched"] and not indexed[c["post_id"]])]
+    if not todo:
+        log.info(f"Similar-posts index is current ({meta['rows']} rows)")
+        return {"rows": meta["rows"], "added": 0}
+
+    rows, posts = _Rows.from_posts(_fetch(todo))
+    if rows.n == 0:
+        return {"rows": meta["rows"], "added": 0}
+
+    # New posts join the document frequencies; re-indexed ones are already counted
+    df = np.load(_path(directory, "df.npy"))
+    new = np.array([p["post_id"] not in indexed for p in posts])
+    if new.any():
+        df += rows.take(np.flatnonzero(new)).document_frequency()
+        meta["documents"] += int(new.sum())
+        np.save(_path(directory, "df.npy"), df)
+    rows.weight(_idf(df, meta["documents"]))
+
+    projection = np.load(_path(directory, "projection.npy"), mmap_mode="r")
+    planes = np.load(_path(directory, "planes.npy"))
+    vectors = _project(rows, projection)
+    _append(directory, meta, posts, vectors, _codes(vectors, planes))
+
+    if meta["documents"] > 2 * meta["fit_documents"]:
+        log.warning(f"The corpus has grown from {meta['fit_documents']} to {meta['documents']} "
+                    "posts since the last fit; consider similar-index --rebuild")
+    return {"rows": meta["rows"], "added": rows.n}
+
+
+def update_index(rebuild: bool = False, reduction: str = "svd",
+                 directory: str = INDEX_DIR) -> dict:
+    """Index new and changed relevant posts, or everything with rebuild=True."""
+    _require_numpy()
+    start = time.time()
+    candidates = get_similarity_candidates()
+    meta = None if rebuild else _read_meta(directory)
+    if meta is None:
+        log.info(f"Building the similar-posts index over {len(candidates)} relevant posts "
+                 f"({reduction} reduction)")
+        result = _build(candidates, reduction, directory)
+    else:
+        result = _update(candidates, meta, directory)
+    log.info(f"Similar-posts index: {result['added']} posts vectorized, {result['rows']} rows "
+             f"in {directory} ({time.time() - start:.0f}s)")
+    return result
+
+
+# ============================================================
+# Lookup
+# ============================================================
+
+_open_index: SimilarIndex | None = None
+
+
+def similar(post_id: str, k: int = 10, directory: str = INDEX_DIR) -> list[tuple[str, float]] | None:
+    """Up to k posts most like post_id as (post_id, cosine), best first.
+
+    None if the post is not indexed. The index is opened on first use and
+    reopened after similar-index rewrites it.
+    """
+    global _open_index
+    if _open_index is None or _open_index.directory != directory or _open_index.changed():
+        _open_index = SimilarIndex(directory)
+    return _open_index.neighbours(post_id, k)
+
+
+def print_similar(post_id: str, k: int = 10):
+    start = time.time()
+    neighbours = similar(post_id, k)
+    elapsed = (time.time() - start) * 1000
+    if neighbours is None:
+        print(f"{post_id} is not in the similar-posts index (Pass 1 relevant posts only)")
+        return
+
+    posts = get_post_summaries([post_id] + [p for p, _ in neighbours])
+    query = posts.get(post_id)
+    print(f"{len(neighbours)} posts like {post_id} ({elapsed:.1f} ms)"
+          + (f": r/{query['subreddit']} | {query['title'][:100]}" if query else "") + "\n")
+    for i, (neighbour, score) in enumerate(neighbours, 1):
+        p = posts.get(neighbour)
+        if p is None:
+            print(f"{i:>3}. [{score:.3f}] {neighbour} (no longer in raw_posts)\n")
+            continue
+        print(f"{i:>3}. [{score:.3f}] r/{p['subreddit']} | {p['score'] or 0} pts | "
+              f"{p['created_utc']:%Y-%m-%d} | {p['title'][:100]}")
+        print(f"     https://reddit.com{p['permalink']}\n")
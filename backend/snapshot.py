@@ -0,0 +1,292 @@
+"""Static snapshot of every dataset the fraud and IDV tabs render.
+
+The dashboard data only changes when the pipeline writes classifications, yet
+each page view ran about 20 queries. export-snapshot computes the same datasets
+as lib/queries/fraud.ts and idv.ts (from classification_cube plus four
+classification_tags counts) and writes them as one JSON bundle:
+
+    public/snapshots/v/<hash>.json   the bundle, named by the hash of its data (immutable)
+    public/snapshots/latest.json     {"version", "file", "data_version", "generated_at"}
+
+Both record the data_version stamp (see bump_data_version) the datasets were
+read at. The tabs read latest.json and the bundle it points to, and fall back
+to live queries when no snapshot exists or the database's data_version is
+newer. A snapshot left in a deployed image therefore stops being served once
+the pipeline writes new data, instead of freezing the KPIs at build time.
+
+Bundles are served with a one-year immutable Cache-Control (next.config.ts);
+latest.json is not. An export whose data hashes to the current version only
+moves latest.json's data_version forward. The previous bundle is kept for
+readers that fetched the old latest.json; older ones are deleted. Once a
+snapshot exists, every phase that bumps data_version re-exports when it
+finishes. public/snapshots/ is not tracked in git.
+
+Keep the dataset shapes in step with lib/queries when either side changes.
+
+Usage:
+    python -m backend.pipeline export-snapshot
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from backend.db import get_cube_cells, count_tagged_posts, get_data_version
+from backend.utils import setup_logger
+
+log = setup_logger("snapshot")
+
+SNAPSHOT_DIR = os.path.join("public", "snapshots")
+LATEST_FILE = "latest.json"
+SCHEMA_VERSION = 1  # bump when a dataset shape changes
+KEEP_BUNDLES = 2    # current bundle plus the one before it
+
+LOSS_BRACKET_ORDER = ["none", "under_100", "100_to_1k", "1k_to_10k", "10k_to_100k",
+                      "over_100k", "unspecified"]
+GIG_PLATFORMS = ["Uber", "Lyft", "DoorDash", "Instacart", "Grubhub", "Amazon Flex", "Shipt"]
+BIOMETRIC_TYPES = ["selfie_photo", "liveness_check", "facial_age_estimation"]
+
+RECOVERY_TAGS = ["no_recourse", "support_failure", "chargeback", "recovery", "bank_refused",
+                 "frozen_account", "account_locked", "customer_support", "refund", "dispute",
+                 "bank_response", "platform_response", "negligence", "complaint"]
+SOCIAL_ENG_TAGS = ["social_engineering", "phishing", "romance", "pig_butchering", "impersonation",
+                   "catfishing", "pretexting", "baiting", "vishing", "smishing"]
+SOCIAL_ENG_TYPES = ["social_engineering", "romance_scam", "phishing"]
+ORGANIZED_TAGS = ["organized", "sophisticated", "cross_border", "ring", "coordinated",
+                  "syndicate", "mule", "money_mule", "high_volume", "international"]
+AGE_TAG_PATTERNS = ["age%", "%_age", "%_age_%", "%age_%", "%underage%"]
+
+
+class Cube:
+    """In-memory cube cells for one track, mirroring lib/queries/cube.ts.
+
+    Takes get_cube_cells rows.
+    """
+
+    def __init__(self, rows: list[dict]):
+        self.total = 0
+        self.singles: dict[str, dict[str, int]] = {}
+        self.pairs: dict[tuple[str, str], dict[tuple[str, str], int]] = {}
+        for r in rows:
+            if not r["dim_a"]:
+                self.total = r["count"]
+            elif not r["dim_b"]:
+                self.singles.setdefault(r["dim_a"], {})[r["val_a"]] = r["count"]
+            else:
+                self.pairs.setdefault((r["dim_a"], r["dim_b"]), {})[(r["val_a"], r["val_b"])] = r["count"]
+
+    def counts(self, dim: str, exclude=(), only=None, limit=None) -> list[dict]:
+        rows = [{"name": v, "count": n} for v, n in self.singles.get(dim, {}).items()
+                if v not in exclude and (only is None or v in only)]
+        rows.sort(key=lambda r: (-r["count"], r["name"]))
+        return rows[:limit] if limit is not None else rows
+
+    def sum(self, dim: str, values: list[str]) -> int:
+        return sum(r["count"] for r in self.counts(dim, only=values))
+
+    def pair_counts(self, dim_a: str, dim_b: str) -> list[dict]:
+        """Pair cells as {a, b, count}, whichever order the pipeline stored them in."""
+        if (dim_a, dim_b) in self.pairs:
+            return [{"a": a, "b": b, "count": n} for (a, b), n in self.pairs[(dim_a, dim_b)].items()]
+        return [{"a": a, "b": b, "count": n} for (b, a), n in self.pairs.get((dim_b, dim_a), {}).items()]
+
+
+def _first(rows: list[dict]) -> dict:
+    return rows[0] if rows else {"name": None, "count": 0}
+
+
+def _percent(part: int, total: int) -> float:
+    return part / total * 100 if total > 0 else 0
+
+
+def _tags(cube: Cube) -> list[dict]:
+    return [{"tag": r["name"], "count": r["count"]} for r in cube.counts("tag", limit=50)]
+
+
+# ============================================================
+# Datasets (same shapes as lib/queries)
+# ============================================================
+
+def fraud_datasets(cube: Cube) -> dict:
+    top_type = _first(cube.counts("fraud_type", exclude=("other", ""), limit=1))
+    top_industry = _first(cube.counts("industry", exclude=("other", ""), limit=1))
+    top_channel = _first(cube.counts("channel", exclude=("other", ""), limit=1))
+
+    matrix_types = cube.counts("fraud_type", exclude=("other", ""), limit=6)
+    matrix_industries = cube.counts("industry", exclude=("other", ""), limit=6)
+    type_names = {r["name"] for r in matrix_types}
+    industry_names = {r["name"] for r in matrix_industries}
+    matrix, max_count = {}, 0
+    for p in cube.pair_counts("fraud_type", "industry"):
+        if p["a"] in type_names and p["b"] in industry_names:
+            matrix.setdefault(p["a"], {})[p["b"]] = p["count"]
+            max_count = max(max_count, p["count"])
+
+    rank = {name: i for i, name in enumerate(LOSS_BRACKET_ORDER)}
+    loss_brackets = sorted(cube.counts("loss_bracket"),
+                           key=lambda r: rank.get(r["name"], len(LOSS_BRACKET_ORDER)))
+
+    return {
+        "kpis": {
+            "totalPosts": cube.total,
+            "topFraudType": top_type["name"],
+            "topFraudTypeCount": top_type["count"],
+            "topIndustry": top_industry["name"],
+            "topIndustryCount": top_industry["count"],
+            "topChannel": top_channel["name"],
+            "topChannelCount": top_channel["count"],
+        },
+        "heroStats": {"topSubreddits": cube.counts("subreddit", limit=6)},
+        "fraudTypes": cube.counts("fraud_type"),
+        "industries": cube.counts("industry", limit=8),
+        "matrix": {
+            "fraudTypes": [r["name"] for r in matrix_types],
+            "industries": [r["name"] for r in matrix_industries],
+            "matrix": matrix,
+            "maxCount": max_count,
+        },
+        "channels": cube.counts("channel"),
+        "lossBrackets": loss_brackets,
+        "tags": _tags(cube),
+        "insightData": {
+            "recoveryVoidCount": count_tagged_posts("fraud", tags=RECOVERY_TAGS),
+            "socialEngineeringCount": count_tagged_posts(
+                "fraud", tags=SOCIAL_ENG_TAGS, column="fraud_type", values=SOCIAL_ENG_TYPES),
+            "organizedCrimeCount": count_tagged_posts("fraud", tags=ORGANIZED_TAGS),
+            "total": cube.total,
+        },
+    }
+
+
+def idv_datasets(cube: Cube) -> dict:
+    total = cube.total
+    top_friction = _first(cube.counts("friction_type", exclude=("other", "none", ""), limit=1))
+    top_platform = _first(cube.counts("platform_name", exclude=("",), limit=1))
+
+    top_friction_by_platform = {}
+    for p in cube.pair_counts("platform_name", "friction_type"):
+        best = top_friction_by_platform.get(p["a"])
+        if best is None or p["count"] > best["count"]:
+            top_friction_by_platform[p["a"]] = {"name": p["b"], "count": p["count"]}
+    platform_friction = [
+        {"platform": r["name"], "count": r["count"],
+         "topFriction": top_friction_by_platform[r["name"]]["name"]}
+        for r in cube.counts("platform_name", exclude=("",), limit=10)
+        if r["name"] in top_friction_by_platform
+    ]
+
+    false_rejection = cube.sum("friction_type", ["false_rejection"])
+    privacy = cube.sum("friction_type", ["privacy_concern"])
+
+    return {
+        "idvKpis": {
+            "totalPosts": total,
+            "topFrictionType": top_friction["name"],
+            "topFrictionCount": top_friction["count"],
+            "negativeSentimentPercent": _percent(cube.sum("sentiment", ["negative"]), total),
+            "topPlatform": top_platform["name"] or "Unknown",
+            "topPlatformCount": top_platform["count"],
+        },
+        "heroStats": {"topSubreddits": cube.counts("subreddit", limit=6)},
+        "frictionTypes": cube.counts("friction_type"),
+        "verificationTypes": cube.counts("verification_type"),
+        "triggerReasons": cube.counts("trigger_reason", exclude=("",)),
+        "platformFriction": platform_friction,
+        "tags": _tags(cube),
+        "insightData": {
+            "ageVerificationCount": count_tagged_posts(
+                "idv", tags=["underage"], patterns=AGE_TAG_PATTERNS,
+                column="trigger_reason", values=["age_gate"]),
+            "gigWorkerCount": cube.sum("platform_name", GIG_PLATFORMS),
+            "falseRejectionCount": false_rejection,
+            "falseRejectionPercent": _percent(false_rejection, total),
+            "livenessCount": cube.sum("verification_type",
+                                      ["liveness_check", "facial_age_estimation", "selfie_photo"]),
+            "biometricBreakdown": [{"type": r["name"], "count": r["count"]}
+                                   for r in cube.counts("verification_type", only=BIOMETRIC_TYPES)],
+            "privacyConcernCount": privacy,
+            "privacyConcernPercent": _percent(privacy, total),
+            "noAlternativeCount": cube.sum("friction_type", ["no_alternative_method"]),
+            "total": total,
+        },
+    }
+
+
+# ============================================================
+# Export
+# ============================================================
+
+def _read_latest(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, LATEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def has_snapshot(directory: str = SNAPSHOT_DIR) -> bool:
+    return _read_latest(directory) is not None
+
+
+def _write_latest(directory: str, latest: dict):
+    # Via rename, so readers never see a partial file
+    tmp = os.path.join(directory, LATEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(latest, f, indent=2)
+    os.replace(tmp, os.path.join(directory, LATEST_FILE))
+
+
+def _prune_bundles(directory: str, keep: int = KEEP_BUNDLES) -> int:
+    """Delete all but the `keep` newest bundles. Returns how many were removed."""
+    bundle_dir = os.path.join(directory, "v")
+    bundles = sorted(
+        (os.path.join(bundle_dir, name) for name in os.listdir(bundle_dir) if name.endswith(".json")),
+        key=os.path.getmtime, reverse=True,
+    )
+    for path in bundles[keep:]:
+        os.remove(path)
+    return len(bundles[keep:])
+
+
+def export_snapshot(directory: str = SNAPSHOT_DIR) -> dict:
+    """Write a new bundle if the datasets changed. Returns the current latest.json."""
+    # Read before the datasets, so the snapshot is at least as new as the stamp it carries
+    data_version = get_data_version()
+    datasets = {
+        "schema": SCHEMA_VERSION,
+        "fraud": fraud_datasets(Cube(get_cube_cells("fraud"))),
+        "idv": idv_datasets(Cube(get_cube_cells("idv"))),
+    }
+    version = hashlib.sha256(
+        json.dumps(datasets, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()[:16]
+    generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    latest = _read_latest(directory)
+    if latest and latest.get("version") == version \
+            and os.path.exists(os.path.join(directory, latest["file"])):
+        if latest.get("data_version") != data_version:
+            latest = {**latest, "data_version": data_version, "generated_at": generated_at}
+            _write_latest(directory, latest)
+        log.info(f"Snapshot {version} is current (data_version {data_version}); nothing to publish")
+        return latest
+
+    file = f"v/{version}.json"
+    payload = json.dumps({**datasets, "data_version": data_version},
+                         sort_keys=True, separators=(",", ":"))
+    os.makedirs(os.path.join(directory, "v"), exist_ok=True)
+    with open(os.path.join(directory, file), "w", encoding="utf-8") as f:
+        f.write(payload)
+
+    # Point latest.json at the new bundle last
+    latest = {"version": version, "file": file, "data_version": data_version,
+              "generated_at": generated_at}
+    _write_latest(directory, latest)
+    removed = _prune_bundles(directory)
+
+    log.info(f"Published snapshot {version} ({len(payload) / 1024:.0f} KB, "
+             f"{datasets['fraud']['kpis']['totalPosts']} fraud / "
+             f"{datasets['idv']['idvKpis']['totalPosts']} IDV posts, data_version {data_version}) "
+             f"to {directory}/{file}" + (f"; pruned {removed} old bundles" if removed else ""))
+    return latest
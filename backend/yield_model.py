@@ -0,0 +1,170 @@
+"""Source yield model: which subreddits, collection sources and search queries pay off.
+
+Every collected post carries a subreddit, a collection_source (listing or search
+type) and usually a search_query. The Pass 1 and Pass 2 outcomes give each of
+these keys a relevance rate. The rate is smoothed toward the global rate with a
+beta prior, so a query with three posts looks neither perfect nor worthless:
+
+    yield = (relevant + k * p) / (refiltered + k)    p = global rate, k = PRIOR_STRENGTH
+
+"Relevant" means Pass 1 flagged the post (fraud or IDV) and Pass 2, if it has
+run, did not reject it.
+
+The table feeds two stages:
+    - LLM queue: `pre-filter --yield-prune` skips posts when every source key has
+      MIN_EVIDENCE verdicts and a yield below SKIP_YIELD. `refilter --by-yield`
+      processes the highest-yield subreddits first. If a later rebuild lifts a
+      key above the threshold, its pruned posts are put back in the queue.
+    - Collection: search targets run in yield order. Proven low-yield queries get
+      fewer pages, scaled by their yield relative to the global rate.
+
+Usage:
+    python -m backend.pipeline yield    # Rebuild source_yield and print the report
+"""
+
+import math
+
+from backend.db import (
+    refresh_source_yields, get_source_yields,
+    get_pre_filtered_posts, unmark_pre_filtered, get_pre_filter_reason_counts,
+)
+from backend.utils import setup_logger
+
+log = setup_logger("yield_model")
+
+DIMENSIONS = ("subreddit", "collection_source", "search_query")
+PRIOR_STRENGTH = 20     # prior is worth this many posts at the global rate
+MIN_EVIDENCE = 50       # Pass 1 verdicts before a key's yield is trusted for pruning
+SKIP_YIELD = 0.02       # prune below this smoothed yield
+MIN_PAGES = 2           # low-yield search targets still get this many pages
+POSTS_PER_PAGE = 100    # Reddit listing page size, for requests-per-key estimates
+LOW_YIELD_REASON = "low_yield"
+
+
+class YieldTable:
+    """In-memory view of source_yield."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = {(r["dimension"], r["key"]): r for r in rows}
+        subs = [r for r in rows if r["dimension"] == "subreddit"]
+        refiltered = sum(r["refiltered"] for r in subs)
+        self.prior = sum(r["relevant"] for r in subs) / refiltered if refiltered else None
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def get(self, dimension: str, key: str) -> dict | None:
+        return self.rows.get((dimension, key))
+
+    def rate(self, dimension: str, key: str) -> float | None:
+        row = self.get(dimension, key)
+        return row["yield_rate"] if row else self.prior
+
+    def trusted(self, dimension: str, key: str) -> dict | None:
+        row = self.get(dimension, key)
+        return row if row and row["refiltered"] >= MIN_EVIDENCE else None
+
+
+def load_yields() -> YieldTable:
+    return YieldTable(get_source_yields())
+
+
+# ============================================================
+# LLM queue
+# ============================================================
+
+def post_yield(table: YieldTable, post: dict) -> float | None:
+    """Best yield among the post's source keys, or None if any key lacks evidence."""
+    rates = []
+    for dimension in DIMENSIONS:
+        if not post.get(dimension):
+            continue
+        row = table.trusted(dimension, post[dimension])
+        if row is None:
+            return None
+        rates.append(row["yield_rate"])
+    return max(rates) if rates else None
+
+
+def is_low_yield(table: YieldTable, post: dict) -> bool:
+    y = post_yield(table, post)
+    return y is not None and y < SKIP_YIELD
+
+
+def restore_pruned(table: YieldTable) -> int:
+    """Put pruned posts back in the queue if their sources no longer qualify."""
+    back = [p["post_id"] for p in get_pre_filtered_posts(LOW_YIELD_REASON)
+            if not is_low_yield(table, p)]
+    return unmark_pre_filtered(back) if back else 0
+
+
+def refresh_yields() -> YieldTable:
+    rate = refresh_source_yields(PRIOR_STRENGTH)
+    table = load_yields()
+    restored = restore_pruned(table)
+    log.info(f"source_yield rebuilt: {len(table.rows)} keys, global relevance rate {rate:.1%}"
+             + (f", {restored} pruned posts requeued" if restored else ""))
+    return table
+
+
+# ============================================================
+# Collection
+# ============================================================
+
+def target_pages(table: YieldTable, dimension: str, key: str, max_pages: int) -> int:
+    """Full page budget unless the key has evidence of yielding below the global rate."""
+    row = table.trusted(dimension, key)
+    if row is None or not table.prior or row["yield_rate"] >= table.prior:
+        return max_pages
+    return max(MIN_PAGES, math.ceil(max_pages * row["yield_rate"] / table.prior))
+
+
+def plan_targets(table: YieldTable, keys: list[str], dimension: str = "search_query",
+                 max_pages: int = 10) -> list[tuple[str, int]]:
+    """(key, pages) in descending yield; unscored keys rank at the global rate."""
+    if not table:
+        return [(k, max_pages) for k in keys]
+    ranked = sorted(keys, key=lambda k: -(table.rate(dimension, k) or 0))
+    return [(k, target_pages(table, dimension, k, max_pages)) for k in ranked]
+
+
+def log_plan(tier_name: str, plan: list[tuple[str, int]], max_pages: int):
+    saved = sum(max_pages - pages for _, pages in plan)
+    if saved:
+        log.info(f"[{tier_name}] Yield plan: {saved} of {len(plan) * max_pages} "
+                 f"page requests trimmed on low-yield targets")
+
+
+# ============================================================
+# Report
+# ============================================================
+
+def _requests(row: dict) -> int:
+    return max(1, math.ceil(row["posts"] / POSTS_PER_PAGE))
+
+
+def print_yield_report(limit: int = 10):
+    table = load_yields()
+    if not table:
+        print("source_yield is empty; run `python -m backend.pipeline yield` after Pass 1.")
+        return
+
+    print(f"Global relevance rate: {table.prior:.1%} (prior strength {PRIOR_STRENGTH} posts)")
+    for dimension in DIMENSIONS:
+        rows = sorted((r for r in table.rows.values() if r["dimension"] == dimension),
+                      key=lambda r: r["yield_rate"], reverse=True)
+        if not rows:
+            continue
+        print(f"\n{dimension} ({len(rows)} keys)  posts | verdicts | relevant | yield | relevant/request")
+        shown = rows if len(rows) <= limit * 2 else rows[:limit] + [None] + rows[-limit:]
+        for r in shown:
+            if r is None:
+                print("  ...")
+                continue
+            print(f"  {r['key'][:40]:<40} {r['posts']:>6} | {r['refiltered']:>6} | {r['relevant']:>6} | "
+                  f"{r['yield_rate']:5.1%} | {r['relevant'] / _requests(r):5.2f}")
+
+    counts = {r["reason"]: r["posts"] for r in get_pre_filter_reason_counts()}
+    pruned = counts.get(LOW_YIELD_REASON, 0)
+    print(f"\nPass 1 LLM calls avoided by yield pruning: {pruned} "
+          f"(expected relevant posts among them: under {pruned * SKIP_YIELD:.0f})")
@@ -14,20 +14,11 @@ import { FraudInsightCards } from "./fraud-insight-cards";
 import { FraudCallout } from "./fraud-callout";
 import { toTitleCase } from "@/lib/utils";
 
-import {
-  getFraudKPIs,
-  getFraudHeroStats,
-  getFraudTypeDistribution,
-  getIndustryBreakdown,
-  getFraudIndustryMatrix,
-  getChannelDistribution,
-  getLossBracketDistribution,
-  getFraudTags,
-  getFraudInsightData,
-} from "@/lib/queries/fraud";
+import { getFraudTabData } from "@/lib/queries/fraud";
+import { getSnapshot } from "@/lib/snapshot";
 
 export async function FraudTab() {
-  const [
+  const {
     kpis,
     heroStats,
     fraudTypes,
@@ -37,17 +28,7 @@ export async function FraudTab() {
     lossBrackets,
     tags,
     insightData,
-  ] = await Promise.all([
-    getFraudKPIs(),
-    getFraudHeroStats(),
-    getFraudTypeDistribution(),
-    getIndustryBreakdown(),
-    getFraudIndustryMatrix(),
-    getChannelDistribution(),
-    getLossBracketDistribution(),
-    getFraudTags(),
-    getFraudInsightData(),
-  ]);
+  } = (await getSnapshot())?.fraud ?? (await getFraudTabData());
 
   const identityTheftPercent =
     kpis.totalPosts > 0
@@ -13,19 +13,11 @@ import { IdvTags } from "@/components/idv/idv-tags";
 import { IdvInsightCards } from "@/components/idv/idv-insight-cards";
 import { LivenessCallout } from "@/components/idv/liveness-callout";
 
-import {
-  getIdvKPIs,
-  getIdvHeroStats,
-  getFrictionTypeDistribution,
-  getVerificationTypeDistribution,
-  getTriggerReasonDistribution,
-  getPlatformFriction,
-  getIdvTags,
-  getIdvInsightData,
-} from "@/lib/queries/idv";
+import { getIdvTabData } from "@/lib/queries/idv";
+import { getSnapshot } from "@/lib/snapshot";
 
 export async function IdvTab() {
-  const [
+  const {
     idvKpis,
     heroStats,
     frictionTypes,
@@ -34,16 +26,7 @@ export async function IdvTab() {
     platformFriction,
     tags,
     insightData,
-  ] = await Promise.all([
-    getIdvKPIs(),
-    getIdvHeroStats(),
-    getFrictionTypeDistribution(),
-    getVerificationTypeDistribution(),
-    getTriggerReasonDistribution(),
-    getPlatformFriction(),
-    getIdvTags(),
-    getIdvInsightData(),
-  ]);
+  } = (await getSnapshot())?.idv ?? (await getIdvTabData());
 
   return (
     <div className="flex flex-col gap-8">
@@ -178,6 +178,7 @@ export function DrillDownPanel({ config, onClose }: DrillDownPanelProps) {
               <DrillDownPosts
                 posts={data.posts}
                 totalCount={data.postsTotalCount}
+                nextCursor={data.postsNextCursor}
                 filters={filters}
               />
             </>
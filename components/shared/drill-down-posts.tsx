@@ -3,20 +3,23 @@
 import { useState } from "react";
 import { ExternalLink } from "lucide-react";
 import { formatNumber, toTitleCase } from "@/lib/utils";
-import type { DrillDownPost } from "@/lib/types/drill-down";
+import type { DrillDownPost, DrillDownPostsPage } from "@/lib/types/drill-down";
 
 interface DrillDownPostsProps {
   posts: DrillDownPost[];
   totalCount: number;
+  nextCursor: string | null;
   filters: Record<string, string>;
 }
 
 export function DrillDownPosts({
   posts: initialPosts,
   totalCount,
+  nextCursor: initialCursor,
   filters,
 }: DrillDownPostsProps) {
   const [posts, setPosts] = useState<DrillDownPost[]>(initialPosts);
+  const [cursor, setCursor] = useState<string | null>(initialCursor);
   const [loadingMore, setLoadingMore] = useState(false);
 
   // Reset displayed posts when initial data changes
@@ -24,25 +27,27 @@ export function DrillDownPosts({
   const [prevKey, setPrevKey] = useState(postsKey);
   if (postsKey !== prevKey) {
     setPosts(initialPosts);
+    setCursor(initialCursor);
     setPrevKey(postsKey);
   }
 
   const remaining = totalCount - posts.length;
 
   async function loadMore() {
+    if (!cursor) return;
     setLoadingMore(true);
     try {
       const params = new URLSearchParams({
         ...filters,
-        posts_offset: String(posts.length),
-        posts_limit: "10",
+        posts_cursor: cursor,
       });
       const res = await fetch(`/api/drill-down?${params}`);
       if (!res.ok) throw new Error(`HTTP ${res.status}`);
-      const data = await res.json();
+      const data: DrillDownPostsPage = await res.json();
       if (data.posts?.length) {
         setPosts((prev) => [...prev, ...data.posts]);
       }
+      setCursor(data.nextCursor);
     } catch (err) {
       console.error("Failed to load more posts:", err);
     } finally {
@@ -128,7 +133,7 @@ export function DrillDownPosts({
       </div>
 
       {/* Load more */}
-      {remaining > 0 && (
+      {cursor && remaining > 0 && (
         <button
           onClick={loadMore}
           disabled={loadingMore}
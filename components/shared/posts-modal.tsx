@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import { X, ExternalLink, ChevronLeft, ChevronRight } from "lucide-react";
 import { toTitleCase, formatNumber } from "@/lib/utils";
 
@@ -26,6 +26,9 @@ export function PostsModal({ isOpen, onClose, title, filters }: PostsModalProps)
   const [total, setTotal] = useState(0);
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(0);
+  const [hasNext, setHasNext] = useState(false);
+  // cursors.current[i] is where page i + 1 starts (keyset pagination)
+  const cursors = useRef<(string | null)[]>([null]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
@@ -33,7 +36,9 @@ export function PostsModal({ isOpen, onClose, title, filters }: PostsModalProps)
     setLoading(true);
     setError(null);
     try {
-      const params = new URLSearchParams({ ...filters, page: String(p) });
+      const params = new URLSearchParams({ ...filters });
+      const cursor = cursors.current[p - 1];
+      if (cursor) params.set("cursor", cursor);
       const res = await fetch(`/api/posts?${params}`);
       if (!res.ok) {
         const errData = await res.json().catch(() => ({}));
@@ -41,14 +46,20 @@ export function PostsModal({ isOpen, onClose, title, filters }: PostsModalProps)
       }
       const data = await res.json();
       setPosts(data.posts || []);
-      setTotal(data.total || 0);
-      setTotalPages(data.totalPages || 0);
+      // The total is only computed for the first page
+      if (data.total !== null) {
+        setTotal(data.total || 0);
+        setTotalPages(data.totalPages || 0);
+      }
+      cursors.current[p] = data.nextCursor ?? null;
+      setHasNext(Boolean(data.nextCursor));
     } catch (err) {
       console.error("Failed to fetch posts:", err);
       setError(String(err));
       setPosts([]);
       setTotal(0);
       setTotalPages(0);
+      setHasNext(false);
     } finally {
       setLoading(false);
     }
@@ -56,13 +67,14 @@ export function PostsModal({ isOpen, onClose, title, filters }: PostsModalProps)
 
   useEffect(() => {
     if (isOpen) {
+      cursors.current = [null];
       setPage(1);
-      fetchPosts(1);
     }
   }, [isOpen, fetchPosts]);
 
+  // A page is fetchable once the page before it has returned its cursor
   useEffect(() => {
-    if (isOpen) {
+    if (isOpen && cursors.current[page - 1] !== undefined) {
       fetchPosts(page);
     }
   }, [page, isOpen, fetchPosts]);
@@ -213,8 +225,8 @@ export function PostsModal({ isOpen, onClose, title, filters }: PostsModalProps)
                 <ChevronLeft className="w-4 h-4" />
               </button>
               <button
-                onClick={() => setPage((p) => Math.min(totalPages, p + 1))}
-                disabled={page === totalPages}
+                onClick={() => setPage((p) => p + 1)}
+                disabled={!hasNext}
                 className="p-2 rounded-lg hover:bg-fog-100 disabled:opacity-30 disabled:cursor-not-allowed transition-colors"
               >
                 <ChevronRight className="w-4 h-4" />
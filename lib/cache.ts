@@ -0,0 +1,116 @@
+import { getDb } from "@/lib/db";
+
+// Process-local LRU for API results. Each entry is stamped with
+// data_version.version, which the pipeline bumps after phases that change
+// dashboard data (backend/pipeline.py). An entry from an older version is
+// still served while a refresh runs in the background (stale-while-revalidate),
+// so only a first-ever request for a key waits on the database.
+
+const MAX_ENTRIES = 500;
+const VERSION_CHECK_MS = 10_000;
+
+export type CacheStatus = "hit" | "stale" | "miss";
+
+interface Entry {
+  version: number;
+  value: unknown;
+}
+
+const entries = new Map<string, Entry>(); // insertion order = recency
+const inFlight = new Map<string, Promise<unknown>>();
+
+// ── Data version ─────────────────────────────────────────────
+
+let knownVersion: number | null = null;
+let checkedAt = 0;
+let versionCheck: Promise<number> | null = null;
+
+async function fetchDataVersion(): Promise<number> {
+  const sql = getDb();
+  const [row] = await sql`SELECT version FROM data_version WHERE id = true`;
+  return row ? Number(row.version) : 0;
+}
+
+export async function getDataVersion(): Promise<number> {
+  if (knownVersion !== null && Date.now() - checkedAt < VERSION_CHECK_MS) {
+    return knownVersion;
+  }
+
+  if (!versionCheck) {
+    versionCheck = fetchDataVersion()
+      .then((version) => {
+        knownVersion = version;
+        checkedAt = Date.now();
+        return version;
+      })
+      .finally(() => {
+        versionCheck = null;
+      });
+  }
+
+  // Once a version is known, recheck in the background instead of waiting
+  if (knownVersion !== null) {
+    versionCheck.catch((error) => console.error("[cache] data_version check failed:", error));
+    return knownVersion;
+  }
+  return versionCheck;
+}
+
+// ── Keys ─────────────────────────────────────────────────────
+
+// Same filters in any order (or with empty values) map to the same key
+export function cacheKey(
+  scope: string,
+  params: Record<string, string | number | null | undefined>
+) {
+  const parts = Object.keys(params)
+    .filter((k) => params[k] !== null && params[k] !== undefined && params[k] !== "")
+    .sort()
+    .map((k) => `${k}=${encodeURIComponent(String(params[k]))}`);
+  return `${scope}?${parts.join("&")}`;
+}
+
+// ── Lookup ───────────────────────────────────────────────────
+
+function store(key: string, entry: Entry) {
+  entries.delete(key);
+  entries.set(key, entry);
+  while (entries.size > MAX_ENTRIES) {
+    entries.delete(entries.keys().next().value!);
+  }
+}
+
+function refresh<T>(key: string, version: number, compute: () => Promise<T>): Promise<T> {
+  const running = inFlight.get(key);
+  if (running) return running as Promise<T>;
+
+  const promise = compute()
+    .then((value) => {
+      store(key, { version, value });
+      return value;
+    })
+    .finally(() => inFlight.delete(key));
+  inFlight.set(key, promise);
+  return promise;
+}
+
+export async function cached<T>(
+  key: string,
+  compute: () => Promise<T>
+): Promise<{ value: T; status: CacheStatus }> {
+  const version = await getDataVersion();
+  const entry = entries.get(key);
+
+  if (!entry) {
+    return { value: await refresh(key, version, compute), status: "miss" };
+  }
+
+  store(key, entry); // mark as most recently used
+  if (entry.version !== version) {
+    refresh(key, version, compute).catch((error) =>
+      console.error(`[cache] refresh of ${key} failed:`, error)
+    );
+    return { value: entry.value as T, status: "stale" };
+  }
+  return { value: entry.value as T, status: "hit" };
+}
@@ -0,0 +1,79 @@
+import { getDb } from "@/lib/db";
+import { getCubeCell, type CubeTrack } from "@/lib/queries/cube";
+
+// Keyset pagination for post lists. Posts are ordered by (score, post_id)
+// descending, backed by idx_raw_posts_score_keyset. A page starts after the
+// last row of the previous one, so a deep page costs the same as the first.
+// Cursors are opaque base64url strings.
+
+export const POSTS_ORDER = "COALESCE(rp.score, 0) DESC, rp.post_id DESC";
+
+export interface PostCursor {
+  score: number;
+  postId: string;
+}
+
+export function encodeCursor(row: Record<string, unknown>): string {
+  return Buffer.from(JSON.stringify([Number(row.score ?? 0), row.post_id])).toString(
+    "base64url"
+  );
+}
+
+export function decodeCursor(cursor: string): PostCursor | null {
+  try {
+    const [score, postId] = JSON.parse(Buffer.from(cursor, "base64url").toString("utf8"));
+    if (!Number.isInteger(score) || typeof postId !== "string") return null;
+    return { score, postId };
+  } catch {
+    return null;
+  }
+}
+
+// Condition for rows after the cursor, using placeholders $n and $n+1
+export function seekCondition(cursor: PostCursor | null, paramIdx: number) {
+  if (!cursor) return { condition: "", values: [] as (string | number)[] };
+  return {
+    condition: `(COALESCE(rp.score, 0), rp.post_id) < ($${paramIdx}::int, $${paramIdx + 1})`,
+    values: [cursor.score, cursor.postId],
+  };
+}
+
+// Query with LIMIT pageSize + 1; the extra row only signals a next page
+export function splitPage(rows: Record<string, unknown>[], pageSize: number) {
+  const page = rows.slice(0, pageSize);
+  return {
+    rows: page,
+    nextCursor: rows.length > pageSize ? encodeCursor(page[page.length - 1]) : null,
+  };
+}
+
+// ── Counts ───────────────────────────────────────────────────
+
+export type CountMode = "exact" | "estimate";
+
+// Filter sets the cube covers (up to two dimensions, or one tag) are an exact
+// single-row lookup. Otherwise "exact" runs COUNT(*) and "estimate" takes the
+// planner's row estimate. Pass filters: null when the conditions include
+// something the cube cannot express (a text search).
+export async function countPosts(
+  type: CubeTrack,
+  filters: [string, string][] | null,
+  countQuery: { table: string; where: string; values: (string | number)[] },
+  mode: CountMode
+): Promise<{ total: number; estimated: boolean }> {
+  const fromCube = filters ? await getCubeCell(type, filters) : null;
+  if (fromCube !== null) return { total: fromCube, estimated: false };
+
+  const sql = getDb();
+  const from = `FROM ${countQuery.table} c WHERE ${countQuery.where}`;
+
+  if (mode === "estimate") {
+    const [row] = await sql.query(`EXPLAIN (FORMAT JSON) SELECT 1 ${from}`, countQuery.values);
+    const raw = row["QUERY PLAN"];
+    const plan = typeof raw === "string" ? JSON.parse(raw) : raw;
+    return { total: Math.round(Number(plan[0].Plan["Plan Rows"])), estimated: true };
+  }
+
+  const [row] = await sql.query(`SELECT COUNT(*) as total ${from}`, countQuery.values);
+  return { total: Number(row.total), estimated: false };
+}
@@ -0,0 +1,174 @@
+import { getDb } from "@/lib/db";
+
+// Reads from classification_cube, which the pipeline updates on every Pass 2
+// write (backend/cube.py). Counts cover relevant rows only. A NULL dimension
+// value is stored as "".
+
+export type CubeTrack = "fraud" | "idv";
+
+export interface CubeCount {
+  name: string;
+  count: number;
+}
+
+export interface CubePair {
+  a: string;
+  b: string;
+  count: number;
+}
+
+// ── Loading ──────────────────────────────────────────────────
+
+// One query loads the single-dimension cells, the top tags and the requested
+// pairs; the tab datasets are then reshaped from it in code.
+//
+// Open-ended dimensions (subreddit, platform_name) grow with the corpus, so
+// `limits` caps them to their top N cells per dimension (plus any `keep`
+// values, for sums over named values). Pairs involving a capped dimension only
+// come back for the values that were kept. Enum dimensions are small and load
+// in full.
+export async function loadCube(
+  track: CubeTrack,
+  {
+    pairs = [],
+    tagLimit = 50,
+    limits = {},
+    keep = {},
+  }: {
+    pairs?: [string, string][];
+    tagLimit?: number;
+    limits?: Record<string, number>;
+    keep?: Record<string, string[]>;
+  } = {}
+): Promise<Cube> {
+  const sql = getDb();
+  // Pair cells are stored in the pipeline's dimension order; accept either
+  const pairKeys = pairs.flatMap(([a, b]) => [`${a}|${b}`, `${b}|${a}`]);
+  const keepKeys = Object.entries(keep).flatMap(([dim, values]) => values.map((v) => `${dim}|${v}`));
+  const limitsJson = JSON.stringify(limits);
+
+  const rows = await sql`
+    WITH singles AS (
+      SELECT dim_a, val_a, dim_b, val_b, count,
+             ROW_NUMBER() OVER (PARTITION BY dim_a ORDER BY count DESC, val_a COLLATE "C") AS rank
+      FROM classification_cube
+      WHERE track = ${track} AND dim_b = '' AND dim_a <> 'tag' AND count > 0
+    ),
+    kept AS (
+      SELECT dim_a, val_a, dim_b, val_b, count
+      FROM singles
+      WHERE rank <= COALESCE((${limitsJson}::jsonb ->> dim_a)::int, rank)
+         OR dim_a || '|' || val_a = ANY(${keepKeys}::text[])
+    )
+    SELECT dim_a, val_a, dim_b, val_b, count FROM kept
+    UNION ALL
+    SELECT c.dim_a, c.val_a, c.dim_b, c.val_b, c.count
+    FROM classification_cube c
+    WHERE c.track = ${track} AND c.count > 0
+      AND c.dim_a || '|' || c.dim_b = ANY(${pairKeys}::text[])
+      AND (NOT ${limitsJson}::jsonb ? c.dim_a
+           OR EXISTS (SELECT 1 FROM kept k WHERE k.dim_a = c.dim_a AND k.val_a = c.val_a))
+      AND (NOT ${limitsJson}::jsonb ? c.dim_b
+           OR EXISTS (SELECT 1 FROM kept k WHERE k.dim_a = c.dim_b AND k.val_a = c.val_b))
+    UNION ALL
+    (SELECT dim_a, val_a, dim_b, val_b, count
+     FROM classification_cube
+     WHERE track = ${track} AND dim_a = 'tag' AND dim_b = '' AND count > 0
+     ORDER BY count DESC, val_a
+     LIMIT ${tagLimit})
+  `;
+
+  return new Cube(rows as CubeRow[]);
+}
+
+interface CubeRow {
+  dim_a: string;
+  val_a: string;
+  dim_b: string;
+  val_b: string;
+  count: number | string;
+}
+
+export class Cube {
+  total = 0;
+  private singles = new Map<string, CubeCount[]>();
+  private pairCells = new Map<string, CubePair[]>();
+
+  constructor(rows: CubeRow[]) {
+    for (const r of rows) {
+      const count = Number(r.count);
+      if (!r.dim_a) {
+        this.total = count;
+      } else if (!r.dim_b) {
+        const list = this.singles.get(r.dim_a) ?? [];
+        list.push({ name: r.val_a, count });
+        this.singles.set(r.dim_a, list);
+      } else {
+        const key = `${r.dim_a}|${r.dim_b}`;
+        const list = this.pairCells.get(key) ?? [];
+        list.push({ a: r.val_a, b: r.val_b, count });
+        this.pairCells.set(key, list);
+      }
+    }
+    for (const list of this.singles.values()) {
+      list.sort((x, y) => y.count - x.count || (x.name < y.name ? -1 : x.name > y.name ? 1 : 0));
+    }
+  }
+
+  // One dimension, largest first. A NULL value is "", so pass exclude: [""] to drop it.
+  counts(
+    dim: string,
+    { exclude = [], only, limit }: { exclude?: string[]; only?: string[]; limit?: number } = {}
+  ): CubeCount[] {
+    const rows = (this.singles.get(dim) ?? []).filter(
+      (r) => !exclude.includes(r.name) && (!only || only.includes(r.name))
+    );
+    return limit === undefined ? rows : rows.slice(0, limit);
+  }
+
+  sum(dim: string, values: string[]) {
+    return this.counts(dim, { only: values }).reduce((sum, r) => sum + r.count, 0);
+  }
+
+  // Two dimensions (must have been requested in loadCube)
+  pairs(dimA: string, dimB: string): CubePair[] {
+    const direct = this.pairCells.get(`${dimA}|${dimB}`);
+    if (direct) return direct;
+    return (this.pairCells.get(`${dimB}|${dimA}`) ?? []).map((p) => ({
+      a: p.b,
+      b: p.a,
+      count: p.count,
+    }));
+  }
+}
+
+// ── Filter-set counts ────────────────────────────────────────
+
+// Count for up to two [dimension, value] filters, or a single ["tag", tag].
+// Returns null when the filters are beyond what the cube holds (more than two,
+// or a tag combined with anything), so the caller must count live. A missing
+// cell means no relevant post matches, because the pipeline writes a cell for
+// every single value, pair and tag it sees; that returns 0.
+export async function getCubeCell(
+  track: CubeTrack,
+  filters: [string, string][]
+): Promise<number | null> {
+  const hasTag = filters.some(([dim]) => dim === "tag");
+  if (filters.length > 2 || (hasTag && filters.length > 1)) return null;
+
+  const sql = getDb();
+  const [dimA, valA] = filters[0] ?? ["", ""];
+  const [dimB, valB] = filters[1] ?? ["", ""];
+
+  // Pair cells are stored in the pipeline's dimension order; accept either
+  const [row] = await sql`
+    SELECT count
+    FROM classification_cube
+    WHERE track = ${track}
+      AND ((dim_a = ${dimA} AND val_a = ${valA} AND dim_b = ${dimB} AND val_b = ${valB})
+        OR (dim_a = ${dimB} AND val_a = ${valB} AND dim_b = ${dimA} AND val_b = ${valA}))
+    LIMIT 1
+  `;
+
+  return row ? Number(row.count) : 0;
+}
@@ -1,156 +1,72 @@
 import { getDb } from "@/lib/db";
+import { loadCube, type Cube } from "@/lib/queries/cube";
 
-// ── KPI queries ──────────────────────────────────────────────
-
-export async function getFraudKPIs() {
-  const sql = getDb();
-
-  const [totalRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-  `;
+// Every function takes the tab's cube so a full render reads it once
+// (getFraudTabData); called alone, each loads its own.
+const FRAUD_PAIRS: [string, string][] = [["fraud_type", "industry"]];
+// Open-ended dimensions: the most cells any dataset below reads
+const FRAUD_LIMITS = { subreddit: 6 };
 
-  const [topFraudType] = await sql`
-    SELECT fraud_type, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-      AND fraud_type != 'other'
-    GROUP BY fraud_type
-    ORDER BY count DESC
-    LIMIT 1
-  `;
+function loadFraudCube() {
+  return loadCube("fraud", { pairs: FRAUD_PAIRS, limits: FRAUD_LIMITS });
+}
 
-  const [topIndustry] = await sql`
-    SELECT industry, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-      AND industry != 'other'
-    GROUP BY industry
-    ORDER BY count DESC
-    LIMIT 1
-  `;
+// ── KPI queries ──────────────────────────────────────────────
 
-  const [topChannel] = await sql`
-    SELECT channel, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-      AND channel != 'other'
-    GROUP BY channel
-    ORDER BY count DESC
-    LIMIT 1
-  `;
+export async function getFraudKPIs(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  const [topFraudType] = cube.counts("fraud_type", { exclude: ["other", ""], limit: 1 });
+  const [topIndustry] = cube.counts("industry", { exclude: ["other", ""], limit: 1 });
+  const [topChannel] = cube.counts("channel", { exclude: ["other", ""], limit: 1 });
 
   return {
-    totalPosts: Number(totalRow.count),
-    topFraudType: topFraudType.fraud_type as string,
-    topFraudTypeCount: Number(topFraudType.count),
-    topIndustry: topIndustry.industry as string,
-    topIndustryCount: Number(topIndustry.count),
-    topChannel: topChannel.channel as string,
-    topChannelCount: Number(topChannel.count),
+    totalPosts: cube.total,
+    topFraudType: topFraudType.name,
+    topFraudTypeCount: topFraudType.count,
+    topIndustry: topIndustry.name,
+    topIndustryCount: topIndustry.count,
+    topChannel: topChannel.name,
+    topChannelCount: topChannel.count,
   };
 }
 
 // ── Fraud Type Distribution ──────────────────────────────────
 
-export async function getFraudTypeDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT fraud_type, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-    GROUP BY fraud_type
-    ORDER BY count DESC
-  `;
-
-  return rows.map((r) => ({
-    name: r.fraud_type as string,
-    count: Number(r.count),
-  }));
+export async function getFraudTypeDistribution(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  return cube.counts("fraud_type");
 }
 
 // ── Industry Breakdown ───────────────────────────────────────
 
-export async function getIndustryBreakdown() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT industry, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-    GROUP BY industry
-    ORDER BY count DESC
-    LIMIT 8
-  `;
-
-  return rows.map((r) => ({
-    name: r.industry as string,
-    count: Number(r.count),
-  }));
+export async function getIndustryBreakdown(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  return cube.counts("industry", { limit: 8 });
 }
 
 // ── Fraud × Industry Matrix ─────────────────────────────────
 
-export async function getFraudIndustryMatrix() {
-  const sql = getDb();
+export async function getFraudIndustryMatrix(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  const fraudTypes = cube.counts("fraud_type", { exclude: ["other", ""], limit: 6 });
+  const industries = cube.counts("industry", { exclude: ["other", ""], limit: 6 });
 
-  const rows = await sql`
-    WITH top_fraud AS (
-      SELECT fraud_type
-      FROM fraud_classifications
-      WHERE is_relevant = true
-        AND fraud_type != 'other'
-      GROUP BY fraud_type
-      ORDER BY COUNT(*) DESC
-      LIMIT 6
-    ),
-    top_industry AS (
-      SELECT industry
-      FROM fraud_classifications
-      WHERE is_relevant = true
-        AND industry != 'other'
-      GROUP BY industry
-      ORDER BY COUNT(*) DESC
-      LIMIT 6
-    )
-    SELECT fc.fraud_type, fc.industry, COUNT(*) as count
-    FROM fraud_classifications fc
-    WHERE fc.is_relevant = true
-      AND fc.fraud_type IN (SELECT fraud_type FROM top_fraud)
-      AND fc.industry IN (SELECT industry FROM top_industry)
-    GROUP BY fc.fraud_type, fc.industry
-    ORDER BY fc.fraud_type, fc.industry
-  `;
-
-  // Get the ordered lists for axes
-  const fraudTypes = await sql`
-    SELECT fraud_type FROM fraud_classifications
-    WHERE is_relevant = true AND fraud_type != 'other'
-    GROUP BY fraud_type ORDER BY COUNT(*) DESC LIMIT 6
-  `;
-  const industries = await sql`
-    SELECT industry FROM fraud_classifications
-    WHERE is_relevant = true AND industry != 'other'
-    GROUP BY industry ORDER BY COUNT(*) DESC LIMIT 6
-  `;
+  const topFraud = new Set(fraudTypes.map((r) => r.name));
+  const topIndustry = new Set(industries.map((r) => r.name));
 
   // Build matrix lookup
   const matrix: Record<string, Record<string, number>> = {};
   let maxCount = 0;
-  for (const row of rows) {
-    const ft = row.fraud_type as string;
-    const ind = row.industry as string;
-    const count = Number(row.count);
+  for (const { a: ft, b: ind, count } of cube.pairs("fraud_type", "industry")) {
+    if (!topFraud.has(ft) || !topIndustry.has(ind)) continue;
     if (!matrix[ft]) matrix[ft] = {};
     matrix[ft][ind] = count;
     if (count > maxCount) maxCount = count;
   }
 
   return {
-    fraudTypes: fraudTypes.map((r) => r.fraud_type as string),
-    industries: industries.map((r) => r.industry as string),
+    fraudTypes: fraudTypes.map((r) => r.name),
+    industries: industries.map((r) => r.name),
     matrix,
     maxCount,
   };
@@ -158,94 +74,51 @@ export async function getFraudIndustryMatrix() {
 
 // ── Channel (Digital Attack Surface) ─────────────────────────
 
-export async function getChannelDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT channel, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-    GROUP BY channel
-    ORDER BY count DESC
-  `;
-
-  return rows.map((r) => ({
-    name: r.channel as string,
-    count: Number(r.count),
-  }));
+export async function getChannelDistribution(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  return cube.counts("channel");
 }
 
 // ── Loss Bracket (Financial Impact) ──────────────────────────
 
-export async function getLossBracketDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT loss_bracket, COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-    GROUP BY loss_bracket
-    ORDER BY
-      CASE loss_bracket
-        WHEN 'none' THEN 1
-        WHEN 'under_100' THEN 2
-        WHEN '100_to_1k' THEN 3
-        WHEN '1k_to_10k' THEN 4
-        WHEN '10k_to_100k' THEN 5
-        WHEN 'over_100k' THEN 6
-        WHEN 'unspecified' THEN 7
-      END
-  `;
-
-  return rows.map((r) => ({
-    name: r.loss_bracket as string,
-    count: Number(r.count),
-  }));
+const LOSS_BRACKET_ORDER = [
+  "none",
+  "under_100",
+  "100_to_1k",
+  "1k_to_10k",
+  "10k_to_100k",
+  "over_100k",
+  "unspecified",
+];
+
+export async function getLossBracketDistribution(cube?: Cube) {
+  cube ??= await loadFraudCube();
+  const rows = cube.counts("loss_bracket");
+
+  const rank = (name: string) => {
+    const i = LOSS_BRACKET_ORDER.indexOf(name);
+    return i === -1 ? LOSS_BRACKET_ORDER.length : i;
+  };
+  return [...rows].sort((x, y) => rank(x.name) - rank(y.name));
 }
 
 // ── Tags ─────────────────────────────────────────────────────
 
-export async function getFraudTags() {
-  const sql = getDb();
+export async function getFraudTags(cube?: Cube) {
+  cube ??= await loadFraudCube();
 
-  const rows = await sql`
-    SELECT tag, COUNT(*) as count
-    FROM (
-      SELECT jsonb_array_elements_text(tags) as tag
-      FROM fraud_classifications
-      WHERE is_relevant = true AND tags IS NOT NULL
-    ) t
-    GROUP BY tag
-    ORDER BY count DESC
-    LIMIT 50
-  `;
-
-  return rows.map((r) => ({
-    tag: r.tag as string,
-    count: Number(r.count),
+  return cube.counts("tag", { limit: 50 }).map((r) => ({
+    tag: r.name,
+    count: r.count,
   }));
 }
 
 // ── Hero Zone Stats ─────────────────────────────────────────
 
-export async function getFraudHeroStats() {
-  const sql = getDb();
-
-  const topSubreddits = await sql`
-    SELECT rp.subreddit, COUNT(*) as count
-    FROM fraud_classifications fc
-    JOIN raw_posts rp ON fc.post_id = rp.post_id
-    WHERE fc.is_relevant = true
-    GROUP BY rp.subreddit
-    ORDER BY count DESC
-    LIMIT 6
-  `;
-
+export async function getFraudHeroStats(cube?: Cube) {
+  cube ??= await loadFraudCube();
   return {
-    topSubreddits: topSubreddits.map((r) => ({
-      name: r.subreddit as string,
-      count: Number(r.count),
-    })),
+    topSubreddits: cube.counts("subreddit", { limit: 6 }),
   };
 }
 
@@ -255,14 +128,17 @@ export async function getAiThreatCount() {
   const sql = getDb();
 
   const [row] = await sql`
-    SELECT COUNT(*) as count FROM (
-      SELECT DISTINCT fc.post_id
-      FROM fraud_classifications fc
-      LEFT JOIN LATERAL jsonb_array_elements_text(fc.tags) as tag ON true
-      WHERE fc.is_relevant = true
-        AND (fc.fraud_type = 'deepfake_ai'
-             OR tag IN ('deepfake', 'ai_generated', 'ai_voice', 'ai_scam', 'voice_cloning', 'synthetic_identity'))
-    ) sub
+    SELECT COUNT(*) as count
+    FROM (
+      SELECT post_id FROM classification_tags
+      WHERE track = 'fraud'
+        AND tag IN ('deepfake', 'ai_generated', 'ai_voice', 'ai_scam', 'voice_cloning', 'synthetic_identity')
+      UNION
+      SELECT post_id FROM fraud_classifications
+      WHERE fraud_type = 'deepfake_ai'
+    ) matched
+    JOIN fraud_classifications fc ON fc.post_id = matched.post_id
+    WHERE fc.is_relevant = true
   `;
 
   return Number(row.count);
@@ -270,49 +146,70 @@ export async function getAiThreatCount() {
 
 // ── Insight Cards Data ──────────────────────────────────────
 
-export async function getFraudInsightData() {
+export async function getFraudInsightData(cube?: Cube) {
   const sql = getDb();
 
-  // Recovery void: posts about failed recovery, no recourse, support failures
-  const [recoveryRow] = await sql`
-    SELECT COUNT(DISTINCT fc.post_id) as count
-    FROM fraud_classifications fc,
-    LATERAL jsonb_array_elements_text(fc.tags) as tag
-    WHERE fc.is_relevant = true
-      AND tag IN ('no_recourse', 'support_failure', 'chargeback', 'recovery', 'bank_refused', 'frozen_account', 'account_locked', 'customer_support', 'refund', 'dispute', 'bank_response', 'platform_response', 'negligence', 'complaint')
+  // The three tag signals in one round trip, each an index lookup on classification_tags
+  const [row] = await sql`
+    SELECT
+      -- Recovery void: posts about failed recovery, no recourse, support failures
+      (SELECT COUNT(DISTINCT ct.post_id)
+       FROM classification_tags ct
+       JOIN fraud_classifications fc ON fc.post_id = ct.post_id
+       WHERE ct.track = 'fraud'
+         AND fc.is_relevant = true
+         AND ct.tag IN ('no_recourse', 'support_failure', 'chargeback', 'recovery', 'bank_refused', 'frozen_account', 'account_locked', 'customer_support', 'refund', 'dispute', 'bank_response', 'platform_response', 'negligence', 'complaint')
+      ) as recovery,
+
+      -- Social engineering: phishing, romance scams, manipulation-based fraud
+      (SELECT COUNT(*)
+       FROM (
+         SELECT post_id FROM classification_tags
+         WHERE track = 'fraud'
+           AND tag IN ('social_engineering', 'phishing', 'romance', 'pig_butchering', 'impersonation', 'catfishing', 'pretexting', 'baiting', 'vishing', 'smishing')
+         UNION
+         SELECT post_id FROM fraud_classifications
+         WHERE fraud_type IN ('social_engineering', 'romance_scam', 'phishing')
+       ) matched
+       JOIN fraud_classifications fc ON fc.post_id = matched.post_id
+       WHERE fc.is_relevant = true
+      ) as social_eng,
+
+      -- Organized crime signals: coordinated, cross-border, syndicate operations
+      (SELECT COUNT(DISTINCT ct.post_id)
+       FROM classification_tags ct
+       JOIN fraud_classifications fc ON fc.post_id = ct.post_id
+       WHERE ct.track = 'fraud'
+         AND fc.is_relevant = true
+         AND ct.tag IN ('organized', 'sophisticated', 'cross_border', 'ring', 'coordinated', 'syndicate', 'mule', 'money_mule', 'high_volume', 'international')
+      ) as organized
   `;
 
-  // Social engineering: phishing, romance scams, manipulation-based fraud
-  const [socialEngRow] = await sql`
-    SELECT COUNT(DISTINCT fc.post_id) as count
-    FROM fraud_classifications fc
-    WHERE fc.is_relevant = true
-      AND (fc.fraud_type IN ('social_engineering', 'romance_scam', 'phishing')
-           OR EXISTS (
-             SELECT 1 FROM jsonb_array_elements_text(fc.tags) as tag
-             WHERE tag IN ('social_engineering', 'phishing', 'romance', 'pig_butchering', 'impersonation', 'catfishing', 'pretexting', 'baiting', 'vishing', 'smishing')
-           ))
-  `;
+  return {
+    recoveryVoidCount: Number(row.recovery),
+    socialEngineeringCount: Number(row.social_eng),
+    organizedCrimeCount: Number(row.organized),
+    total: (cube ?? (await loadFraudCube())).total,
+  };
+}
 
-  // Organized crime signals: coordinated, cross-border, syndicate operations
-  const [organizedRow] = await sql`
-    SELECT COUNT(DISTINCT fc.post_id) as count
-    FROM fraud_classifications fc,
-    LATERAL jsonb_array_elements_text(fc.tags) as tag
-    WHERE fc.is_relevant = true
-      AND tag IN ('organized', 'sophisticated', 'cross_border', 'ring', 'coordinated', 'syndicate', 'mule', 'money_mule', 'high_volume', 'international')
-  `;
+// ── Everything the fraud tab renders ────────────────────────
+// backend/snapshot.py builds the same object for the static snapshot
 
-  const [totalRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM fraud_classifications
-    WHERE is_relevant = true
-  `;
+export async function getFraudTabData() {
+  // Two round trips: the cube, then the tag signal counts
+  const cube = await loadFraudCube();
+  const insightData = await getFraudInsightData(cube);
 
   return {
-    recoveryVoidCount: Number(recoveryRow.count),
-    socialEngineeringCount: Number(socialEngRow.count),
-    organizedCrimeCount: Number(organizedRow.count),
-    total: Number(totalRow.count),
+    kpis: await getFraudKPIs(cube),
+    heroStats: await getFraudHeroStats(cube),
+    fraudTypes: await getFraudTypeDistribution(cube),
+    industries: await getIndustryBreakdown(cube),
+    matrix: await getFraudIndustryMatrix(cube),
+    channels: await getChannelDistribution(cube),
+    lossBrackets: await getLossBracketDistribution(cube),
+    tags: await getFraudTags(cube),
+    insightData,
   };
 }
@@ -1,280 +1,183 @@
 import { getDb } from "@/lib/db";
+import { loadCube, type Cube } from "@/lib/queries/cube";
+
+// Every function takes the tab's cube so a full render reads it once
+// (getIdvTabData); called alone, each loads its own.
+const IDV_PAIRS: [string, string][] = [["platform_name", "friction_type"]];
+// Open-ended dimensions: the most cells any dataset below reads (platform_name
+// has one more for the "" cell the datasets exclude), plus the gig platforms
+// the insight cards sum
+const GIG_PLATFORMS = ["Uber", "Lyft", "DoorDash", "Instacart", "Grubhub", "Amazon Flex", "Shipt"];
+const IDV_LIMITS = { subreddit: 6, platform_name: 11 };
+
+function loadIdvCube() {
+  return loadCube("idv", {
+    pairs: IDV_PAIRS,
+    limits: IDV_LIMITS,
+    keep: { platform_name: GIG_PLATFORMS },
+  });
+}
 
 // ── KPI queries ──────────────────────────────────────────────
 
-export async function getIdvKPIs() {
-  const sql = getDb();
-
-  const [totalRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-  `;
-
-  const [topFriction] = await sql`
-    SELECT friction_type, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND friction_type NOT IN ('other', 'none')
-    GROUP BY friction_type
-    ORDER BY count DESC
-    LIMIT 1
-  `;
-
-  const [negSentiment] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND sentiment IN ('negative')
-  `;
-
-  const [topPlatform] = await sql`
-    SELECT platform_name, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND platform_name IS NOT NULL
-    GROUP BY platform_name
-    ORDER BY count DESC
-    LIMIT 1
-  `;
-
-  const total = Number(totalRow.count);
-  const negCount = Number(negSentiment.count);
+export async function getIdvKPIs(cube?: Cube) {
+  cube ??= await loadIdvCube();
+  const total = cube.total;
+  const [topFriction] = cube.counts("friction_type", { exclude: ["other", "none", ""], limit: 1 });
+  const negCount = cube.sum("sentiment", ["negative"]);
+  const [topPlatform] = cube.counts("platform_name", { exclude: [""], limit: 1 });
 
   return {
     totalPosts: total,
-    topFrictionType: topFriction.friction_type as string,
-    topFrictionCount: Number(topFriction.count),
+    topFrictionType: topFriction.name,
+    topFrictionCount: topFriction.count,
     negativeSentimentPercent: total > 0 ? (negCount / total) * 100 : 0,
-    topPlatform: (topPlatform.platform_name as string) || "Unknown",
-    topPlatformCount: Number(topPlatform.count),
+    topPlatform: topPlatform?.name || "Unknown",
+    topPlatformCount: topPlatform?.count ?? 0,
   };
 }
 
 // ── Friction Type Distribution ───────────────────────────────
 
-export async function getFrictionTypeDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT friction_type, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-    GROUP BY friction_type
-    ORDER BY count DESC
-  `;
-
-  return rows.map((r) => ({
-    name: r.friction_type as string,
-    count: Number(r.count),
-  }));
+export async function getFrictionTypeDistribution(cube?: Cube) {
+  cube ??= await loadIdvCube();
+  return cube.counts("friction_type");
 }
 
 // ── Verification Type Distribution ───────────────────────────
 
-export async function getVerificationTypeDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT verification_type, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-    GROUP BY verification_type
-    ORDER BY count DESC
-  `;
-
-  return rows.map((r) => ({
-    name: r.verification_type as string,
-    count: Number(r.count),
-  }));
+export async function getVerificationTypeDistribution(cube?: Cube) {
+  cube ??= await loadIdvCube();
+  return cube.counts("verification_type");
 }
 
 // ── Platform Friction Intelligence ───────────────────────────
 
-export async function getPlatformFriction() {
-  const sql = getDb();
-
-  const rows = await sql`
-    WITH platform_counts AS (
-      SELECT platform_name, COUNT(*) as total
-      FROM idv_classifications
-      WHERE is_relevant = true AND platform_name IS NOT NULL
-      GROUP BY platform_name
-      ORDER BY total DESC
-      LIMIT 10
-    ),
-    platform_top_friction AS (
-      SELECT DISTINCT ON (ic.platform_name)
-        ic.platform_name,
-        ic.friction_type,
-        COUNT(*) as friction_count
-      FROM idv_classifications ic
-      WHERE ic.is_relevant = true
-        AND ic.platform_name IN (SELECT platform_name FROM platform_counts)
-      GROUP BY ic.platform_name, ic.friction_type
-      ORDER BY ic.platform_name, friction_count DESC
-    )
-    SELECT pc.platform_name, pc.total, ptf.friction_type as top_friction
-    FROM platform_counts pc
-    JOIN platform_top_friction ptf ON pc.platform_name = ptf.platform_name
-    ORDER BY pc.total DESC
-  `;
-
-  return rows.map((r) => ({
-    platform: r.platform_name as string,
-    count: Number(r.total),
-    topFriction: r.top_friction as string,
-  }));
+export async function getPlatformFriction(cube?: Cube) {
+  cube ??= await loadIdvCube();
+  const platforms = cube.counts("platform_name", { exclude: [""], limit: 10 });
+
+  // Most common friction type per platform
+  const topFriction: Record<string, { name: string; count: number }> = {};
+  for (const { a: platform, b: friction, count } of cube.pairs("platform_name", "friction_type")) {
+    if (!topFriction[platform] || count > topFriction[platform].count) {
+      topFriction[platform] = { name: friction, count };
+    }
+  }
+
+  return platforms
+    .filter((p) => topFriction[p.name])
+    .map((p) => ({
+      platform: p.name,
+      count: p.count,
+      topFriction: topFriction[p.name].name,
+    }));
 }
 
 // ── Trigger Reason Distribution ──────────────────────────────
 
-export async function getTriggerReasonDistribution() {
-  const sql = getDb();
-
-  const rows = await sql`
-    SELECT trigger_reason, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND trigger_reason IS NOT NULL
-    GROUP BY trigger_reason
-    ORDER BY count DESC
-  `;
-
-  return rows.map((r) => ({
-    name: r.trigger_reason as string,
-    count: Number(r.count),
-  }));
+export async function getTriggerReasonDistribution(cube?: Cube) {
+  cube ??= await loadIdvCube();
+  return cube.counts("trigger_reason", { exclude: [""] });
 }
 
 // ── IDV Tags ─────────────────────────────────────────────────
 
-export async function getIdvTags() {
-  const sql = getDb();
+export async function getIdvTags(cube?: Cube) {
+  cube ??= await loadIdvCube();
 
-  const rows = await sql`
-    SELECT tag, COUNT(*) as count
-    FROM (
-      SELECT jsonb_array_elements_text(tags) as tag
-      FROM idv_classifications
-      WHERE is_relevant = true AND tags IS NOT NULL
-    ) t
-    GROUP BY tag
-    ORDER BY count DESC
-    LIMIT 50
-  `;
-
-  return rows.map((r) => ({
-    tag: r.tag as string,
-    count: Number(r.count),
+  return cube.counts("tag", { limit: 50 }).map((r) => ({
+    tag: r.name,
+    count: r.count,
   }));
 }
 
 // ── Hero Zone Stats ─────────────────────────────────────────
 
-export async function getIdvHeroStats() {
-  const sql = getDb();
-
-  const topSubreddits = await sql`
-    SELECT rp.subreddit, COUNT(*) as count
-    FROM idv_classifications ic
-    JOIN raw_posts rp ON ic.post_id = rp.post_id
-    WHERE ic.is_relevant = true
-    GROUP BY rp.subreddit
-    ORDER BY count DESC
-    LIMIT 6
-  `;
-
+export async function getIdvHeroStats(cube?: Cube) {
+  cube ??= await loadIdvCube();
   return {
-    topSubreddits: topSubreddits.map((r) => ({
-      name: r.subreddit as string,
-      count: Number(r.count),
-    })),
+    topSubreddits: cube.counts("subreddit", { limit: 6 }),
   };
 }
 
 // ── Insight Story Card Data ──────────────────────────────────
 
-export async function getIdvInsightData() {
+export async function getIdvInsightData(cube?: Cube) {
   const sql = getDb();
 
-  // Age verification count
+  // Age verification count. Pattern-match the distinct tag names in the cube's
+  // tag rollup, then look those tags up by index.
   const [ageRow] = await sql`
-    SELECT COUNT(DISTINCT ic.post_id) as count
-    FROM idv_classifications ic,
-    LATERAL jsonb_array_elements_text(ic.tags) as tag
+    WITH age_tags AS (
+      SELECT val_a as tag
+      FROM classification_cube
+      WHERE track = 'idv' AND dim_a = 'tag' AND dim_b = '' AND count > 0
+        AND (val_a ILIKE 'age%' OR val_a ILIKE '%_age' OR val_a ILIKE '%_age_%' OR val_a ILIKE '%age_%' OR val_a = 'underage' OR val_a ILIKE '%underage%')
+    )
+    SELECT COUNT(*) as count
+    FROM (
+      SELECT post_id FROM classification_tags
+      WHERE track = 'idv' AND tag IN (SELECT tag FROM age_tags)
+      UNION
+      SELECT post_id FROM idv_classifications
+      WHERE trigger_reason = 'age_gate'
+    ) matched
+    JOIN idv_classifications ic ON ic.post_id = matched.post_id
     WHERE ic.is_relevant = true
-      AND ((tag ILIKE 'age%' OR tag ILIKE '%_age' OR tag ILIKE '%_age_%' OR tag ILIKE '%age_%' OR tag = 'underage' OR tag ILIKE '%underage%') OR ic.trigger_reason = 'age_gate')
   `;
 
+  cube ??= await loadIdvCube();
+  const total = cube.total;
   // Gig worker count
-  const [gigRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND platform_name IN ('Uber', 'Lyft', 'DoorDash', 'Instacart', 'Grubhub', 'Amazon Flex', 'Shipt')
-  `;
-
+  const gigWorkerCount = cube.sum("platform_name", GIG_PLATFORMS);
   // False rejection stats
-  const [frRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true AND friction_type = 'false_rejection'
-  `;
-
-  const [totalRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-  `;
-
+  const falseRejectionCount = cube.sum("friction_type", ["false_rejection"]);
   // Liveness/biometric mentions, overall and by type
-  const [livenessRow] = await sql`
-    SELECT COUNT(DISTINCT ic.post_id) as count
-    FROM idv_classifications ic
-    WHERE ic.is_relevant = true
-      AND (ic.verification_type IN ('liveness_check', 'facial_age_estimation')
-           OR ic.verification_type = 'selfie_photo')
-  `;
-
-  const biometricBreakdown = await sql`
-    SELECT verification_type, COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true
-      AND verification_type IN ('selfie_photo', 'liveness_check', 'facial_age_estimation')
-    GROUP BY verification_type
-    ORDER BY count DESC
-  `;
-
+  const livenessCount = cube.sum("verification_type", [
+    "liveness_check", "facial_age_estimation", "selfie_photo",
+  ]);
+  const biometricBreakdown = cube.counts("verification_type", {
+    only: ["selfie_photo", "liveness_check", "facial_age_estimation"],
+  });
   // Privacy concern count
-  const [privacyRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true AND friction_type = 'privacy_concern'
-  `;
-
+  const privacyConcernCount = cube.sum("friction_type", ["privacy_concern"]);
   // No alternative method count
-  const [noAltRow] = await sql`
-    SELECT COUNT(*) as count
-    FROM idv_classifications
-    WHERE is_relevant = true AND friction_type = 'no_alternative_method'
-  `;
-
-  const total = Number(totalRow.count);
+  const noAlternativeCount = cube.sum("friction_type", ["no_alternative_method"]);
 
   return {
     ageVerificationCount: Number(ageRow.count),
-    gigWorkerCount: Number(gigRow.count),
-    falseRejectionCount: Number(frRow.count),
-    falseRejectionPercent: total > 0 ? (Number(frRow.count) / total) * 100 : 0,
-    livenessCount: Number(livenessRow.count),
+    gigWorkerCount,
+    falseRejectionCount,
+    falseRejectionPercent: total > 0 ? (falseRejectionCount / total) * 100 : 0,
+    livenessCount,
     biometricBreakdown: biometricBreakdown.map((r) => ({
-      type: r.verification_type as string,
-      count: Number(r.count),
+      type: r.name,
+      count: r.count,
     })),
-    privacyConcernCount: Number(privacyRow.count),
-    privacyConcernPercent: total > 0 ? (Number(privacyRow.count) / total) * 100 : 0,
-    noAlternativeCount: Number(noAltRow.count),
+    privacyConcernCount,
+    privacyConcernPercent: total > 0 ? (privacyConcernCount / total) * 100 : 0,
+    noAlternativeCount,
     total,
   };
 }
+
+// ── Everything the IDV tab renders ──────────────────────────
+// backend/snapshot.py builds the same object for the static snapshot
+
+export async function getIdvTabData() {
+  // Two round trips: the cube, then the age-signal count
+  const cube = await loadIdvCube();
+  const insightData = await getIdvInsightData(cube);
+
+  return {
+    idvKpis: await getIdvKPIs(cube),
+    heroStats: await getIdvHeroStats(cube),
+    frictionTypes: await getFrictionTypeDistribution(cube),
+    verificationTypes: await getVerificationTypeDistribution(cube),
+    triggerReasons: await getTriggerReasonDistribution(cube),
+    platformFriction: await getPlatformFriction(cube),
+    tags: await getIdvTags(cube),
+    insightData,
+  };
+}
@@ -0,0 +1,123 @@
+import { getDb } from "@/lib/db";
+import type { CubeTrack } from "@/lib/queries/cube";
+
+// Reads from classification_trends, the weekly and monthly rollups the
+// pipeline refreshes after each Pass 2 phase (refresh_classification_trends in
+// backend/db.py). A bucket with no posts for a value has no row; series are
+// returned with one point per bucket, empty ones included.
+
+export type TrendGrain = "week" | "month";
+
+// CUBE_DIMENSIONS in backend/cube.py
+export const TREND_DIMENSIONS: Record<CubeTrack, string[]> = {
+  fraud: ["fraud_type", "industry", "channel", "loss_bracket", "subreddit"],
+  idv: ["verification_type", "friction_type", "trigger_reason", "platform_name", "sentiment", "subreddit"],
+};
+
+// Default window: about six months either way
+const DEFAULT_BUCKETS: Record<TrendGrain, number> = { week: 26, month: 6 };
+// Buckets per moving average, as in the pipeline
+const AVERAGE_PERIODS: Record<TrendGrain, number> = { week: 4, month: 3 };
+
+export interface TrendPoint {
+  bucket: string; // YYYY-MM-DD, first day of the week / month
+  count: number;
+  movingAvg: number;
+  delta: number; // vs the previous bucket
+  deltaPercent: number | null; // null when the previous bucket was empty
+}
+
+export interface TrendSeries {
+  value: string; // "" for the track total
+  total: number;
+  points: TrendPoint[];
+}
+
+interface TrendRow {
+  val: string;
+  bucket: string;
+  count: number | string;
+  moving_avg: number | null;
+  delta: number | null;
+  delta_pct: number | null;
+}
+
+// ── Buckets ──────────────────────────────────────────────────
+
+function bucketStart(date: Date, grain: TrendGrain) {
+  const d = new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+  if (grain === "month") d.setUTCDate(1);
+  else d.setUTCDate(d.getUTCDate() - ((d.getUTCDay() + 6) % 7)); // back to Monday
+  return d;
+}
+
+function addBuckets(date: Date, grain: TrendGrain, n: number) {
+  const d = new Date(date);
+  if (grain === "month") d.setUTCMonth(d.getUTCMonth() + n);
+  else d.setUTCDate(d.getUTCDate() + 7 * n);
+  return d;
+}
+
+const isoDate = (d: Date) => d.toISOString().slice(0, 10);
+
+// ── Series ───────────────────────────────────────────────────
+
+// The top `top` values of a dimension over the last `buckets` weeks / months,
+// one point per bucket. dim "" returns the track total as a single series.
+export async function getTrends(
+  track: CubeTrack,
+  dim: string,
+  { grain = "week", buckets, top = 6 }: { grain?: TrendGrain; buckets?: number; top?: number } = {}
+): Promise<TrendSeries[]> {
+  const sql = getDb();
+  const last = bucketStart(new Date(), grain);
+  const first = addBuckets(last, grain, -((buckets ?? DEFAULT_BUCKETS[grain]) - 1));
+  // Earlier buckets, read so empty buckets in the window get an average and delta
+  const leadIn = AVERAGE_PERIODS[grain] - 1;
+  const from = addBuckets(first, grain, -leadIn);
+
+  const rows = (await sql`
+    WITH top AS (
+      SELECT val
+      FROM classification_trends
+      WHERE track = ${track} AND grain = ${grain} AND dim = ${dim} AND bucket >= ${isoDate(first)}
+      GROUP BY val
+      ORDER BY SUM(count) DESC, val
+      LIMIT ${top}
+    )
+    SELECT val, to_char(bucket, 'YYYY-MM-DD') AS bucket, count, moving_avg, delta, delta_pct
+    FROM classification_trends
+    WHERE track = ${track} AND grain = ${grain} AND dim = ${dim} AND bucket >= ${isoDate(from)}
+      AND val IN (SELECT val FROM top)
+    ORDER BY val, bucket
+  `) as TrendRow[];
+
+  const byValue = new Map<string, Map<string, TrendRow>>();
+  for (const r of rows) {
+    if (!byValue.has(r.val)) byValue.set(r.val, new Map());
+    byValue.get(r.val)!.set(r.bucket, r);
+  }
+
+  const axis: string[] = [];
+  for (let d = from; d <= last; d = addBuckets(d, grain, 1)) axis.push(isoDate(d));
+
+  const series = [...byValue].map(([value, stored]) => {
+    const counts = axis.map((bucket) => Number(stored.get(bucket)?.count ?? 0));
+    const points = axis.slice(leadIn).map((bucket, j): TrendPoint => {
+      const i = j + leadIn;
+      const r = stored.get(bucket);
+      const previous = counts[i - 1];
+      const recent = counts.slice(i - leadIn, i + 1);
+      return {
+        bucket,
+        count: counts[i],
+        movingAvg: r?.moving_avg ?? recent.reduce((sum, n) => sum + n, 0) / recent.length,
+        delta: r?.delta ?? counts[i] - previous,
+        deltaPercent: r ? r.delta_pct : previous > 0 ? -100 : null,
+      };
+    });
+    return { value, total: points.reduce((sum, p) => sum + p.count, 0), points };
+  });
+
+  return series.sort((a, b) => b.total - a.total || (a.value < b.value ? -1 : 1));
+}
@@ -0,0 +1,21 @@
+// Full-text search condition shared by the drill-down and posts APIs. Same
+// semantics as db.search_posts in the pipeline: web search syntax, matching
+// a post's title/body or any of its comments, via the GIN-indexed tsvector
+// columns raw_posts.search_tsv and comments.body_tsv.
+
+export const MAX_SEARCH_LENGTH = 200;
+
+// Condition on the classification alias `c`, using placeholder $paramIdx
+export function searchCondition(paramIdx: number) {
+  const tsq = `websearch_to_tsquery('english', $${paramIdx})`;
+  return `c.post_id IN (
+    SELECT post_id FROM raw_posts WHERE search_tsv @@ ${tsq}
+    UNION
+    SELECT post_id FROM comments WHERE body_tsv @@ ${tsq}
+  )`;
+}
+
+export function normalizeSearch(q: string | null) {
+  const trimmed = q?.trim().replace(/\s+/g, " ").slice(0, MAX_SEARCH_LENGTH);
+  return trimmed || null;
+}
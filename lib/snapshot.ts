@@ -0,0 +1,68 @@
+import { readFile } from "fs/promises";
+import path from "path";
+import { getDataVersion } from "@/lib/cache";
+import type { getFraudTabData } from "@/lib/queries/fraud";
+import type { getIdvTabData } from "@/lib/queries/idv";
+
+// Reads the bundle written by `python -m backend.pipeline export-snapshot`
+// (backend/snapshot.py). latest.json names the current content-hashed bundle
+// and the data_version it was exported at. The tabs fall back to live queries
+// when there is no bundle or the database has moved past that data_version,
+// e.g. a snapshot baked into the deployed image while the pipeline keeps
+// writing.
+
+const SNAPSHOT_DIR = path.join(process.cwd(), "public", "snapshots");
+const SCHEMA_VERSION = 1; // must match backend/snapshot.py
+
+export interface DashboardSnapshot {
+  schema: number;
+  data_version: number;
+  fraud: Awaited<ReturnType<typeof getFraudTabData>>;
+  idv: Awaited<ReturnType<typeof getIdvTabData>>;
+}
+
+interface SnapshotPointer {
+  version: string;
+  file: string;
+  data_version?: number; // missing in bundles from before it was recorded
+  generated_at: string;
+}
+
+// Bundles are immutable, so one parsed copy per version is enough
+let loaded: { version: string; snapshot: DashboardSnapshot } | null = null;
+
+export async function getSnapshot(): Promise<DashboardSnapshot | null> {
+  if (process.env.DASHBOARD_SNAPSHOT === "off") return null;
+
+  let pointer: SnapshotPointer;
+  try {
+    pointer = JSON.parse(await readFile(path.join(SNAPSHOT_DIR, "latest.json"), "utf8"));
+  } catch {
+    return null;
+  }
+  if (!(await isCurrent(pointer))) return null;
+  if (loaded?.version === pointer.version) return loaded.snapshot;
+
+  try {
+    const snapshot: DashboardSnapshot = JSON.parse(
+      await readFile(path.join(SNAPSHOT_DIR, pointer.file), "utf8")
+    );
+    if (snapshot.schema !== SCHEMA_VERSION) return null;
+    loaded = { version: pointer.version, snapshot };
+    return snapshot;
+  } catch {
+    return null;
+  }
+}
+
+// A snapshot is served only while no newer data has been written. If the
+// version check fails, the live queries would fail too, so serve the snapshot.
+async function isCurrent(pointer: SnapshotPointer) {
+  if (pointer.data_version === undefined) return false;
+  try {
+    return (await getDataVersion()) <= pointer.data_version;
+  } catch (error) {
+    console.error("[snapshot] data_version check failed:", error);
+    return true;
+  }
+}
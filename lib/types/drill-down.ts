@@ -30,6 +30,12 @@ export interface DrillDownResponse {
   breakdowns: Record<string, DrillDownBreakdownItem[]>;
   posts: DrillDownPost[];
   postsTotalCount: number;
+  postsNextCursor: string | null;
+}
+
+export interface DrillDownPostsPage {
+  posts: DrillDownPost[];
+  nextCursor: string | null;
 }
 
 export interface DrillDownConfig {
@@ -35,18 +35,27 @@ CREATE TABLE IF NOT EXISTS raw_posts (
     collection_source   TEXT,
     search_query        TEXT,
     collected_at        TIMESTAMP DEFAULT NOW(),
+    metadata_refreshed_at TIMESTAMP,        -- last score/num_comments refresh via /api/info
 
     -- Pre-filter flag (skipped before LLM pass)
     pre_filtered_out    BOOLEAN DEFAULT FALSE,
+    pre_filter_reason   TEXT,               -- deleted_content / negative_score / no_text_content / low_yield
 
     -- Pass 1: Boolean routing (is_fraud / is_idv)
     is_fraud            BOOLEAN,
     is_idv              BOOLEAN,
     refilter_confidence REAL,
+    refilter_tier       TEXT,               -- cascade tier that produced the verdict: fast / medium
     refilter_done       BOOLEAN DEFAULT FALSE,
 
     -- Comment collection flag
-    comments_fetched    BOOLEAN DEFAULT FALSE
+    comments_fetched    BOOLEAN DEFAULT FALSE,
+
+    -- Full-text search (title weighted above body); see db.search_posts
+    search_tsv          TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(selftext, '')), 'B')
+    ) STORED
 );
 
 CREATE INDEX IF NOT EXISTS idx_raw_posts_subreddit ON raw_posts(subreddit);
@@ -54,6 +63,8 @@ CREATE INDEX IF NOT EXISTS idx_raw_posts_created ON raw_posts(created_utc);
 CREATE INDEX IF NOT EXISTS idx_raw_posts_score ON raw_posts(score);
 CREATE INDEX IF NOT EXISTS idx_raw_posts_fraud ON raw_posts(is_fraud);
 CREATE INDEX IF NOT EXISTS idx_raw_posts_idv ON raw_posts(is_idv);
+-- Keyset pagination in the drill-down and posts APIs (lib/pagination.ts)
+CREATE INDEX IF NOT EXISTS idx_raw_posts_score_keyset ON raw_posts((COALESCE(score, 0)) DESC, post_id DESC);
 
 -- ============================================================
 -- Comments (fetched for relevant posts)
@@ -78,7 +89,12 @@ CREATE TABLE IF NOT EXISTS comments (
     stickied            BOOLEAN,
     distinguished       TEXT,
 
-    collected_at        TIMESTAMP DEFAULT NOW()
+    collected_at        TIMESTAMP DEFAULT NOW(),
+
+    -- Full-text search; see db.search_posts
+    body_tsv            TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('english', COALESCE(body, ''))
+    ) STORED
 );
 
 CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id);
@@ -99,6 +115,7 @@ CREATE TABLE IF NOT EXISTS fraud_classifications (
     tags                JSONB,
 
     llm_model           TEXT,
+    prompt_version      TEXT,
     classified_at       TIMESTAMP DEFAULT NOW()
 );
 
@@ -121,6 +138,7 @@ CREATE TABLE IF NOT EXISTS idv_classifications (
     tags                JSONB,
 
     llm_model           TEXT,
+    prompt_version      TEXT,
     classified_at       TIMESTAMP DEFAULT NOW()
 );
 
@@ -150,3 +168,161 @@ CREATE TABLE IF NOT EXISTS collection_runs (
     -- Config snapshot
     config_snapshot     JSONB
 );
+
+-- ============================================================
+-- Pass 2: Prompt versions and reclassification history
+-- ============================================================
+CREATE TABLE IF NOT EXISTS prompt_versions (
+    version             TEXT PRIMARY KEY,
+    track               TEXT NOT NULL,
+    llm_model           TEXT,
+    prompt_hash         TEXT NOT NULL,
+    schema_hash         TEXT NOT NULL,
+    field_hashes        JSONB NOT NULL,
+    system_prompt       TEXT,
+    first_seen_at       TIMESTAMP DEFAULT NOW()
+);
+
+-- Old classification rows, archived when a row from another prompt version overwrites them
+CREATE TABLE IF NOT EXISTS classification_history (
+    history_id          SERIAL PRIMARY KEY,
+    track               TEXT NOT NULL,
+    post_id             TEXT NOT NULL REFERENCES raw_posts(post_id),
+    prompt_version      TEXT,
+    replaced_by         TEXT NOT NULL,
+    snapshot            JSONB NOT NULL,
+    archived_at         TIMESTAMP DEFAULT NOW(),
+    UNIQUE (track, post_id, replaced_by)
+);
+
+CREATE INDEX IF NOT EXISTS idx_history_replaced_by ON classification_history(track, replaced_by);
+
+-- ============================================================
+-- Failed posts: retry backoff and dead-letter state per track
+-- (track: refilter / fraud / idv / dual / comments)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS post_failures (
+    track               TEXT NOT NULL,
+    post_id             TEXT NOT NULL REFERENCES raw_posts(post_id),
+    error_class         TEXT NOT NULL,
+    last_error          TEXT,
+    attempts            INTEGER NOT NULL DEFAULT 1,
+    first_failed_at     TIMESTAMP DEFAULT NOW(),
+    last_failed_at      TIMESTAMP DEFAULT NOW(),
+    next_eligible_at    TIMESTAMP NOT NULL,
+    dead                BOOLEAN DEFAULT FALSE,
+    PRIMARY KEY (track, post_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_failures_ineligible ON post_failures(track, next_eligible_at) WHERE NOT dead;
+CREATE INDEX IF NOT EXISTS idx_failures_dead ON post_failures(track) WHERE dead;
+
+-- ============================================================
+-- Source yield: smoothed relevance rate per subreddit / collection
+-- source / search query, rebuilt from Pass 1 and Pass 2 outcomes
+-- ============================================================
+CREATE TABLE IF NOT EXISTS source_yield (
+    dimension           TEXT NOT NULL,      -- subreddit / collection_source / search_query
+    key                 TEXT NOT NULL,
+    posts               INTEGER NOT NULL,   -- collected posts
+    refiltered          INTEGER NOT NULL,   -- posts with a Pass 1 verdict
+    relevant            INTEGER NOT NULL,   -- Pass 1 positive, not rejected by Pass 2
+    yield_rate          REAL NOT NULL,      -- (relevant + a) / (refiltered + a + b), beta prior
+    computed_at         TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (dimension, key)
+);
+
+-- ============================================================
+-- Dashboard summary cube: relevant-row counts per track for the
+-- total, each dimension, each pair of dimensions and each tag. Maintained
+-- incrementally by the Pass 2 upserts (see backend/cube.py);
+-- '' in dim_b means a single-dimension cell, '' in a value means NULL
+-- ============================================================
+CREATE TABLE IF NOT EXISTS classification_cube (
+    track               TEXT NOT NULL,      -- fraud / idv
+    dim_a               TEXT NOT NULL,
+    val_a               TEXT NOT NULL,
+    dim_b               TEXT NOT NULL,
+    val_b               TEXT NOT NULL,
+    count               INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (track, dim_a, val_a, dim_b, val_b)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cube_lookup ON classification_cube(track, dim_a, dim_b, count DESC);
+
+-- ============================================================
+-- Normalized Pass 2 tags, mirrored from the JSONB tags column by
+-- the upserts so tag filters and top-tag lists are index lookups
+-- ============================================================
+CREATE TABLE IF NOT EXISTS classification_tags (
+    track               TEXT NOT NULL,      -- fraud / idv
+    post_id             TEXT NOT NULL REFERENCES raw_posts(post_id),
+    tag                 TEXT NOT NULL,
+    PRIMARY KEY (track, post_id, tag)
+);
+
+CREATE INDEX IF NOT EXISTS idx_classification_tags_tag ON classification_tags(track, tag, post_id);
+
+-- ============================================================
+-- Data version: a single counter the pipeline bumps after phases
+-- that change dashboard data; the API result cache is keyed on it
+-- ============================================================
+CREATE TABLE IF NOT EXISTS data_version (
+    id                  BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single row
+    version             BIGINT NOT NULL DEFAULT 0,
+    phase               TEXT,               -- phase that last bumped it
+    updated_at          TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO data_version (id) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+-- ============================================================
+-- Trend rollups: relevant posts per week / month of created_utc,
+-- per track and dimension value ('' dim = track total). Refreshed
+-- by the pipeline for the buckets of newly classified rows
+-- ============================================================
+CREATE TABLE IF NOT EXISTS classification_trends (
+    track               TEXT NOT NULL,      -- fraud / idv
+    grain               TEXT NOT NULL,      -- week / month
+    dim                 TEXT NOT NULL,
+    val                 TEXT NOT NULL,
+    bucket              DATE NOT NULL,      -- first day of the ISO week / month
+    count               INTEGER NOT NULL,
+    moving_avg          REAL,               -- mean over the last 4 weeks / 3 months
+    delta               INTEGER,            -- change from the previous bucket
+    delta_pct           REAL,               -- NULL when the previous bucket was empty
+    PRIMARY KEY (track, grain, dim, val, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS classification_trends_state (
+    track               TEXT PRIMARY KEY,
+    classified_through  TIMESTAMP NOT NULL, -- latest classified_at folded into the rollups
+    refreshed_at        TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_fraud_classified_at ON fraud_classifications(classified_at);
+CREATE INDEX IF NOT EXISTS idx_idv_classified_at ON idv_classifications(classified_at);
+
+-- ============================================================
+-- Migrations for databases created before the columns above
+-- ============================================================
+ALTER TABLE fraud_classifications ADD COLUMN IF NOT EXISTS prompt_version TEXT;
+ALTER TABLE idv_classifications ADD COLUMN IF NOT EXISTS prompt_version TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_fraud_prompt_version ON fraud_classifications(prompt_version);
+CREATE INDEX IF NOT EXISTS idx_idv_prompt_version ON idv_classifications(prompt_version);
+
+ALTER TABLE raw_posts ADD COLUMN IF NOT EXISTS refilter_tier TEXT;
+ALTER TABLE raw_posts ADD COLUMN IF NOT EXISTS pre_filter_reason TEXT;
+ALTER TABLE raw_posts ADD COLUMN IF NOT EXISTS metadata_refreshed_at TIMESTAMP;
+
+ALTER TABLE raw_posts ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(selftext, '')), 'B')
+) STORED;
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS body_tsv TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('english', COALESCE(body, ''))
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_raw_posts_search ON raw_posts USING GIN (search_tsv);
+CREATE INDEX IF NOT EXISTS idx_comments_search ON comments USING GIN (body_tsv);